@@ -0,0 +1,241 @@
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+# -------------------- SETUP --------------------
+# Grades an answer against a reference answer locally and only asks the LLM
+# when the local tiers cannot decide. Tiers, cheapest first:
+#   1. normalized exact match
+#   2. numeric comparison: integers must match exactly; decimals may differ by
+#      ANSWER_NUMERIC_REL_TOL (off by default) so rounded answers can pass
+#   3. lexical similarity (token overlap F1, edit distance)
+#   4. embedding cosine similarity
+# Each tier gives a score in [0, 1]; an answer is rejected when the score is
+# <= 1 - ANSWER_CONFIDENCE_THRESHOLD. Similarity alone never accepts: "not
+# continuous", "O(n log n)" or "Python 3" score high against "continuous",
+# "O(log n)" or "Python 2". A score >= threshold accepts only answers with the
+# same content words as the reference (differing in function words, plurals
+# or word order); anything else goes to the LLM judge.
+ANSWER_CONFIDENCE_THRESHOLD = float(os.getenv("ANSWER_CONFIDENCE_THRESHOLD", "0.85"))
+# Opt-in relative tolerance for decimal references, e.g. 0.01 accepts 3.14 for 3.14159
+NUMERIC_REL_TOL = float(os.getenv("ANSWER_NUMERIC_REL_TOL", "0"))
+NUMERIC_ABS_TOL = float(os.getenv("ANSWER_NUMERIC_ABS_TOL", "1e-6"))
+USE_EMBEDDINGS = os.getenv("ANSWER_EMBEDDINGS", "1") == "1"
+# Cosine similarities at or below this count as unrelated (score 0)
+EMBEDDING_FLOOR = float(os.getenv("ANSWER_EMBEDDING_FLOOR", "0.5"))
+# References this short (in tokens) are specific enough to reject on lexical evidence alone
+SHORT_ANSWER_TOKENS = 3
+# Edit distance is quadratic, so it is only used for short answers
+EDIT_MAX_CHARS = 200
+JUDGE_MODEL = "gemini-1.5-flash"
+
+_ARTICLES = {"a", "an", "the"}
+_NUMBER_WORDS = {
+    word: str(value) for value, word in enumerate(
+        "zero one two three four five six seven eight nine ten eleven twelve thirteen fourteen "
+        "fifteen sixteen seventeen eighteen nineteen twenty".split()
+    )
+}
+# Dropped when comparing content; negations are content and always kept
+_FUNCTION_WORDS = frozenset(
+    "is are was were be been being am of to in on at by for with and or as that this these those it its "
+    "from which who whom what when where how do does did has have had can could will would should may "
+    "might must shall i you he she they we there their his her them our your so than then also very just "
+    "about into onto over called known".split()
+)
+_INTEGER = re.compile(r"^[-+]?\d+$")
+_NUMBER = re.compile(r"^[-+]?(\d+(\.\d*)?|\.\d+)(e[-+]?\d+)?%?$|^[-+]?\d+/\d+$")
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+# -------------------- NORMALIZATION --------------------
+def normalize(text):
+    """
+    Lowercases, folds accents, strips punctuation and articles, spells small
+    number words as digits and collapses whitespace.
+    """
+    text = unicodedata.normalize("NFKD", str(text).replace("\u2019", "'")).encode("ascii", "ignore").decode("ascii").lower()
+    text = re.sub(r"n't\b", " not", text).replace("cannot", "can not")  # isn't -> is not
+    text = re.sub(r"(?<=\d),(?=\d{3})", "", text)          # 1,000 -> 1000
+    text = re.sub(r"[^\w\s.%/+-]|(?<!\d)[.](?!\d)", " ", text)  # keep decimal points, drop the rest
+    return " ".join(_NUMBER_WORDS.get(token, token) for token in text.split() if token not in _ARTICLES)
+
+def parse_number(text):
+    """
+    Returns the value of a normalized answer that is a single number
+    (integer, decimal, scientific, fraction or percentage), else None.
+    """
+    text = text.replace(" ", "")
+    if not _NUMBER.match(text):
+        return None
+    if "/" in text:
+        numerator, denominator = text.split("/")
+        return float(numerator) / float(denominator) if float(denominator) else None
+    if text.endswith("%"):
+        return float(text[:-1]) / 100
+    return float(text)
+
+def content_tokens(text):
+    """
+    Content-bearing tokens of a normalized answer: function words dropped and
+    plurals folded; negations and numbers are kept.
+    """
+    tokens = []
+    for token in text.split():
+        if token in _FUNCTION_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+def same_content(answer, reference):
+    """
+    True if two normalized answers have the same content tokens, with any
+    numbers in the same order. A negation, number or other content word on
+    one side only means they may disagree however similar they look.
+    """
+    answer_tokens, reference_tokens = content_tokens(answer), content_tokens(reference)
+    def numbers(tokens):
+        return [token for token in tokens if any(char.isdigit() for char in token)]
+    return Counter(answer_tokens) == Counter(reference_tokens) and numbers(answer_tokens) == numbers(reference_tokens)
+
+# -------------------- SIMILARITY TIERS --------------------
+def token_f1(answer, reference):
+    """
+    Token overlap F1 between two normalized strings.
+    """
+    answer_tokens, reference_tokens = Counter(answer.split()), Counter(reference.split())
+    common = sum((answer_tokens & reference_tokens).values())
+    if not common:
+        return 0.0
+    precision = common / sum(answer_tokens.values())
+    recall = common / sum(reference_tokens.values())
+    return 2 * precision * recall / (precision + recall)
+
+def edit_similarity(answer, reference):
+    """
+    1 - Levenshtein distance / length of the longer string.
+    """
+    if answer == reference:
+        return 1.0
+    if not answer or not reference:
+        return 0.0
+    if len(answer) < len(reference):
+        answer, reference = reference, answer
+    previous = list(range(len(reference) + 1))
+    for i, a in enumerate(answer, 1):
+        current = [i]
+        for j, b in enumerate(reference, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a != b)))
+        previous = current
+    return 1 - previous[-1] / len(answer)
+
+@lru_cache(maxsize=2048)
+def _embed(text):
+    from resources import embedding_model
+    return tuple(embedding_model().embed_query(text))
+
+def embedding_similarity(answer, reference):
+    """
+    Cosine similarity of the answer and reference embeddings rescaled so
+    EMBEDDING_FLOOR maps to 0 and 1.0 to 1. Returns None if embeddings are
+    unavailable.
+    """
+    if not USE_EMBEDDINGS:
+        return None
+    try:
+        import numpy as np
+        a, b = np.array(_embed(answer)), np.array(_embed(reference))
+    except Exception:
+        return None
+    cosine = float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b) or 1.0))
+    return max(0.0, (cosine - EMBEDDING_FLOOR) / (1 - EMBEDDING_FLOOR))
+
+# -------------------- EVALUATION --------------------
+def _result(correct, confidence, method, scores):
+    with _stats_lock:
+        _stats[method] += 1
+    return {"correct": correct, "confidence": round(confidence, 3), "method": method, "scores": scores}
+
+def local_verdict(answer, reference, threshold=ANSWER_CONFIDENCE_THRESHOLD):
+    """
+    Runs the local tiers. Returns (correct, confidence, method, scores) where
+    correct is None when the local tiers are not confident enough.
+    """
+    answer_norm, reference_norm = normalize(answer), normalize(reference)
+    scores = {}
+    if not answer_norm:
+        return False, 1.0, "empty", scores
+    if answer_norm == reference_norm:
+        return True, 1.0, "exact", scores
+
+    answer_number, reference_number = parse_number(answer_norm), parse_number(reference_norm)
+    if answer_number is not None and reference_number is not None:
+        # Years, counts and other integer answers have no tolerance
+        tolerance = NUMERIC_ABS_TOL
+        if not _INTEGER.match(reference_norm.replace(" ", "")):
+            tolerance = max(NUMERIC_ABS_TOL, NUMERIC_REL_TOL * abs(reference_number))
+        scores["numeric_error"] = abs(answer_number - reference_number)
+        return scores["numeric_error"] <= tolerance, 1.0, "numeric", scores
+
+    # Similarity may reject on its own but only accepts rewordings
+    agrees = same_content(answer_norm, reference_norm)
+    scores["token_f1"] = token_f1(answer_norm, reference_norm)
+    if max(len(answer_norm), len(reference_norm)) <= EDIT_MAX_CHARS:
+        scores["edit"] = edit_similarity(answer_norm, reference_norm)
+    lexical = max(scores.values())
+    if lexical >= threshold and agrees:
+        return True, lexical, "lexical", scores
+    if lexical <= 1 - threshold and len(reference_norm.split()) <= SHORT_ANSWER_TOKENS:
+        return False, 1 - lexical, "lexical", scores
+
+    # Paraphrases of longer answers need semantic similarity
+    semantic = embedding_similarity(answer_norm, reference_norm)
+    if semantic is not None:
+        scores["embedding"] = semantic
+        score = max(lexical, semantic)
+        if score >= threshold and agrees:
+            return True, score, "embedding", scores
+        if score <= 1 - threshold:
+            return False, 1 - score, "embedding", scores
+    return None, 0.0, "uncertain", scores
+
+def llm_judge(question, answer, reference=None):
+    """
+    Asks the model whether an answer is correct. Returns True or False.
+    """
+    from resources import generative_model
+    prompt = f'Is the answer "{answer}" correct for the question "{question}"?'
+    if reference:
+        prompt += f' A reference answer is "{reference}".'
+    prompt += ' Respond with "Yes" or "No".'
+    response = generative_model(JUDGE_MODEL).generate_content(prompt)
+    return response.text.strip().lower().startswith("yes")
+
+def evaluate(question, answer, reference, threshold=ANSWER_CONFIDENCE_THRESHOLD, judge=llm_judge):
+    """
+    Grades an answer against a reference answer. The LLM judge is only called
+    when the local tiers are uncertain (or there is no reference answer).
+
+    Returns {"correct": bool, "confidence": float, "method": str, "scores": dict}
+    where method is one of empty, exact, numeric, lexical, embedding or llm.
+    """
+    if reference:
+        correct, confidence, method, scores = local_verdict(answer, reference, threshold)
+        if correct is not None:
+            return _result(correct, confidence, method, scores)
+    else:
+        scores = {}
+    return _result(judge(question, answer, reference), 1.0, "llm", scores)
+
+def evaluator_stats():
+    """
+    Counts of evaluations per method since the process started.
+    """
+    with _stats_lock:
+        total = sum(_stats.values())
+        return {**_stats, "total": total, "llm_share": round(_stats["llm"] / total, 3) if total else 0.0}
@@ -0,0 +1,376 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from aiohttp import web
+from profiling import trace_request
+
+# -------------------- SETUP --------------------
+# Asyncio HTTP API for the browser pages (challenge.html, demo):
+#
+#   python api_server.py                             # http://localhost:8080
+#   STUDY_BUDDY_FAKE_MODEL=1 python api_server.py    # offline, fake model
+#
+# Model calls run in worker threads so handlers never block the event loop.
+# Identical requests share one cached response, and identical requests that
+# arrive while the first one is still running wait for it instead of calling
+# the model again.
+#
+# The server also serves the pages themselves (http://localhost:8080/challenge.html),
+# so by default only that origin may call it. Every POST is rate limited per
+# client, bodies and fields are size-capped, and it listens on localhost
+# unless API_HOST says otherwise, so it cannot be used as an open proxy for
+# the Gemini key.
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8080"))
+API_CACHE_SIZE = int(os.getenv("API_CACHE_SIZE", "1024"))
+API_CACHE_TTL = int(os.getenv("API_CACHE_TTL", str(6 * 3600)))
+MODEL_CONCURRENCY = int(os.getenv("API_MODEL_CONCURRENCY", "8"))
+# Comma-separated origins allowed to call the API from a browser
+ALLOWED_ORIGINS = os.getenv("API_ALLOWED_ORIGIN", f"http://localhost:{API_PORT},http://127.0.0.1:{API_PORT}").split(",")
+# POST requests per client per minute
+API_RATE_LIMIT = int(os.getenv("API_RATE_LIMIT", "30"))
+API_MAX_BODY_BYTES = int(os.getenv("API_MAX_BODY_BYTES", str(64 * 1024)))
+MAX_FIELD_CHARS = 4000
+MAX_HISTORY_TURNS = 20
+STATIC_PAGES = {"challenge.html": "text/html", "challenge.css": "text/css", "demo": "text/html"}
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# -------------------- RESPONSE CACHE --------------------
+class ResponseCache:
+    """
+    TTL + LRU cache of JSON-serializable results with request coalescing.
+    """
+    def __init__(self, max_entries=API_CACHE_SIZE, ttl=API_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            return entry[1]
+        self._entries.pop(key, None)
+        return None
+
+    def put(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key, compute, use_cache=True):
+        """
+        Returns the cached value for key or awaits compute() (a coroutine
+        function), sharing one computation between concurrent callers.
+        With use_cache=False the result is computed fresh but still stored.
+        """
+        if use_cache:
+            value = self.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            task = self._in_flight.get(key)
+            if task is not None:
+                self.coalesced += 1
+                return await asyncio.shield(task)
+
+        self.misses += 1
+        task = asyncio.ensure_future(compute())
+        self._in_flight[key] = task
+        try:
+            # shield: a client disconnecting must not cancel the call for others
+            value = await asyncio.shield(task)
+        finally:
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+        self.put(key, value)
+        return value
+
+def request_key(endpoint, payload):
+    body = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{endpoint}\0{body}".encode("utf-8")).hexdigest()
+
+# -------------------- RATE LIMITING --------------------
+class RateLimiter:
+    """
+    Token bucket per client: `rate` requests per minute, bursting up to `rate`.
+    """
+    def __init__(self, rate=API_RATE_LIMIT):
+        self.rate = rate
+        self._buckets = {}  # client -> (tokens, updated_at)
+
+    def allow(self, client):
+        """
+        Takes a token for client. Returns 0 if allowed, else seconds to wait.
+        """
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(client, (self.rate, now))
+        tokens = min(self.rate, tokens + (now - updated_at) * self.rate / 60)
+        if tokens < 1:
+            self._buckets[client] = (tokens, now)
+            return (1 - tokens) * 60 / self.rate
+        self._buckets[client] = (tokens - 1, now)
+        if len(self._buckets) > 10_000:
+            # Forget clients whose buckets have refilled
+            self._buckets = {
+                key: value for key, value in self._buckets.items() if now - value[1] < 60
+            }
+        return 0
+
+# -------------------- MODEL CALLS --------------------
+async def run_blocking(request, fn, *args):
+    """
+    Runs a blocking tool function in a worker thread, bounded by MODEL_CONCURRENCY.
+    """
+    async with request.app[MODEL_SLOTS]:
+        return await asyncio.to_thread(fn, *args)
+
+def _bad_request(message):
+    return web.HTTPBadRequest(text=json.dumps({"error": message}), content_type="application/json")
+
+def _required(payload, *fields):
+    missing = [field for field in fields if not str(payload.get(field, "")).strip()]
+    if missing:
+        raise _bad_request("Missing fields: " + ", ".join(missing))
+
+def _text(payload, field, default=None):
+    """
+    A string field, stripped and at most MAX_FIELD_CHARS long. Fields without
+    a default are required.
+    """
+    value = payload.get(field, default)
+    if value is None:
+        raise _bad_request(f"Missing fields: {field}")
+    if not isinstance(value, str):
+        raise _bad_request(f"{field} must be a string.")
+    value = value.strip()
+    if default is None and not value:
+        raise _bad_request(f"Missing fields: {field}")
+    if len(value) > MAX_FIELD_CHARS:
+        raise _bad_request(f"{field} is longer than {MAX_FIELD_CHARS} characters.")
+    return value
+
+def _int(payload, field, default, low, high):
+    value = payload.get(field, default)
+    if isinstance(value, bool):
+        raise _bad_request(f"{field} must be an integer.")
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise _bad_request(f"{field} must be an integer.")
+    return max(low, min(high, value))
+
+def _history(payload):
+    """
+    Chat history as [{"role": "user"|"assistant", "text": str}], keeping the
+    last MAX_HISTORY_TURNS turns.
+    """
+    history = payload.get("history", [])
+    if not isinstance(history, list):
+        raise _bad_request("history must be a list.")
+    turns = []
+    for turn in history[-MAX_HISTORY_TURNS:]:
+        if not isinstance(turn, dict) or turn.get("role", "user") not in ("user", "assistant"):
+            raise _bad_request('history items must be {"role": "user" or "assistant", "text": "..."}.')
+        turns.append({"role": turn.get("role", "user"), "text": _text(turn, "text", "")})
+    return turns
+
+async def _cached_json(request, endpoint, payload, compute, use_cache=True):
+    cache = request.app[CACHE]
+    try:
+        result = await cache.get_or_compute(request_key(endpoint, payload), compute, use_cache)
+    except web.HTTPException:
+        raise
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=502)
+    return web.json_response(result)
+
+async def _payload(request):
+    try:
+        payload = await request.json()
+    except json.JSONDecodeError:
+        raise _bad_request("Body must be JSON.")
+    if not isinstance(payload, dict):
+        raise _bad_request("Body must be a JSON object.")
+    return payload
+
+# -------------------- HANDLERS --------------------
+# Generator modules are imported only after the payload is validated, so a
+# bad request is a 400 whatever is installed.
+async def challenge_question(request):
+    payload = await _payload(request)
+    topic = _text(payload, "topic")
+    question_type = _text(payload, "question_type", "Theory")
+
+    async def compute():
+        import challenge
+        return {"question": await run_blocking(request, challenge.generate_question, topic, question_type)}
+
+    # "fresh" is sent by the Reject button, which wants a different question
+    key_payload = {"topic": topic, "question_type": question_type}
+    return await _cached_json(request, "challenge/question", key_payload, compute,
+                              use_cache=not payload.get("fresh", False))
+
+async def challenge_check(request):
+    payload = await _payload(request)
+    key_payload = {"question": _text(payload, "question"), "answer": _text(payload, "answer")}
+
+    async def compute():
+        import challenge
+        grade = await run_blocking(request, challenge.grade_answer, key_payload["question"], key_payload["answer"])
+        return {"correct": grade["correct"], "method": grade["method"]}
+
+    return await _cached_json(request, "challenge/check", key_payload, compute)
+
+async def challenge_evaluate(request):
+    payload = await _payload(request)
+    key_payload = {
+        "question": _text(payload, "question"),
+        "question_type": _text(payload, "question_type", "Theory"),
+        "answer": _text(payload, "answer"),
+    }
+
+    async def compute():
+        import challenge
+        evaluation = await run_blocking(
+            request, challenge.evaluate_answer, key_payload["question"], key_payload["question_type"],
+            key_payload["answer"],
+        )
+        return {"evaluation": evaluation}
+
+    return await _cached_json(request, "challenge/evaluate", key_payload, compute)
+
+async def quiz_handler(request):
+    payload = await _payload(request)
+    num_questions = _int(payload, "num_questions", 5, 1, 20)
+    key_payload = {"topic": _text(payload, "topic"), "num_questions": num_questions}
+
+    async def compute():
+        from content_generation import generate_quiz
+        from response_parsing import parse_quiz_response
+        raw = await run_blocking(request, generate_quiz, key_payload["topic"], num_questions)
+        return {"questions": parse_quiz_response(raw), "raw": raw}
+
+    return await _cached_json(request, "quiz", key_payload, compute)
+
+async def notes_handler(request):
+    payload = await _payload(request)
+    key_payload = {"topic": _text(payload, "topic"), "detail_level": _text(payload, "detail_level", "Moderate")}
+
+    async def compute():
+        from content_generation import generate_notes
+        from response_parsing import clean_ai_output, extract_json_from_text
+        raw = await run_blocking(request, generate_notes, key_payload["topic"], key_payload["detail_level"])
+        cleaned = clean_ai_output(raw)
+        try:
+            result = json.loads(cleaned)
+        except json.JSONDecodeError:
+            result = extract_json_from_text(cleaned)
+        if not result:
+            raise ValueError("Failed to parse AI output.")
+        return {"notes": result.get("notes", ""), "images": result.get("images", [])}
+
+    return await _cached_json(request, "notes", key_payload, compute)
+
+def _chat_reply(message, history):
+    from resources import generative_model
+    transcript = "".join(f"{turn['role'].capitalize()}: {turn['text']}\n" for turn in history)
+    prompt = (
+        "You are AI Study Buddy, a helpful tutor. Continue the conversation.\n\n"
+        f"{transcript}User: {message}\nAssistant:"
+    )
+    return generative_model("gemini-1.5-flash").generate_content(prompt).text
+
+async def chat_handler(request):
+    payload = await _payload(request)
+    key_payload = {"message": _text(payload, "message"), "history": _history(payload)}
+
+    async def compute():
+        return {"reply": await run_blocking(request, _chat_reply, key_payload["message"], key_payload["history"])}
+
+    return await _cached_json(request, "chat", key_payload, compute)
+
+async def health(request):
+    from answer_evaluator import evaluator_stats
+    cache = request.app[CACHE]
+    return web.json_response({
+        "status": "ok",
+        "cache": {"entries": len(cache._entries), "hits": cache.hits, "misses": cache.misses,
+                  "coalesced": cache.coalesced},
+        "grading": evaluator_stats(),
+    })
+
+async def preflight(request):
+    # CORS headers are added by cors_middleware
+    return web.Response()
+
+async def static_page(request):
+    name = request.match_info["name"]
+    return web.FileResponse(os.path.join(REPO_DIR, name), headers={"Content-Type": STATIC_PAGES[name]})
+
+# -------------------- APP --------------------
+CACHE = web.AppKey("cache", ResponseCache)
+RATE_LIMITER = web.AppKey("rate_limiter", RateLimiter)
+MODEL_SLOTS = web.AppKey("model_slots", asyncio.Semaphore)
+
+def _add_cors_headers(request, response):
+    origin = request.headers.get("Origin")
+    if origin in ALLOWED_ORIGINS or "*" in ALLOWED_ORIGINS:
+        response.headers["Access-Control-Allow-Origin"] = origin or "*"
+        response.headers["Vary"] = "Origin"
+        response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
+        response.headers["Access-Control-Allow-Headers"] = "Content-Type"
+
+@web.middleware
+async def cors_middleware(request, handler):
+    # Error responses (400, 413, 429, ...) carry the CORS headers too, so a
+    # browser on an allowed origin can read their JSON
+    try:
+        if request.method == "POST":
+            wait = request.app[RATE_LIMITER].allow(request.remote)
+            if wait:
+                raise web.HTTPTooManyRequests(
+                    text=json.dumps({"error": "Too many requests; slow down."}),
+                    content_type="application/json",
+                    headers={"Retry-After": str(int(wait) + 1)},
+                )
+        # One trace per request; exported when PROFILE_EXPORT_DIR is set
+        with trace_request(f"{request.method} {request.path}"):
+            response = await handler(request)
+    except web.HTTPException as error:
+        _add_cors_headers(request, error)
+        raise
+    _add_cors_headers(request, response)
+    return response
+
+async def _on_startup(app):
+    app[MODEL_SLOTS] = asyncio.Semaphore(MODEL_CONCURRENCY)
+
+def create_app():
+    # Larger bodies are rejected with 413 before a handler runs
+    app = web.Application(middlewares=[cors_middleware], client_max_size=API_MAX_BODY_BYTES)
+    app[CACHE] = ResponseCache()
+    app[RATE_LIMITER] = RateLimiter(API_RATE_LIMIT)
+    app.on_startup.append(_on_startup)
+    app.router.add_get("/api/health", health)
+    app.router.add_post("/api/challenge/question", challenge_question)
+    app.router.add_post("/api/challenge/check", challenge_check)
+    app.router.add_post("/api/challenge/evaluate", challenge_evaluate)
+    app.router.add_post("/api/quiz", quiz_handler)
+    app.router.add_post("/api/notes", notes_handler)
+    app.router.add_post("/api/chat", chat_handler)
+    app.router.add_route("OPTIONS", "/api/{tail:.*}", preflight)
+    app.router.add_get("/{name:" + "|".join(re.escape(name) for name in STATIC_PAGES) + "}", static_page)
+    return app
+
+if __name__ == "__main__":
+    web.run_app(create_app(), host=API_HOST, port=API_PORT)
@@ -1,28 +1,14 @@
 import streamlit as st
-from dotenv import load_dotenv
-import os
-import langchain
-import langchain_community
-import google.generativeai as genai
-from PyPDF2 import PdfReader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain.vectorstores import FAISS
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.chains.question_answering import load_qa_chain
-from langchain.prompts import PromptTemplate
-from youtube_transcript_api import YouTubeTranscriptApi
-from fpdf import FPDF
-import requests
-from io import BytesIO
-
-# Load environment variables
-load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+from transcript_store import extract_video_id, get_transcript, memoized_summary, segments_to_text
+from video_qa import answer_question
+from resources import chat_model, embedding_model, generative_model
+from profiling import profiled
 
 # PDF Generation and Chat with PDF Functionality
 
+@profiled()
 def get_pdf_text(pdf_docs):
+    from PyPDF2 import PdfReader
     text = ""
     for pdf in pdf_docs:
         pdf_reader = PdfReader(pdf)
@@ -30,17 +16,23 @@ def get_pdf_text(pdf_docs):
             text += page.extract_text()
     return text
 
+@profiled()
 def get_text_chunks(text):
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=10000, chunk_overlap=1000)
     chunks = text_splitter.split_text(text)
     return chunks
 
+@profiled()
 def get_vector_store(text_chunks):
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+    from langchain.vectorstores import FAISS
+    embeddings = embedding_model()
     vector_store = FAISS.from_texts(text_chunks, embedding=embeddings)
     vector_store.save_local("faiss_index")
 
 def get_conversational_chain():
+    from langchain.prompts import PromptTemplate
+    from langchain.chains.question_answering import load_qa_chain
     prompt_template = """
     Answer the question as detailed as possible from the provided context, make sure to provide all the details, if the answer is not in
     provided context just say, "answer is not available in the context", don't provide the wrong answer\n\n
@@ -48,13 +40,15 @@ def get_conversational_chain():
     Question: \n{question}\n
     Answer:
     """
-    model = ChatGoogleGenerativeAI(model="gemini-pro", temperature=0.3)
+    model = chat_model("gemini-pro", temperature=0.3)
     prompt = PromptTemplate(template=prompt_template, input_variables=["context", "question"])
     chain = load_qa_chain(model, chain_type="stuff", prompt=prompt)
     return chain
 
+@profiled()
 def user_input(user_question):
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+    from langchain.vectorstores import FAISS
+    embeddings = embedding_model()
     new_db = FAISS.load_local("faiss_index", embeddings, allow_dangerous_deserialization=True)
     docs = new_db.similarity_search(user_question)
 
@@ -69,58 +63,43 @@ prompt = """You are a YouTube video summarizer. You will be taking the transcrip
 and summarizing the entire video and providing the important summary in points
 within 250 words. Please provide the summary of the text given here: """
 
+@profiled()
 def extract_transcript_details(youtube_video_url):
-    try:
-        video_id = youtube_video_url.split("=")[1]
-        transcript_text = YouTubeTranscriptApi.get_transcript(video_id)
-
-        transcript = ""
-        for i in transcript_text:
-            transcript += " " + i["text"]
-        return transcript
-    except Exception as e:
-        raise e
+    video_id = youtube_video_url.split("=")[1]
+    segments, language, error = get_transcript(video_id, languages=("en",))
+    if error:
+        raise RuntimeError(error)
+    return segments_to_text(segments)
 
+@profiled()
 def generate_gemini_content(transcript_text, prompt):
-    model = genai.GenerativeModel("gemini-pro")
+    model = generative_model("gemini-pro")
     response = model.generate_content(prompt + transcript_text)
     return response.text
 
+@profiled()
 def generate_pdf(content, youtube_link):
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-
-    # Add Title Section
-    pdf.set_font("Arial", style='B', size=16)
-    pdf.cell(200, 10, txt="YouTube Video Summary", ln=True, align='C')
+    from pdf_renderer import render_pdf
+    from image_cache import fetch_image
+    blocks = [("title", "YouTube Video Summary"), ("space", 10)]
 
     # Add Thumbnail Image
     video_id = youtube_link.split("=")[1]
     image_url = f"http://img.youtube.com/vi/{video_id}/0.jpg"
-
-    try:
-        # Fetch the thumbnail image
-        response = requests.get(image_url)
-        img = BytesIO(response.content)
-        pdf.image(img, x=10, y=30, w=180)  # Adjusting the image position and size
-    except Exception as e:
+    thumbnail_path, error = fetch_image(image_url)
+    if thumbnail_path:
+        blocks.append(("image", thumbnail_path))
+    else:
         # If error occurs while fetching the image
-        print(f"Error fetching thumbnail: {e}")
-        pdf.set_font("Arial", size=12)
-        pdf.ln(20)  # Space before error message
-        pdf.cell(200, 10, txt="Error fetching video thumbnail.", ln=True, align='C')
+        print(f"Error fetching thumbnail: {error}")
+        blocks.append(("space", 20))
+        blocks.append(("notice", "Error fetching video thumbnail."))
 
     # Add Summary Content
-    pdf.ln(90)  # Adding space after the image for content
-    pdf.set_font("Arial", size=12)
-    pdf.multi_cell(0, 10, content)
+    blocks.append(("space", 10))
+    blocks.append(("text", content))
 
-    # Save the PDF locally
-    pdf_output_path = os.path.join(os.getcwd(), "summarized_content.pdf")
-    pdf.output(pdf_output_path)
-
-    return pdf_output_path
+    return render_pdf(blocks)
 
 
 # Main Functionality
@@ -160,7 +139,10 @@ def main():
             if 'transcript_text' not in st.session_state:
                 transcript_text = extract_transcript_details(youtube_link)
                 st.session_state.transcript_text = transcript_text
-                summary = generate_gemini_content(transcript_text, prompt)
+                summary = memoized_summary(
+                    "gemini-pro", prompt + transcript_text,
+                    lambda: generate_gemini_content(transcript_text, prompt),
+                )
                 st.session_state.summary = summary
                 st.write(summary)
             else:
@@ -168,14 +150,20 @@ def main():
 
         user_question = st.text_input("Ask a question about the video:")
 
-        if user_question:
-            response = generate_gemini_content(st.session_state.transcript_text + "\n" + user_question, prompt)
-            st.write("Answer: ", response)
+        if user_question and youtube_link:
+            video_id = extract_video_id(youtube_link)
+            segments, language, error = get_transcript(video_id, languages=("en",))
+            if error:
+                st.error(error)
+            else:
+                response, sources = answer_question(video_id, segments, user_question)
+                st.write("Answer: ", response)
+                st.markdown("Sources: " + ", ".join(f"[{stamp}]({link})" for stamp, link in sources))
 
         if st.button("Download Summary as PDF"):
             if 'summary' in st.session_state:
-                pdf_file = generate_pdf(st.session_state.summary, youtube_link)
-                st.download_button("Download PDF", pdf_file, file_name="summarized_content.pdf")
+                pdf_bytes = generate_pdf(st.session_state.summary, youtube_link)
+                st.download_button("Download PDF", pdf_bytes, file_name="summarized_content.pdf")
 
 if __name__ == "__main__":
     main()
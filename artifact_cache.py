@@ -0,0 +1,122 @@
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from profiling import span
+
+# -------------------- SETUP --------------------
+# Streamlit reruns the whole script on every widget change, but imported
+# modules survive reruns, so a module-level cache lets every tool reuse work
+# done on the same uploaded file (text, chunks, embeddings) across reruns,
+# sessions and tools.
+ARTIFACT_CACHE_MAX_BYTES = int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+ARTIFACT_CACHE_MAX_ENTRIES = int(os.getenv("ARTIFACT_CACHE_MAX_ENTRIES", "512"))
+
+_entries = OrderedDict()  # key -> (value, size)
+_total_bytes = 0
+_lock = threading.Lock()
+
+# -------------------- KEYS --------------------
+def upload_hash(uploaded_file):
+    """
+    Returns the SHA-256 of an uploaded file's content without moving its read position.
+    """
+    if hasattr(uploaded_file, "getbuffer"):
+        # A view of the upload's buffer; getvalue() would copy the whole file
+        with uploaded_file.getbuffer() as data:
+            return hashlib.sha256(data).hexdigest()
+    if hasattr(uploaded_file, "getvalue"):
+        data = uploaded_file.getvalue()
+    else:
+        position = uploaded_file.tell()
+        uploaded_file.seek(0)
+        data = uploaded_file.read()
+        uploaded_file.seek(position)
+    return hashlib.sha256(data).hexdigest()
+
+def combined_hash(content_hashes):
+    """
+    Returns one key for an ordered group of uploads, e.g. all PDFs processed together.
+    """
+    return hashlib.sha256("\0".join(content_hashes).encode("utf-8")).hexdigest()
+
+# -------------------- SIZE ESTIMATES --------------------
+def estimate_size(value):
+    """
+    Approximate memory held by a cached value. Handles strings, containers,
+    numpy arrays and FAISS vector stores; anything else falls back to sys.getsizeof.
+    """
+    if isinstance(value, (str, bytes, bytearray)):
+        return sys.getsizeof(value)
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    index = getattr(value, "index", None)
+    if index is not None and hasattr(index, "ntotal"):
+        docstore = getattr(getattr(value, "docstore", None), "_dict", {})
+        texts = sum(estimate_size(doc.page_content) for doc in docstore.values())
+        # Quantized indexes store code_size bytes per vector instead of 4 * d
+        return index.ntotal * getattr(index, "code_size", index.d * 4) + texts
+    return sys.getsizeof(value)
+
+# -------------------- CACHE --------------------
+def _evict():
+    global _total_bytes
+    while _entries and (_total_bytes > ARTIFACT_CACHE_MAX_BYTES or len(_entries) > ARTIFACT_CACHE_MAX_ENTRIES):
+        _, (value, size, on_evict) = _entries.popitem(last=False)
+        _total_bytes -= size
+        _release(value, on_evict)
+
+def _release(value, on_evict):
+    if on_evict is None:
+        return
+    try:
+        on_evict(value)
+    except Exception as e:
+        print(f"Releasing an evicted artifact failed: {e}")
+
+def get_artifact(content_hash, kind, compute, params=(), on_evict=None):
+    """
+    Returns the cached artifact of the given kind for a content hash, calling
+    compute() on a miss. params distinguishes variants of the same artifact
+    (e.g. chunk size). Least recently used entries are evicted once the cache
+    exceeds ARTIFACT_CACHE_MAX_BYTES or ARTIFACT_CACHE_MAX_ENTRIES, calling
+    on_evict(value) to free anything the value owns outside the cache; a
+    value larger than the whole budget is returned but not kept.
+    """
+    global _total_bytes
+    key = (content_hash, kind, tuple(params))
+    with _lock:
+        if key in _entries:
+            _entries.move_to_end(key)
+            return _entries[key][0]
+
+    with span(f"compute:{kind}"):
+        value = compute()
+    size = estimate_size(value)
+    if size > ARTIFACT_CACHE_MAX_BYTES:
+        return value
+
+    with _lock:
+        if key in _entries:
+            _total_bytes -= _entries[key][1]
+        _entries[key] = (value, size, on_evict)
+        _total_bytes += size
+        _evict()
+    return value
+
+def discard_artifact(content_hash, kind, params=()):
+    global _total_bytes
+    with _lock:
+        entry = _entries.pop((content_hash, kind, tuple(params)), None)
+        if entry:
+            _total_bytes -= entry[1]
+            _release(entry[0], entry[2])
+
+def cache_stats():
+    with _lock:
+        return {"entries": len(_entries), "bytes": _total_bytes, "max_bytes": ARTIFACT_CACHE_MAX_BYTES}
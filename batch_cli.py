@@ -0,0 +1,197 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from profiling import trace_request
+
+# -------------------- SETUP --------------------
+# Headless bulk generation for whole syllabi:
+#
+#   python batch_cli.py topics.csv --tool notes --out build/notes --concurrency 4
+#
+# Input is CSV (header row) or JSONL with a "topic" field per row and
+# optional "id", "tool", "detail_level", "num_questions", "num_flashcards"
+# and "text" (source notes for flashcards) fields. Every finished item is
+# appended to <out>/checkpoint.jsonl, so re-running the same command after an
+# interruption only processes what is left.
+TOOLS = ("notes", "quiz", "flashcards", "path")
+CHECKPOINT_NAME = "checkpoint.jsonl"
+
+# -------------------- INPUT --------------------
+def read_items(path, default_tool):
+    """
+    Reads topic rows from a CSV or JSONL file and gives each a stable id.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    items = []
+    for row in rows:
+        row = {key: value for key, value in row.items() if value not in (None, "")}
+        row.setdefault("tool", default_tool)
+        if row["tool"] not in TOOLS:
+            raise ValueError(f"Unknown tool {row['tool']!r} for topic {row.get('topic')!r}")
+        if "id" not in row:
+            key = json.dumps(row, sort_keys=True).encode("utf-8")
+            row["id"] = hashlib.sha256(key).hexdigest()[:12]
+        items.append(row)
+    return items
+
+def slugify(text, limit=50):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:limit] or "item"
+
+# -------------------- CHECKPOINT --------------------
+def load_checkpoint(path):
+    """
+    Returns the ids of items already completed successfully.
+    A partially written last line (from a hard kill) is ignored.
+    """
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("status") == "ok":
+                    done.add(record["id"])
+    return done
+
+class Checkpoint:
+    def __init__(self, path):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def record(self, entry):
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+# -------------------- GENERATION --------------------
+def generate_item(item):
+    """
+    Runs one generator and returns (text, pdf_bytes, extra_json or None).
+    Tool modules are imported here so only the tools in use are loaded.
+    """
+    tool = item["tool"]
+    topic = item.get("topic", "")
+
+    if tool == "notes":
+        import notes
+        from image_cache import fetch_images
+        cleaned = notes.clean_ai_output(notes.generate_notes(topic, item.get("detail_level", "Moderate")))
+        try:
+            result = json.loads(cleaned)
+        except json.JSONDecodeError:
+            result = notes.extract_json_from_text(cleaned)
+        if not result:
+            raise ValueError("Failed to parse AI output as JSON.")
+        text = result.get("notes", "")
+        image_paths = [path for _, path, _ in fetch_images(result.get("images", [])) if path]
+        return text, notes.generate_pdf(text, image_paths), result
+
+    if tool == "quiz":
+        from content_generation import generate_quiz
+        from pdf_renderer import render_pdf
+        from response_parsing import parse_quiz_response
+        text = generate_quiz(topic, int(item.get("num_questions", 5)))
+        pdf_bytes = render_pdf([("title", f"Quiz: {topic}"), ("space", 10), ("text", text)])
+        return text, pdf_bytes, parse_quiz_response(text)
+
+    if tool == "flashcards":
+        import falshcard
+        text = falshcard.generate_flashcards(item.get("text", topic), int(item.get("num_flashcards", 10)))
+        return text, falshcard.generate_pdf_from_flashcards(text), None
+
+    import pathGenerator
+    text, _, _ = pathGenerator.generate_learning_path(topic)
+    return text, pathGenerator.generate_pdf(text, topic), None
+
+def process_item(item, out_dir, retries):
+    """
+    Generates one item with retries and writes its outputs.
+    Returns the checkpoint entry.
+    """
+    base = os.path.join(out_dir, item["tool"], f"{slugify(item.get('topic', ''))}-{item['id']}")
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    started = time.perf_counter()
+    for attempt in range(retries + 1):
+        try:
+            # Exported to PROFILE_EXPORT_DIR/traces.jsonl when set
+            with trace_request(f"{item['tool']}:{item['id']}"):
+                text, pdf_bytes, extra = generate_item(item)
+            break
+        except Exception as e:
+            if attempt == retries:
+                return {"id": item["id"], "tool": item["tool"], "topic": item.get("topic"),
+                        "status": "error", "error": str(e)}
+            time.sleep(2 ** attempt)  # back off on rate limits and transient errors
+
+    with open(base + ".md", "w", encoding="utf-8") as f:
+        f.write(text)
+    with open(base + ".pdf", "wb") as f:
+        f.write(pdf_bytes)
+    if extra is not None:
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(extra, f, indent=2)
+
+    return {"id": item["id"], "tool": item["tool"], "topic": item.get("topic"), "status": "ok",
+            "output": os.path.relpath(base, out_dir), "seconds": round(time.perf_counter() - started, 2)}
+
+# -------------------- MAIN --------------------
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-generate notes, quizzes, flashcards and learning paths.")
+    parser.add_argument("input", help="CSV or JSONL file of topics")
+    parser.add_argument("--tool", choices=TOOLS, default="notes", help="tool for rows without a 'tool' field")
+    parser.add_argument("--out", default="batch_output", help="output directory")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=2)
+    args = parser.parse_args()
+
+    items = read_items(args.input, args.tool)
+    os.makedirs(args.out, exist_ok=True)
+    checkpoint_path = os.path.join(args.out, CHECKPOINT_NAME)
+    done = load_checkpoint(checkpoint_path)
+    pending = [item for item in items if item["id"] not in done]
+    print(f"{len(items)} items, {len(items) - len(pending)} already done, {len(pending)} to generate")
+
+    checkpoint = Checkpoint(checkpoint_path)
+    executor = ThreadPoolExecutor(max_workers=args.concurrency)
+    failed = 0
+    try:
+        futures = [executor.submit(process_item, item, args.out, args.retries) for item in pending]
+        for count, future in enumerate(as_completed(futures), 1):
+            entry = future.result()
+            checkpoint.record(entry)
+            if entry["status"] != "ok":
+                failed += 1
+            print(f"[{count}/{len(pending)}] {entry['status']:<5} {entry['tool']}: {entry['topic']}"
+                  + (f" ({entry['error']})" if entry["status"] != "ok" else ""))
+    except KeyboardInterrupt:
+        print("Interrupted; completed items are checkpointed. Re-run the same command to resume.")
+        executor.shutdown(wait=False, cancel_futures=True)
+        sys.exit(130)
+    finally:
+        checkpoint.close()
+    executor.shutdown()
+
+    if failed:
+        print(f"{failed} items failed; re-run the same command to retry them.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+import argparse
+import io
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+# -------------------- SETUP --------------------
+# Offline micro-benchmarks for the CPU-bound work done locally: page-wise PDF
+# text extraction, streaming chunking, FAISS build/search, context compression,
+# response parsing, answer grading, encoding fixes, resume cleaning and PDF
+# rendering. Inputs are synthetic and seeded, so runs are reproducible and
+# need no network or API key. Each benchmark runs at several sizes and
+# reports how its cost scales.
+#
+#   python benchmark_suite.py                     # report
+#   python benchmark_suite.py --quick             # smallest size only
+#   python benchmark_suite.py --save-baseline     # record benchmarks/micro_baseline.json
+#   python benchmark_suite.py --check             # exit 1 on a regression or a missing baseline
+#
+# Every timing is also recorded relative to a fixed calibration workload run
+# on the same machine, and --check compares those relative figures, so the
+# committed baseline holds across hardware. Machines still differ in how
+# they balance Python, numpy and I/O, hence the wide default tolerance.
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(REPO_DIR, "benchmarks", "micro_baseline.json")
+DEFAULT_TOLERANCE = 0.5  # allowed slowdown relative to the baseline
+SEED = 1234
+
+_WORDS = (
+    "learning model data neural network gradient descent vector embedding token "
+    "attention layer training inference python algorithm structure graph tree "
+    "search sort memory cache process thread database query index transaction "
+    "café naïve résumé “quoted” ‘single’ — – … theory practice example"
+).split()
+
+# -------------------- SYNTHETIC INPUTS --------------------
+def synthetic_text(words, seed=SEED):
+    """
+    Seeded pseudo-prose with sentences, paragraphs and some non-Latin-1 punctuation.
+    """
+    rng = random.Random(seed)
+    out = []
+    for i in range(words):
+        word = rng.choice(_WORDS)
+        out.append(word.capitalize() if i % 12 == 0 else word)
+        if i % 12 == 11:
+            out[-1] += "."
+        if i % 120 == 119:
+            out[-1] += "\n\n"
+    return " ".join(out)
+
+def synthetic_pdf(pages, seed=SEED):
+    """
+    Builds a text PDF with roughly 450 words per page and returns its bytes.
+    """
+    from fpdf import FPDF
+    from pdf_renderer import fix_encoding
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_font("Arial", size=11)
+    for page in range(pages):
+        pdf.add_page()
+        pdf.multi_cell(0, 6, fix_encoding(synthetic_text(450, seed + page)))
+    output = pdf.output(dest="S")
+    return output.encode("latin-1") if isinstance(output, str) else bytes(output)
+
+def synthetic_quiz(questions, seed=SEED):
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(1, questions + 1):
+        options = "\n".join(f"   {letter}) {synthetic_text(6, seed + i * 4 + n)}" for n, letter in enumerate("abcd"))
+        blocks.append(f"{i}. {synthetic_text(14, seed + i)}?\n{options}\n   Answer: {rng.choice('abcd')}")
+    return "\n\n".join(blocks)
+
+def synthetic_notes_response(words, seed=SEED):
+    notes = synthetic_text(words, seed).replace('"', "'")
+    return "Here are your notes:\n```json\n" + json.dumps({"notes": notes, "images": []}) + "\n```\nEnjoy!"
+
+def synthetic_answer_pairs(count, seed=SEED):
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(count):
+        reference = synthetic_text(rng.randint(1, 6), seed + i)
+        kind = i % 4
+        if kind == 0:
+            answer = reference.upper()
+        elif kind == 1:
+            answer = str(rng.randint(1, 1000))
+            reference = answer + ".0"
+        elif kind == 2:
+            answer = reference[:-1] if len(reference) > 4 else reference
+        else:
+            answer = synthetic_text(rng.randint(1, 6), seed + i + 10_000)
+        pairs.append((answer, reference))
+    return pairs
+
+def synthetic_vectors(count, dim=768, seed=SEED):
+    import numpy as np
+    return np.random.default_rng(seed).standard_normal((count, dim)).astype("float32")
+
+# -------------------- BENCHMARKS --------------------
+# name -> (sizes, unit, setup(size) -> state, run(state))
+# setup is not timed; run is.
+def _pdf_text_setup(pages):
+    from pdf_stream import iter_pages
+    return iter_pages, synthetic_pdf(pages)
+
+def _pdf_text_run(state):
+    pages, data = state
+    for _ in pages(io.BytesIO(data)):
+        pass
+
+def _chunks_setup(chars):
+    from pdf_stream import iter_chunks
+    # ~3,000-character pages, like a dense PDF page
+    pages = [(number, synthetic_text(500, SEED + number)) for number in range(1, chars // 3000 + 1)]
+    return iter_chunks, pages
+
+def _chunks_run(state):
+    split, pages = state
+    for _ in split(pages, "benchmark.pdf"):
+        pass
+
+def _faiss_build_setup(count):
+    import faiss
+    return faiss, synthetic_vectors(count)
+
+def _faiss_build_run(state):
+    faiss, vectors = state
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+
+def _faiss_search_setup(count):
+    import faiss
+    vectors = synthetic_vectors(count)
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    return index, synthetic_vectors(32, seed=SEED + 1)
+
+def _faiss_search_run(state):
+    index, queries = state
+    index.search(queries, 4)
+
+def _compression_setup(chunks):
+    from types import SimpleNamespace
+    from context_compression import compress_documents
+    # ~10,000-character chunks, the size chatpdf retrieves
+    docs = [SimpleNamespace(page_content=synthetic_text(1600, SEED + i), metadata={}) for i in range(chunks)]
+    return compress_documents, docs
+
+def _compression_run(state):
+    compress, docs = state
+    compress(docs, "How does gradient descent train a neural network layer?")
+
+def _quiz_setup(questions):
+    from response_parsing import parse_quiz_response
+    return parse_quiz_response, synthetic_quiz(questions)
+
+def _grading_setup(count):
+    import answer_evaluator
+    return answer_evaluator.local_verdict, synthetic_answer_pairs(count)
+
+def _grading_run(state):
+    verdict, pairs = state
+    for answer, reference in pairs:
+        verdict(answer, reference)
+
+def _encoding_setup(chars):
+    from pdf_renderer import fix_encoding
+    return fix_encoding, synthetic_text(chars // 6)
+
+def _json_setup(words):
+    from response_parsing import extract_json_from_text
+    return extract_json_from_text, synthetic_notes_response(words)
+
+def _clean_text_setup(words):
+    import spacy.util
+    if not spacy.util.is_package("en_core_web_sm"):
+        raise ImportError("spaCy model en_core_web_sm is not installed")
+    import resume
+    resume.get_nlp()
+    return resume.clean_text, synthetic_text(words)
+
+def _render_setup(pages):
+    from pdf_renderer import _render
+    return _render, [("title", "Benchmark"), ("space", 10), ("text", synthetic_text(pages * 450))]
+
+def _call(state):
+    fn, arg = state
+    fn(arg)
+
+BENCHMARKS = {
+    "pdf_text": ((10, 100, 400), "pages", _pdf_text_setup, _pdf_text_run),
+    "text_chunks": ((100_000, 1_000_000, 5_000_000), "chars", _chunks_setup, _chunks_run),
+    "faiss_build": ((1_000, 10_000, 50_000), "vectors", _faiss_build_setup, _faiss_build_run),
+    "faiss_search": ((1_000, 10_000, 50_000), "vectors", _faiss_search_setup, _faiss_search_run),
+    "context_compression": ((4, 16, 64), "chunks", _compression_setup, _compression_run),
+    "parse_quiz": ((10, 100, 1_000), "questions", _quiz_setup, _call),
+    "answer_grading": ((100, 1_000, 10_000), "answers", _grading_setup, _grading_run),
+    "fix_encoding": ((10_000, 1_000_000, 10_000_000), "chars", _encoding_setup, _call),
+    "extract_json": ((1_000, 10_000, 100_000), "words", _json_setup, _call),
+    "clean_text": ((1_000, 10_000, 50_000), "words", _clean_text_setup, _call),
+    "pdf_render": ((5, 50, 200), "pages", _render_setup, _call),
+}
+
+# -------------------- MEASUREMENT --------------------
+def calibrate(repeat=5):
+    """
+    Fastest time of a fixed mix of pure-Python and numpy work, the unit of
+    the relative timings.
+    """
+    import numpy as np
+    matrix = np.random.default_rng(SEED).standard_normal((200, 200))
+    text = synthetic_text(2_000)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        sum(i * i for i in range(200_000))
+        sorted(text.split())
+        for _ in range(10):
+            matrix @ matrix
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def measure(run, state, repeat, budget=10.0):
+    """
+    Runs `run(state)` up to `repeat` times (fewer if the time budget is used
+    up) and returns the median and minimum wall time in seconds.
+    """
+    timings = []
+    spent = 0.0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - started)
+        spent += timings[-1]
+        if spent > budget:
+            break
+    return statistics.median(timings), min(timings)
+
+def scaling_exponent(points):
+    """
+    Log-log slope of time against size between the two largest sizes:
+    ~1 is linear, ~2 quadratic, <1 dominated by fixed costs.
+    """
+    points = [(size, seconds) for size, seconds in points if seconds > 0]
+    if len(points) < 2:
+        return None
+    (s1, t1), (s2, t2) = points[-2], points[-1]
+    return math.log(t2 / t1) / math.log(s2 / s1)
+
+def run_benchmark(name, repeat, quick=False, calibration=None):
+    """
+    Returns {"unit", "sizes": {size: {"median", "min", "per_unit_us",
+    "relative"}}, "exponent"} or {"skipped": reason} when an optional
+    dependency is missing. "relative" is the median in calibration units.
+    """
+    sizes, unit, setup, run = BENCHMARKS[name]
+    if quick:
+        sizes = sizes[:1]
+    result = {"unit": unit, "sizes": {}}
+    for size in sizes:
+        try:
+            state = setup(size)
+            median, fastest = measure(run, state, repeat)
+        except ImportError as e:
+            return {"skipped": str(e)}
+        result["sizes"][str(size)] = {
+            "median": round(median, 6),
+            "min": round(fastest, 6),
+            "per_unit_us": round(median / size * 1e6, 4),
+        }
+        if calibration:
+            result["sizes"][str(size)]["relative"] = round(median / calibration, 4)
+    exponent = scaling_exponent([(int(s), r["median"]) for s, r in result["sizes"].items()])
+    result["exponent"] = round(exponent, 2) if exponent is not None else None
+    return result
+
+# -------------------- REPORT --------------------
+def compare(results, baseline, tolerance):
+    """
+    Returns a list of (benchmark, size, current, baseline, change) for every
+    measurement present in both, and the subset that regressed past tolerance.
+    """
+    rows, regressions = [], []
+    for name, result in results.items():
+        for size, current in result.get("sizes", {}).items():
+            previous = baseline.get(name, {}).get("sizes", {}).get(size)
+            if not previous:
+                continue
+            # Relative figures when both runs have them; older baselines only have seconds
+            field = "relative" if "relative" in current and "relative" in previous else "median"
+            change = current[field] / previous[field] - 1 if previous[field] else 0.0
+            row = (name, size, current["median"], previous["median"], change)
+            rows.append(row)
+            if change > tolerance:
+                regressions.append(row)
+    return rows, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline micro-benchmarks for the local hot paths.")
+    parser.add_argument("benchmarks", nargs="*", default=list(BENCHMARKS), help=", ".join(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="only run the smallest size")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="fail if slower than baseline * (1 + tolerance)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    unknown = sorted(set(args.benchmarks) - set(BENCHMARKS))
+    if unknown:
+        parser.error("unknown benchmarks: " + ", ".join(unknown))
+    sys.path.insert(0, REPO_DIR)
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    elif args.check:
+        sys.exit(f"No baseline at {BASELINE_PATH}; record one with --save-baseline first.")
+
+    calibration = calibrate()
+    print(f"calibration      {calibration * 1000:.2f} ms")
+    results = {}
+    for name in args.benchmarks:
+        result = run_benchmark(name, args.repeat, args.quick, calibration)
+        results[name] = result
+        if "skipped" in result:
+            print(f"{name:<16} skipped ({result['skipped']})")
+            continue
+        exponent = result["exponent"]
+        scaling = f"  scaling ~n^{exponent}" if exponent is not None else ""
+        print(f"{name:<16} {result['unit']}{scaling}")
+        for size, timing in result["sizes"].items():
+            print(f"    {int(size):>12,}  {timing['median'] * 1000:10.2f} ms  {timing['per_unit_us']:10.3f} us/{result['unit'][:-1]}")
+
+    rows, regressions = compare(results, baseline, args.tolerance)
+    if rows:
+        print("\nComparison with baseline:")
+        for name, size, current, previous, change in rows:
+            flag = "  REGRESSION" if (name, size, current, previous, change) in regressions else ""
+            print(f"    {name:<16} {int(size):>12,}  {previous * 1000:10.2f} -> {current * 1000:10.2f} ms  {change:+.0%}{flag}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        measured = {name: result for name, result in results.items() if "skipped" not in result}
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({**baseline, **measured}, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {BASELINE_PATH}")
+
+    # A measurement without a baseline can't be checked, so it fails --check too
+    compared = {(name, size) for name, size, *_ in rows}
+    unchecked = [] if args.save_baseline else sorted(
+        f"{name}[{size}]" for name, result in results.items()
+        for size in result.get("sizes", {}) if (name, size) not in compared
+    )
+    if args.check and unchecked:
+        print("No baseline for: " + ", ".join(unchecked))
+    if args.check and regressions:
+        print("Regression in: " + ", ".join(sorted({f"{name}[{size}]" for name, size, *_ in regressions})))
+    if args.check and (regressions or unchecked):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
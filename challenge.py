@@ -0,0 +1,78 @@
+import html
+import threading
+from collections import OrderedDict
+from answer_evaluator import evaluate, local_verdict
+from resources import generate_json, generative_model
+
+# -------------------- CHALLENGE PROMPTS --------------------
+# Server-side versions of the prompts used by challenge.html and demo, so the
+# pages no longer need an API key in the browser.
+CHALLENGE_MODEL = "gemini-1.5-flash"
+REFERENCE_CACHE_SIZE = 4096
+
+# Reference answers of generated questions, so answers can be graded locally
+_references = OrderedDict()
+_lock = threading.Lock()
+
+def generate_question(topic, question_type):
+    """
+    Generates one challenging question of the given type for a topic, together
+    with a concise reference answer that is kept server-side for grading.
+    """
+    prompt = (
+        f"Generate a challenging {question_type} question for someone studying {topic}. Provide one question only, "
+        "with a concise reference answer.\n"
+        'Respond with JSON of the form {"question": "...", "answer": "..."}.'
+    )
+    result = generate_json(prompt, model_name=CHALLENGE_MODEL)
+    question = str(result.get("question", "")).strip() if isinstance(result, dict) else ""
+    if not question:
+        raise ValueError("No question was generated.")
+    with _lock:
+        _references[question] = str(result.get("answer", "")).strip()
+        _references.move_to_end(question)
+        while len(_references) > REFERENCE_CACHE_SIZE:
+            _references.popitem(last=False)
+    return question
+
+def reference_answer(question):
+    with _lock:
+        return _references.get(question.strip())
+
+def grade_answer(question, answer):
+    """
+    Grades an answer against the question's reference answer, asking the model
+    only when the local evaluator is unsure (see answer_evaluator.evaluate).
+    """
+    return evaluate(question, answer, reference_answer(question))
+
+def check_answer(question, answer):
+    """
+    Returns True if the answer is correct, False otherwise.
+    """
+    return grade_answer(question, answer)["correct"]
+
+def evaluate_answer(question, question_type, answer):
+    """
+    Returns an HTML-formatted evaluation of a student's answer. Answers the
+    local evaluator is confident about get a short verdict without a model call.
+    """
+    reference = reference_answer(question)
+    if reference:
+        correct = local_verdict(answer, reference)[0]
+        if correct is not None:
+            verdict = "Correct" if correct else "Incorrect"
+            return (
+                f"<h3>{verdict}</h3>"
+                f"<p><strong>Your answer:</strong> {html.escape(answer)}</p>"
+                f"<p><strong>Reference answer:</strong> {html.escape(reference)}</p>"
+            )
+    prompt = (
+        f"You are an expert evaluator. For the following {question_type} question:\n\n"
+        f'Question: "{question}"\n\n'
+        f'A student answered: "{answer}"\n\n'
+        "Evaluate whether the answer is correct or not, and provide a detailed explanation with HTML formatting. "
+        "The output should include headings, bullet points, and code blocks where applicable."
+    )
+    response = generative_model(CHALLENGE_MODEL).generate_content(prompt)
+    return response.text
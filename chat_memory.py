@@ -0,0 +1,153 @@
+import os
+import re
+from context_compression import CHARS_PER_TOKEN, estimate_tokens
+from profiling import run_in_context, span
+from resources import generative_model, submit_background
+
+# -------------------- SETUP --------------------
+# Bounded memory for multi-turn Chat with PDF. The last MEMORY_RECENT_TURNS
+# exchanges are kept verbatim; older ones are folded into a rolling summary
+# on the background pool, so no turn waits for summarization. The rendered
+# history never exceeds MEMORY_TOKEN_BUDGET, so the prompt, and with it the
+# per-turn latency, stays the same size however long the conversation gets.
+MEMORY_RECENT_TURNS = int(os.getenv("MEMORY_RECENT_TURNS", "4"))
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "1200"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "300"))
+# Small, fast model for summaries and query rewriting
+MEMORY_MODEL = os.getenv("MEMORY_MODEL", "gemini-1.5-flash")
+
+# Words that usually point back at earlier turns ("explain that further")
+_REFERENCES = frozenset(
+    "it its that this these those they them their he she him her above previous earlier "
+    "further more again else same former latter one".split()
+)
+
+summary_prompt = """Update the running summary of a conversation about the user's documents.
+Keep facts, names, numbers and open questions the user may refer back to.
+Reply with the updated summary only, in at most {words} words.
+
+Current summary:
+{summary}
+
+New exchanges:
+{turns}
+"""
+
+rewrite_prompt = """Rewrite the follow-up question as a standalone question that can be
+understood without the conversation, for searching the documents. Reply with
+the question only.
+
+Conversation:
+{history}
+
+Follow-up question: {question}
+"""
+
+def _format_turns(turns):
+    return "\n".join(f"User: {question}\nAssistant: {answer}" for question, answer in turns)
+
+def _truncate(text, tokens):
+    limit = tokens * CHARS_PER_TOKEN
+    return text if len(text) <= limit else text[:limit].rsplit(" ", 1)[0] + " …"
+
+# -------------------- MEMORY --------------------
+class ChatMemory:
+    def __init__(self, recent_turns=MEMORY_RECENT_TURNS, token_budget=MEMORY_TOKEN_BUDGET):
+        self.recent_turns = recent_turns
+        self.token_budget = token_budget
+        self.summary = ""
+        self.turns = []  # (question, answer), oldest first
+        self._folding = []  # turns being folded into the summary
+        self._pending = None  # Future of the summary update
+
+    def __len__(self):
+        return len(self.turns) + len(self._folding)
+
+    def add_turn(self, question, answer):
+        """
+        Records an exchange; turns beyond recent_turns start folding into the
+        summary in the background.
+        """
+        self._collect()
+        self.turns.append((question, answer))
+        if len(self.turns) > self.recent_turns and self._pending is None:
+            overflow = len(self.turns) - self.recent_turns
+            self._folding, self.turns = self.turns[:overflow], self.turns[overflow:]
+            self._pending = submit_background(run_in_context(summarize), self.summary, self._folding)
+
+    def _collect(self):
+        """
+        Applies a finished summary update; an unfinished one is left running.
+        """
+        if self._pending is None or not self._pending.done():
+            return
+        try:
+            self.summary = self._pending.result()
+        except Exception:
+            # Keep the gist without a model call: append and trim to the budget
+            folded = f"{self.summary}\n{_format_turns(self._folding)}".strip()
+            limit = SUMMARY_TOKEN_BUDGET * CHARS_PER_TOKEN
+            self.summary = folded if len(folded) <= limit else "… " + folded[-limit:]
+        self._folding, self._pending = [], None
+
+    def context(self):
+        """
+        Summary plus recent turns, newest kept first, within token_budget.
+        Turns still being folded are left out until their summary is ready.
+        """
+        self._collect()
+        parts = []
+        budget = self.token_budget
+        if self.summary:
+            summary = _truncate(self.summary, min(SUMMARY_TOKEN_BUDGET, budget))
+            parts.append(f"Summary of earlier conversation: {summary}")
+            budget -= estimate_tokens(parts[0])
+        recent = []
+        for question, answer in reversed(self.turns):
+            turn = _format_turns([(question, answer)])
+            if estimate_tokens(turn) > budget:
+                # Shorten the answer rather than drop the turn, if anything fits
+                room = budget - estimate_tokens(question) - 8
+                if room <= 0:
+                    break
+                turn = _format_turns([(question, _truncate(answer, room))])
+            recent.append(turn)
+            budget -= estimate_tokens(turn)
+        return "\n".join(parts + list(reversed(recent)))
+
+    def clear(self):
+        self.summary, self.turns, self._folding, self._pending = "", [], [], None
+
+    def needs_rewrite(self, question):
+        if not (self.turns or self.summary):
+            return False
+        words = re.findall(r"[a-z']+", question.lower())
+        return len(words) <= 3 or any(word in _REFERENCES for word in words)
+
+    def standalone_query(self, question):
+        """
+        The question rewritten to stand on its own for retrieval. Questions
+        that don't refer back to the conversation are returned unchanged
+        without a model call.
+        """
+        if not self.needs_rewrite(question):
+            return question
+        with span("rewrite_query"):
+            try:
+                model = generative_model(MEMORY_MODEL)
+                response = model.generate_content(rewrite_prompt.format(history=self.context(), question=question))
+                rewritten = response.text.strip().strip('"')
+            except Exception:
+                return question
+        return rewritten or question
+
+def summarize(summary, turns):
+    """
+    Folds turns into the running summary with one small model call.
+    """
+    with span("summarize_memory", turns=len(turns)):
+        model = generative_model(MEMORY_MODEL)
+        response = model.generate_content(summary_prompt.format(
+            words=int(SUMMARY_TOKEN_BUDGET * 0.75), summary=summary or "(none)", turns=_format_turns(turns)
+        ))
+    return _truncate(response.text.strip(), SUMMARY_TOKEN_BUDGET)
@@ -1,70 +1,282 @@
-import streamlit as st
-from dotenv import load_dotenv
 import os
-import google.generativeai as genai
-from PyPDF2 import PdfReader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain.vectorstores import FAISS
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.chains.question_answering import load_qa_chain
-from langchain.prompts import PromptTemplate
-
-# Load environment variables
-load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-
-# Function to extract text from PDFs
-def get_pdf_text(pdf_docs):
-    text = ""
-    for pdf in pdf_docs:
-        pdf_reader = PdfReader(pdf)
-        for page in pdf_reader.pages:
-            text += page.extract_text() or ""
-    return text
-
-# Function to split text into chunks
-def get_text_chunks(text):
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=10000, chunk_overlap=1000)
-    return text_splitter.split_text(text)
-
-# Function to create vector embeddings
-def get_vector_store(text_chunks):
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-    vector_store = FAISS.from_texts(text_chunks, embedding=embeddings)
-    vector_store.save_local("faiss_index")
+import re
+import streamlit as st
+from artifact_cache import combined_hash, discard_artifact, get_artifact, upload_hash
+from chat_memory import ChatMemory
+from context_compression import CONTEXT_COMPRESSION, compress_documents, format_stats
+from resources import chat_model, embedding_model, generate_json, submit_background
+from pdf_stream import CHUNK_OVERLAP, CHUNK_SIZE, batched, format_citation, iter_document_chunks
+from profiling import profiled, run_in_context, span
+from storage import cache_dir
+from upload_spool import iter_spooled_pages, parse_cost, reserve, spool_upload
+from vector_quantization import (
+    VECTOR_QUANTIZATION, delete_vectors, has_rerank_vectors, load_store, quantize_store, save_store, saved_vectors,
+)
+
+# Chunks are embedded this many at a time, so peak memory does not grow with the upload
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+INDEX_FOLDER = "faiss_index"
+
+# Re-rank vectors of the quantized stores in the artifact cache. A vectors
+# file lives as long as its store is cached or the saved index uses it, so
+# switching between PDFs never re-embeds one that is still cached.
+_cached_vectors = set()
+
+# Batch question mode: chunks retrieved per question, and how questions are
+# grouped into shared model calls (a question joins a group when at least
+# BATCH_GROUP_OVERLAP of its chunks are already in the group's context)
+BATCH_K = 4
+BATCH_GROUP_OVERLAP = float(os.getenv("BATCH_GROUP_OVERLAP", "0.5"))
+BATCH_MAX_GROUP_QUESTIONS = 8
+BATCH_MAX_GROUP_CHUNKS = 10
+NOT_IN_CONTEXT = "Answer is not available in the context."
+
+batch_prompt = """
+Answer each question as detailed as possible from the provided context.
+If the answer to a question is not in the context, answer: '{not_in_context}'
+
+Context:
+{context}
+
+Questions:
+{questions}
+
+Respond with JSON only:
+{{"answers": [{{"id": <question number>, "answer": "<answer>"}}]}}
+"""
+
+# Function to stream text chunks from PDFs: uploads are spooled to disk, pages
+# are read lazily from memory maps and each chunk carries its file name and
+# page numbers (see pdf_stream). Spooling and the parsing budget only happen
+# once chunks are consumed, i.e. when the PDFs are not cached yet.
+def get_text_chunks(pdf_docs):
+    spooled_docs = [spool_upload(pdf) for pdf in pdf_docs]
+    with reserve(parse_cost(spooled_docs)):
+        yield from iter_document_chunks(spooled_docs, CHUNK_SIZE, CHUNK_OVERLAP, read_pages=iter_spooled_pages)
+
+# Function to create vector embeddings in bounded batches as chunks arrive;
+# content_key caches them so the same set of PDFs is only embedded once.
+# With VECTOR_QUANTIZATION set, the index keeps quantized codes and the
+# float32 vectors go to disk for re-ranking (see vector_quantization).
+@profiled()
+def get_vector_store(text_chunks, content_key=None):
+    def build():
+        from langchain.vectorstores import FAISS
+        embeddings = embedding_model()
+        vector_store = None
+        for batch in batched(text_chunks, EMBED_BATCH_SIZE):
+            texts = [chunk["text"] for chunk in batch]
+            metadatas = [chunk["metadata"] for chunk in batch]
+            with span("embed_batch", chunks=len(batch)):
+                if vector_store is None:
+                    vector_store = FAISS.from_texts(texts, embedding=embeddings, metadatas=metadatas)
+                else:
+                    vector_store.add_texts(texts, metadatas=metadatas)
+        if vector_store is None:
+            raise ValueError("No text could be extracted from the uploaded PDFs.")
+        vectors_path = os.path.join(cache_dir("vectors"), f"{content_key or 'latest'}-{VECTOR_QUANTIZATION}.npy")
+        if quantize_store(vector_store, vectors_path) != "none" and content_key:
+            _cached_vectors.add(vectors_path)
+        return vector_store
+
+    if content_key:
+        params = ("models/embedding-001", CHUNK_SIZE, CHUNK_OVERLAP, VECTOR_QUANTIZATION)
+        vector_store = get_artifact(content_key, "vector_store", build, params=params, on_evict=_release_vectors)
+        if not has_rerank_vectors(vector_store):
+            # Deleted outside this process (e.g. another one replaced the saved index)
+            discard_artifact(content_key, "vector_store", params)
+            vector_store = get_artifact(content_key, "vector_store", build, params=params, on_evict=_release_vectors)
+    else:
+        vector_store = build()
+    save_store(vector_store, INDEX_FOLDER, in_use=_cached_vectors)
+
+def _release_vectors(vector_store):
+    """
+    Called when a vector store leaves the artifact cache: its re-rank vectors
+    are deleted unless the saved index still uses them.
+    """
+    vectors_path = getattr(vector_store, "rerank_vectors", None)
+    _cached_vectors.discard(vectors_path)
+    if vectors_path != saved_vectors(INDEX_FOLDER):
+        delete_vectors(vectors_path)
 
 # Function to create the conversational chain
+@profiled()
 def get_conversational_chain():
+    from langchain.prompts import PromptTemplate
+    from langchain.chains.question_answering import load_qa_chain
     prompt_template = """
     Answer the question as detailed as possible from the provided context.
+    Use the conversation so far only to understand what the question refers to.
     If the answer is not in the context, respond with: 'Answer is not available in the context.'\n\n
+    Conversation so far:\n {history}\n
     Context:\n {context}\n
     Question: \n{question}\n
     Answer:
     """
     
     # Use the correct model
-    model = ChatGoogleGenerativeAI(model="gemini-1.5-pro", temperature=0.3)
-    prompt = PromptTemplate(template=prompt_template, input_variables=["context", "question"])
+    model = chat_model("gemini-1.5-pro", temperature=0.3)
+    prompt = PromptTemplate(template=prompt_template, input_variables=["history", "context", "question"])
     
     return load_qa_chain(model, chain_type="stuff", prompt=prompt)
 
-# Function to answer user questions
-def user_input(user_question):
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-    new_db = FAISS.load_local("faiss_index", embeddings, allow_dangerous_deserialization=True)
-    docs = new_db.similarity_search(user_question)
+# Keeps only the sentences of the retrieved chunks that matter for the
+# question(s) (see context_compression); returns (docs, stats or None)
+def compress_context(docs, questions):
+    if not CONTEXT_COMPRESSION or not docs:
+        return docs, None
+    with span("compress_context") as compression:
+        docs, stats = compress_documents(docs, questions)
+        compression["attrs"].update(stats)
+    return docs, stats
+
+# Function to answer user questions; returns the answer, the page citations
+# of the chunks it was based on, the context compression stats and the query
+# used for retrieval. With a ChatMemory, follow-ups are rewritten into
+# standalone queries and the bounded conversation history joins the prompt.
+@profiled()
+def user_input(user_question, memory=None):
+    embeddings = embedding_model()
+    search_query = memory.standalone_query(user_question) if memory else user_question
+    with span("load_index"):
+        new_db = load_store(INDEX_FOLDER, embeddings)
+    with span("similarity_search") as search:
+        docs = new_db.similarity_search(search_query)
+        search["attrs"]["docs"] = len(docs)
+    docs, compression = compress_context(docs, search_query)
 
     chain = get_conversational_chain()
-    response = chain({"input_documents": docs, "question": user_question}, return_only_outputs=True)
+    history = memory.context() if memory else ""
+    with span("chain"):
+        response = chain(
+            {"input_documents": docs, "question": user_question, "history": history or "(none)"},
+            return_only_outputs=True,
+        )
 
-    return response["output_text"]
+    answer = response["output_text"]
+    if memory is not None:
+        memory.add_turn(user_question, answer)
+    sources = list(dict.fromkeys(format_citation(doc.metadata) for doc in docs if doc.metadata))
+    return answer, sources, compression, search_query
+
+# -------------------- BATCH QUESTIONS --------------------
+def parse_questions(text):
+    """
+    One question per line; list numbering and bullets are stripped.
+    """
+    questions = []
+    for line in text.splitlines():
+        question = re.sub(r"^\s*(?:\d+[.)]|[-*\u2022])\s*", "", line).strip()
+        if question:
+            questions.append(question)
+    return list(dict.fromkeys(questions))
+
+# Embeds all questions in one call and searches the index with the whole
+# query matrix; returns the retrieved chunk positions for each question
+@profiled()
+def search_batch(db, questions, k=BATCH_K):
+    import numpy as np
+    embeddings = embedding_model()
+    with span("embed_questions", questions=len(questions)):
+        vectors = np.asarray(embeddings.embed_documents(questions, task_type="retrieval_query"), dtype="float32")
+    with span("matrix_search", questions=len(questions), k=k):
+        _, positions = db.index.search(vectors, k)
+    return [[int(position) for position in row if position != -1] for row in positions]
+
+def group_questions(retrieved):
+    """
+    Greedily groups question indexes whose retrieved chunks overlap, so each
+    group can share one context. Returns [(question_indexes, chunk_positions)].
+    """
+    groups = []
+    for index, chunks in enumerate(retrieved):
+        for members, context in groups:
+            shared = len(set(chunks) & set(context))
+            added = [chunk for chunk in chunks if chunk not in context]
+            if (
+                shared >= BATCH_GROUP_OVERLAP * max(len(chunks), 1)
+                and len(members) < BATCH_MAX_GROUP_QUESTIONS
+                and len(context) + len(added) <= BATCH_MAX_GROUP_CHUNKS
+            ):
+                members.append(index)
+                context.extend(added)
+                break
+        else:
+            groups.append(([index], list(chunks)))
+    return groups
+
+def answer_group(questions, docs):
+    """
+    One structured model call answering several questions over a shared context.
+    Returns {question number: answer}.
+    """
+    docs, _ = compress_context(docs, questions)
+    context = "\n\n".join(f"[{format_citation(doc.metadata)}]\n{doc.page_content}" for doc in docs)
+    numbered = "\n".join(f"{number}. {question}" for number, question in enumerate(questions, 1))
+    with span("answer_group", questions=len(questions), chunks=len(docs)):
+        result = generate_json(batch_prompt.format(
+            not_in_context=NOT_IN_CONTEXT, context=context, questions=numbered
+        ))
+    answers = {}
+    for item in result.get("answers", []) if isinstance(result, dict) else []:
+        try:
+            answers[int(item["id"])] = str(item["answer"]).strip()
+        except (KeyError, TypeError, ValueError):
+            continue
+    return answers
+
+# Answers a list of questions with one embedding call, one index search and
+# one model call per group of questions with overlapping context. Returns
+# (results, model_calls) where results are {"question", "answer", "sources"}.
+@profiled()
+def answer_questions(questions):
+    embeddings = embedding_model()
+    with span("load_index"):
+        db = load_store(INDEX_FOLDER, embeddings)
+    retrieved = search_batch(db, questions)
+    docs = {}
+    for chunks in retrieved:
+        for position in chunks:
+            if position not in docs:
+                docs[position] = db.docstore.search(db.index_to_docstore_id[position])
+
+    groups = group_questions(retrieved)
+    futures = [
+        submit_background(
+            run_in_context(answer_group), [questions[i] for i in members], [docs[p] for p in context]
+        )
+        for members, context in groups
+    ]
+    results = []
+    for index, question in enumerate(questions):
+        results.append({"question": question, "answer": NOT_IN_CONTEXT, "sources": list(dict.fromkeys(
+            format_citation(docs[position].metadata) for position in retrieved[index] if docs[position].metadata
+        ))})
+    for (members, _), future in zip(groups, futures):
+        answers = future.result()
+        for number, index in enumerate(members, 1):
+            if answers.get(number):
+                results[index]["answer"] = answers[number]
+    return results, len(groups)
+
+def show_turn(turn):
+    with st.chat_message("user"):
+        st.write(turn["question"])
+    with st.chat_message("assistant"):
+        st.write(turn["answer"])
+        if turn["search_query"] != turn["question"]:
+            st.caption(f"Searched for: {turn['search_query']}")
+        if turn["sources"]:
+            st.caption("Sources: " + "; ".join(turn["sources"]))
+        if turn["compression"]:
+            st.caption(format_stats(turn["compression"]))
 
 # Streamlit UI
-def main():
-    st.set_page_config(page_title="Chat with PDF")
+def chatpdf_app():
     st.title("Chat with PDF  💬📄")
+    memory = st.session_state.setdefault("chat_memory", ChatMemory())
+    chat_history = st.session_state.setdefault("chat_history", [])
 
     with st.sidebar:
         st.header("Upload PDF Files")
@@ -72,15 +284,53 @@ def main():
         if st.button("Process PDFs"):
             if pdf_docs:
                 with st.spinner("Processing..."):
-                    raw_text = get_pdf_text(pdf_docs)
-                    text_chunks = get_text_chunks(raw_text)
-                    get_vector_store(text_chunks)
-                    st.success("Processing completed! Now, you can ask questions.")
-
-    user_question = st.text_input("Ask a question from the PDF:")
-    if user_question:
-        response = user_input(user_question)
-        st.write("**Answer:**", response)
+                    # The chunk generator is only consumed if the PDFs are not cached yet
+                    try:
+                        content_key = combined_hash([upload_hash(pdf) for pdf in pdf_docs])
+                        get_vector_store(get_text_chunks(pdf_docs), content_key)
+                    except ValueError as e:
+                        st.error(str(e))
+                    else:
+                        # A new set of documents starts a new conversation
+                        memory.clear()
+                        chat_history.clear()
+                        st.success("Processing completed! Now, you can ask questions.")
+
+    mode = st.radio("Mode", ("Single question", "Batch questions"), horizontal=True)
+    if mode == "Single question":
+        for turn in chat_history:
+            show_turn(turn)
+        user_question = st.chat_input("Ask a question from the PDF:")
+        if user_question:
+            response, sources, compression, search_query = user_input(user_question, memory)
+            chat_history.append({
+                "question": user_question, "answer": response, "sources": sources,
+                "compression": compression, "search_query": search_query,
+            })
+            show_turn(chat_history[-1])
+        if chat_history and st.button("Clear conversation"):
+            memory.clear()
+            chat_history.clear()
+            st.rerun()
+    else:
+        batch_text = st.text_area("Paste your questions, one per line:", height=200)
+        if st.button("Answer All"):
+            questions = parse_questions(batch_text)
+            if questions:
+                with st.spinner(f"Answering {len(questions)} questions..."):
+                    results, calls = answer_questions(questions)
+                st.caption(f"Answered {len(questions)} questions with {calls} model call(s).")
+                for number, result in enumerate(results, 1):
+                    st.markdown(f"**Q{number}: {result['question']}**")
+                    st.write(result["answer"])
+                    if result["sources"]:
+                        st.caption("Sources: " + "; ".join(result["sources"]))
+            else:
+                st.error("Please enter at least one question.")
+
+def main():
+    st.set_page_config(page_title="Chat with PDF")
+    chatpdf_app()
 
 if __name__ == "__main__":
     main()
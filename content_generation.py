@@ -0,0 +1,49 @@
+from resources import generative_model
+from profiling import profiled
+
+# -------------------- SETUP --------------------
+# Model calls behind the quiz and notes pages, kept free of Streamlit so the
+# API server and the batch CLI can use them without loading the UI.
+
+# -------------------- QUIZ --------------------
+# Quiz Generation Prompt
+quiz_prompt = """Generate {num_questions} multiple-choice questions on {topic}.
+Each question should have 4 options and 1 correct answer. Format:
+
+1. Question?
+   a) Option 1
+   b) Option 2
+   c) Option 3
+   d) Option 4
+   Answer: (correct option letter)
+"""
+
+@profiled()
+def generate_quiz(topic, num_questions):
+    # Updated to use "gemini-1.5-pro"
+    model = generative_model("gemini-1.5-pro")
+    response = model.generate_content(quiz_prompt.format(topic=topic, num_questions=num_questions))
+    return response.text
+
+# -------------------- NOTES --------------------
+@profiled()
+def generate_notes(topic, detail_level):
+    """
+    Generates study notes on a given topic with the specified level of detail.
+    The output should be valid JSON with two keys:
+      - "notes": A string containing the study notes.
+      - "images": A list of valid, publicly accessible image URLs 
+                  that begin with https:// and end with .jpg or .png.
+    """
+    prompt = f"""
+    Generate study notes on the topic '{topic}' with a {detail_level} level of detail.
+    The notes should include key points and explanations.
+    Provide 1 to 3 valid, publicly accessible image URLs that definitely exist on the web.
+    These URLs must begin with 'https://' and end with '.jpg' or '.png'.
+    Ensure these links are real images that return a 200 OK response.
+    Output valid JSON with exactly two keys: 'notes' (string) and 'images' (list of URLs).
+    """
+
+    model = generative_model("gemini-1.5-pro")
+    response = model.generate_content(prompt)
+    return response.text
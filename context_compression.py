@@ -0,0 +1,152 @@
+import math
+import os
+import re
+from collections import Counter
+
+# -------------------- SETUP --------------------
+# Extractive compression of retrieved chunks before they are stuffed into a
+# prompt. Chunks are split into sentences, each sentence is scored against
+# the question(s) by TF-IDF cosine similarity (one matrix product), and the
+# best sentences are kept together with their neighbours until the token
+# budget is spent. Kept sentences stay in their original order and chunk, so
+# citations still apply. No model call is involved.
+COMPRESSION_TOKEN_BUDGET = int(os.getenv("COMPRESSION_TOKEN_BUDGET", "1500"))
+COMPRESSION_NEIGHBOURS = int(os.getenv("COMPRESSION_NEIGHBOURS", "1"))
+CONTEXT_COMPRESSION = os.getenv("CONTEXT_COMPRESSION", "1") == "1"
+CHARS_PER_TOKEN = 4
+GAP = " … "
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n\s*\n|\n(?=\s*(?:[-*•]|\d+[.)])\s)")
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how in is it its of on or that the this "
+    "to was what when where which who why will with explain describe".split()
+)
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def split_sentences(text):
+    return [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+
+def _terms(text):
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS and len(token) > 1]
+
+# -------------------- SCORING --------------------
+def score_sentences(sentences, queries):
+    """
+    TF-IDF cosine similarity of each sentence to its closest query, computed
+    as one (sentences x vocabulary) @ (vocabulary x queries) product.
+    """
+    import numpy as np
+    sentence_terms = [Counter(_terms(sentence)) for sentence in sentences]
+    query_terms = [Counter(_terms(query)) for query in queries]
+    vocabulary = {}
+    for counts in query_terms:
+        for term in counts:
+            vocabulary.setdefault(term, len(vocabulary))
+    if not vocabulary or not sentences:
+        return np.zeros(len(sentences))
+    # Only query terms can contribute to the dot product, so the matrices
+    # are limited to that vocabulary; sentence norms still use every term.
+    document_frequency = np.zeros(len(vocabulary))
+    for counts in sentence_terms:
+        for term in counts:
+            if term in vocabulary:
+                document_frequency[vocabulary[term]] += 1
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    unseen_idf = idf.max()
+
+    def weights(all_counts):
+        matrix = np.zeros((len(all_counts), len(vocabulary)))
+        norms = np.zeros(len(all_counts))
+        for row, counts in enumerate(all_counts):
+            squared = 0.0
+            for term, count in counts.items():
+                column = vocabulary.get(term)
+                weight = (1 + math.log(count)) * (idf[column] if column is not None else unseen_idf)
+                squared += weight * weight
+                if column is not None:
+                    matrix[row, column] = weight
+            norms[row] = math.sqrt(squared) or 1.0
+        return matrix / norms[:, None]
+
+    similarity = weights(sentence_terms) @ weights(query_terms).T
+    return similarity.max(axis=1)
+
+# -------------------- COMPRESSION --------------------
+def compress_documents(docs, queries, token_budget=COMPRESSION_TOKEN_BUDGET, neighbours=COMPRESSION_NEIGHBOURS):
+    """
+    Keeps the sentences of docs most similar to the queries (a string or a
+    list), plus `neighbours` sentences either side, within token_budget.
+    Returns (documents, stats); documents are copies of the inputs with
+    compressed page_content, and chunks with nothing kept are dropped.
+    """
+    if isinstance(queries, str):
+        queries = [queries]
+    original_tokens = sum(estimate_tokens(doc.page_content) for doc in docs)
+    sentences = []  # (doc index, sentence index within doc, text)
+    for doc_index, doc in enumerate(docs):
+        for sentence_index, sentence in enumerate(split_sentences(doc.page_content)):
+            sentences.append((doc_index, sentence_index, sentence))
+
+    if original_tokens <= token_budget:
+        compressed, kept = list(docs), len(sentences)
+    else:
+        scores = score_sentences([text for _, _, text in sentences], queries)
+        position = {(doc_index, sentence_index): i for i, (doc_index, sentence_index, _) in enumerate(sentences)}
+        selected = set()
+        spent = 0
+        for best in scores.argsort()[::-1]:
+            if scores[best] <= 0 and selected:
+                break
+            doc_index, sentence_index, _ = sentences[best]
+            window = [
+                position[(doc_index, sentence_index + offset)]
+                for offset in range(-neighbours, neighbours + 1)
+                if (doc_index, sentence_index + offset) in position
+            ]
+            # The best sentence goes in first, then its neighbours while they fit
+            window.sort(key=lambda i: i != best)
+            for i in window:
+                if i in selected:
+                    continue
+                cost = estimate_tokens(sentences[i][2])
+                if spent + cost > token_budget and selected:
+                    continue
+                selected.add(i)
+                spent += cost
+            if spent >= token_budget:
+                break
+        compressed = []
+        for doc_index, doc in enumerate(docs):
+            parts, previous = [], None
+            for i in sorted(i for i in selected if sentences[i][0] == doc_index):
+                if previous is not None and sentences[i][1] != previous + 1:
+                    parts.append(GAP)
+                elif parts:
+                    parts.append(" ")
+                parts.append(sentences[i][2])
+                previous = sentences[i][1]
+            if parts:
+                compressed.append(type(doc)(page_content="".join(parts), metadata=doc.metadata))
+        kept = len(selected)
+
+    compressed_tokens = sum(estimate_tokens(doc.page_content) for doc in compressed)
+    stats = {
+        "original_tokens": original_tokens,
+        "compressed_tokens": compressed_tokens,
+        "ratio": round(original_tokens / compressed_tokens, 2) if compressed_tokens else 1.0,
+        "sentences_kept": kept,
+        "sentences_total": len(sentences),
+    }
+    return compressed, stats
+
+def format_stats(stats):
+    """
+    "Context compressed 9,800 → 1,450 tokens (6.8x)".
+    """
+    return (
+        f"Context compressed {stats['original_tokens']:,} → {stats['compressed_tokens']:,} tokens "
+        f"({stats['ratio']}x)"
+    )
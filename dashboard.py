@@ -1,79 +1,129 @@
 import os
+import time
+from functools import partial
 import streamlit as st
-import google.generativeai as genai
-from dotenv import load_dotenv
+import streamlit.components.v1 as components
+from resources import generative_model
+from snapshot_scheduler import (
+    failed_recently, is_refreshing, latest_snapshot, request_refresh, schedule, snapshot_history,
+)
+from profiling import profiled
 
-# —————– Load and configure Gemini API —————–
-load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-
-# —————– Page config: MUST be first Streamlit call —————–
-st.set_page_config(page_title="AI & Tech Dashboard", layout="wide")
-
-# —————– Auto-Refresh Every 5 Hours —————–
-def auto_refresh(interval_minutes: int = 300):
+# —————– Auto-Refresh —————–
+def auto_refresh(interval_minutes: int):
+    """
+    Reloads the page after interval_minutes. st.markdown never runs <script>
+    tags, so the timer lives in a zero-height component iframe and reloads
+    its parent page.
+    """
     interval_ms = interval_minutes * 60 * 1000
-    st.markdown(
-        f"""
-        <script>
-            setTimeout(function() {{ window.location.reload(); }}, {interval_ms});
-        </script>
-        """,
-        unsafe_allow_html=True
+    components.html(
+        f"<script>setTimeout(function() {{ window.parent.location.reload(); }}, {interval_ms});</script>",
+        height=0,
     )
 
-auto_refresh(300)
+# —————– Sections —————–
+# Every section is the same for all users, so it is regenerated in the
+# background every DASHBOARD_REFRESH_MINUTES and pages serve the latest snapshot.
+DASHBOARD_REFRESH_MINUTES = int(os.getenv("DASHBOARD_REFRESH_MINUTES", "60"))
+
+SECTIONS = {
+    "Latest News": (
+        "📰 Latest AI & Tech News",
+        "Provide a concise, updated summary of the latest AI and technology news: "
+        "include breakthroughs, new tool launches, and major developments.",
+    ),
+    "Tech Stack": (
+        "🧰 Tech Stack Insights",
+        "Summarize the most popular tech stacks in 2025: languages, frameworks, "
+        "and cloud platforms, with brief statistics.",
+    ),
+    "Industry Trends": (
+        "📊 Industry Trends",
+        "Analyze current technology industry trends, including emerging technologies, "
+        "market dynamics, and predictions for future innovations.",
+    ),
+}
 
 # —————– Utility: Gemini Call —————–
 def generate_response(prompt: str) -> str:
-    try:
-        model = genai.GenerativeModel("gemini-1.5-pro")
-        resp = model.generate_content(prompt)
-        return resp.text.strip() if resp and resp.text else "No content returned."
-    except Exception as e:
-        return f"Error: {e}"
+    """
+    Runs in the snapshot scheduler's thread; errors are raised so a failed call
+    never replaces the last good snapshot.
+    """
+    model = generative_model("gemini-1.5-pro")
+    resp = model.generate_content(prompt)
+    if not resp or not resp.text or not resp.text.strip():
+        raise ValueError("No content returned.")
+    return resp.text.strip()
 
-# —————– UI —————–
-st.title("🌐 AI & Tech Dashboard")
-st.sidebar.title("Navigate Dashboard")
-page = st.sidebar.radio("Select Section", [
-    "Overview", "Latest News", "Tech Stack", "Industry Trends"
-])
+def schedule_sections():
+    for section, (_, prompt) in SECTIONS.items():
+        schedule(section, partial(generate_response, prompt), DASHBOARD_REFRESH_MINUTES * 60)
 
-if page == "Overview":
-    st.subheader("Dashboard Overview")
-    st.markdown(
-        "Welcome! Navigate via the sidebar and click buttons to fetch live AI & tech insights."
-    )
+def format_age(seconds):
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        return "just now"
+    if minutes < 60:
+        return f"{minutes} min ago"
+    return f"{minutes // 60} h {minutes % 60} min ago"
 
-elif page == "Latest News":
-    st.subheader("📰 Latest AI & Tech News")
-    prompt = (
-        "Provide a concise, updated summary of the latest AI and technology news: "
-        "include breakthroughs, new tool launches, and major developments."
-    )
-    if st.button("Fetch Latest News"):
-        with st.spinner("Fetching..."):
-            st.write(generate_response(prompt))
+@profiled()
+def show_section(section):
+    title, _ = SECTIONS[section]
+    st.subheader(title)
+    snapshot = latest_snapshot(section)
+    if snapshot is None:
+        if request_refresh(section) or is_refreshing(section):
+            st.info("The first snapshot of this section is being generated. Check back in a moment.")
+        else:
+            st.warning("Generating this section failed; it is retried automatically in a few minutes.")
+        st.button("Check again")
+        return
 
-elif page == "Tech Stack":
-    st.subheader("🧰 Tech Stack Insights")
-    prompt = (
-        "Summarize the most popular tech stacks in 2025: languages, frameworks, "
-        "and cloud platforms, with brief statistics."
-    )
-    if st.button("Fetch Tech Stack Insights"):
-        with st.spinner("Fetching..."):
-            st.write(generate_response(prompt))
+    st.write(snapshot["content"])
+    status = f"Updated {format_age(time.time() - snapshot['created_at'])} (version {snapshot['version']})"
+    if is_refreshing(section):
+        status += " · a newer version is being generated"
+    st.caption(status)
+    if st.button("Refresh now", key=f"refresh_{section}"):
+        if request_refresh(section, force=True):
+            st.toast("Refreshing in the background; the new version appears on the next load.")
+        elif failed_recently(section):
+            st.toast("The last refresh failed; it is retried automatically in a few minutes.")
+        else:
+            st.toast("This section was refreshed recently; try again in a few minutes.")
 
-elif page == "Industry Trends":
-    st.subheader("📊 Industry Trends")
-    prompt = (
-        "Analyze current technology industry trends, including emerging technologies, "
-        "market dynamics, and predictions for future innovations."
-    )
-    if st.button("Fetch Industry Trends"):
-        with st.spinner("Fetching..."):
-            st.write(generate_response(prompt))
+    history = snapshot_history(section)[1:]
+    if history:
+        with st.expander("Previous versions"):
+            for old in history:
+                st.markdown(f"**Version {old['version']}** · {format_age(time.time() - old['created_at'])}")
+                st.write(old["content"])
+
+# —————– UI —————–
+def dashboard_app():
+    # Reload as often as the snapshots change
+    auto_refresh(DASHBOARD_REFRESH_MINUTES)
+    schedule_sections()
+
+    st.title("🌐 AI & Tech Dashboard")
+    st.sidebar.title("Navigate Dashboard")
+    page = st.sidebar.radio("Select Section", ["Overview", *SECTIONS])
+
+    if page == "Overview":
+        st.subheader("Dashboard Overview")
+        st.markdown(
+            "Welcome! Navigate via the sidebar for AI & tech insights, refreshed automatically "
+            f"every {DASHBOARD_REFRESH_MINUTES} minutes."
+        )
+    else:
+        show_section(page)
+
+    st.markdown("---\n_Created with ❤️ using Google Gemini API_")
 
-st.markdown("---\n_Created with ❤️ using Google Gemini API_")
+if __name__ == "__main__":
+    # Page config: MUST be first Streamlit call
+    st.set_page_config(page_title="AI & Tech Dashboard", layout="wide")
+    dashboard_app()
@@ -0,0 +1,42 @@
+import hashlib
+import json
+
+# -------------------- FAKE MODEL --------------------
+# Offline stand-in for genai.GenerativeModel, enabled with
+# STUDY_BUDDY_FAKE_MODEL=1. Responses are deterministic and follow the output
+# formats the tools parse, so the API server and tools can be exercised
+# without network access or an API key.
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None):
+        self.calls += 1
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        lowered = prompt.lower()
+        if generation_config and generation_config.get("response_mime_type") == "application/json":
+            # Covers the keys of the structured prompts the tools send
+            return FakeResponse(json.dumps({
+                "question": f"Fake question {digest}?",
+                "answer": f"fake answer {digest}",
+                "challenge": f"Fake challenge {digest}?",
+                "hint": f"Fake hint {digest}.",
+                "questions": [{"question": f"Fake question {digest}?", "focus": "fake"}],
+                "reviews": [],
+                "stages": [{"name": f"Fake stage {digest}", "topics": ["fake"], "resources": []}],
+                "answers": [{"id": 1, "answer": f"Fake answer {digest}."}],
+            }))
+        if "respond with \"yes\" or \"no\"" in lowered:
+            return FakeResponse("Yes")
+        if "valid json" in lowered:
+            return FakeResponse(json.dumps({"notes": f"Fake notes {digest}.", "images": []}))
+        if "multiple-choice" in lowered:
+            return FakeResponse(
+                f"1. Fake question {digest}?\n   a) One\n   b) Two\n   c) Three\n   d) Four\n   Answer: a"
+            )
+        return FakeResponse(f"Fake response {digest} from {self.model_name}.")
@@ -1,26 +1,9 @@
 import streamlit as st
-import os
-import google.generativeai as genai
-from PyPDF2 import PdfReader
-from dotenv import load_dotenv
-from fpdf import FPDF
-
-# Load environment variables and configure GenAI
-load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-
-def extract_text_from_pdf(pdf_file):
-    """
-    Extracts text from all pages of an uploaded PDF.
-    """
-    text = ""
-    pdf_reader = PdfReader(pdf_file)
-    for page in pdf_reader.pages:
-        page_text = page.extract_text()
-        if page_text:
-            text += page_text + "\n"
-    return text.strip()
+from resources import generative_model
+from profiling import profiled
+from upload_spool import UploadRejected, pdf_text
 
+@profiled()
 def generate_flashcards(notes_text, num_flashcards=10):
     """
     Uses GenAI to generate flashcards (in Q&A format) based on the provided study notes.
@@ -48,30 +31,17 @@ def generate_flashcards(notes_text, num_flashcards=10):
         "Please generate {} flashcards.\n\n"
         "Study Notes:\n{}".format(num_flashcards, notes_text)
     )
-    model = genai.GenerativeModel("gemini-1.5-pro")
+    model = generative_model("gemini-1.5-pro")
     response = model.generate_content(prompt)
     return response.text
 
+@profiled()
 def generate_pdf_from_flashcards(content):
     """
-    Generates a PDF file containing the flashcards.
+    Generates a PDF containing the flashcards and returns it as bytes.
     """
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-
-    # Title
-    pdf.set_font("Arial", style='B', size=16)
-    pdf.cell(200, 10, txt="Generated Flashcards", ln=True, align='C')
-    pdf.ln(10)
-
-    # Content
-    pdf.set_font("Arial", size=12)
-    pdf.multi_cell(0, 10, content)
-
-    pdf_output_path = "flashcards.pdf"
-    pdf.output(pdf_output_path)
-    return pdf_output_path
+    from pdf_renderer import render_pdf
+    return render_pdf([("title", "Generated Flashcards"), ("space", 10), ("text", content)])
 
 def flashcard_generator_app():
     st.title("📚 Flashcard Generator")
@@ -81,8 +51,13 @@ def flashcard_generator_app():
     num_flashcards = st.number_input("Number of flashcards to generate", min_value=1, max_value=50, value=10)
 
     if uploaded_pdf:
+        # Spooled to disk and cached by file content, so reruns (e.g. changing the number of flashcards) skip parsing
         with st.spinner("Extracting text from PDF..."):
-            notes_text = extract_text_from_pdf(uploaded_pdf)
+            try:
+                notes_text = pdf_text(uploaded_pdf)
+            except UploadRejected as e:
+                st.error(str(e))
+                st.stop()
         
         if notes_text:
             if st.button("Generate Flashcards"):
@@ -92,9 +67,8 @@ def flashcard_generator_app():
                     st.text_area("Flashcards", flashcards, height=400)
                     
                     # Generate PDF for download
-                    pdf_path = generate_pdf_from_flashcards(flashcards)
-                    with open(pdf_path, "rb") as f:
-                        st.download_button("Download Flashcards as PDF", f, file_name="flashcards.pdf")
+                    pdf_bytes = generate_pdf_from_flashcards(flashcards)
+                    st.download_button("Download Flashcards as PDF", pdf_bytes, file_name="flashcards.pdf")
         else:
             st.error("No text could be extracted from the uploaded PDF.")
 
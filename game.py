@@ -1,12 +1,12 @@
 import streamlit as st
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+from answer_evaluator import evaluate
+from resources import generate_json, generative_model, submit_background
+from profiling import profiled, span
 
-# Load environment variables and configure GenAI API
-load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# For this example, let's assume there are 3 levels
+MAX_LEVEL = 3
 
+@profiled()
 def generate_library_description(subject):
     """
     Generates an immersive description of "The Library of Lost Knowledge" themed
@@ -17,55 +17,55 @@ def generate_library_description(subject):
         f"'The Library of Lost Knowledge', where every corner hides secrets related to {subject}. "
         "Describe magical artifacts, dusty tomes, and a secret passage leading to the lost manuscript."
     )
-    model = genai.GenerativeModel("gemini-1.5-pro")
+    model = generative_model("gemini-1.5-pro")
     response = model.generate_content(prompt)
     return response.text
 
-def generate_challenge(subject, level):
+@profiled()
+def generate_level(subject, level):
     """
-    Generates a challenge question for the given subject and level.
-    The output should follow the format:
-    
-    Challenge: <challenge question>
-    Answer: <correct answer>
+    Generates the challenge, its correct answer and a hint for the given
+    subject and level in one structured call.
+    Returns {"challenge": ..., "answer": ..., "hint": ...}.
     """
     prompt = (
         f"Generate a challenge question for a student in the subject {subject} at level {level} "
-        "within the context of an ancient library quest. Output exactly in the following format:\n\n"
-        "Challenge: <challenge question>\n"
-        "Answer: <correct answer>\n"
+        "within the context of an ancient library quest, together with its correct answer and a helpful hint "
+        "that does not give the answer away. Keep the answer short (a word, number or short phrase).\n"
+        'Respond with JSON of the form {"challenge": "...", "answer": "...", "hint": "..."}.'
     )
-    model = genai.GenerativeModel("gemini-1.5-pro")
-    response = model.generate_content(prompt)
-    return response.text
+    result = generate_json(prompt, model_name="gemini-1.5-pro")
+    if not isinstance(result, dict) or not str(result.get("challenge", "")).strip():
+        raise ValueError("The library stayed silent. Please try again.")
+    return {
+        "challenge": str(result["challenge"]).strip(),
+        "answer": str(result.get("answer", "")).strip().lower(),
+        "hint": str(result.get("hint", "")).strip() or "No hint available.",
+    }
 
-def parse_challenge(challenge_text):
-    """
-    Parses the challenge text to extract the challenge question and the correct answer.
-    """
-    lines = challenge_text.split("\n")
-    challenge = None
-    answer = None
-    for line in lines:
-        line = line.strip()
-        if line.lower().startswith("challenge:"):
-            challenge = line[len("challenge:"):].strip()
-        elif line.lower().startswith("answer:"):
-            answer = line[len("answer:"):].strip().lower()
-    return challenge, answer
+# -------------------- PREFETCH --------------------
+# The next level is generated on the background pool while the player works on
+# the current one, so level transitions and hints need no model round trip.
+def prefetch_level(subject, level):
+    if level <= MAX_LEVEL and level not in st.session_state["prefetched_levels"]:
+        st.session_state["prefetched_levels"][level] = submit_background(generate_level, subject, level)
 
-def generate_hint(subject, challenge):
+@profiled()
+def enter_level(subject, level):
     """
-    Generates a hint for the given challenge.
+    Makes `level` the current level, using the prefetched challenge when there
+    is one, and starts prefetching the level after it.
     """
-    prompt = (
-        f"Generate a helpful hint to solve the following challenge in {subject}:\n\n"
-        f"Challenge: {challenge}\n\n"
-        "Hint:"
-    )
-    model = genai.GenerativeModel("gemini-1.5-pro")
-    response = model.generate_content(prompt)
-    return response.text
+    future = st.session_state["prefetched_levels"].pop(level, None)
+    try:
+        data = future.result() if future is not None else generate_level(subject, level)
+    except Exception:
+        data = generate_level(subject, level)  # retry once in the foreground
+    st.session_state["level"] = level
+    st.session_state["challenge"] = data["challenge"]
+    st.session_state["correct_answer"] = data["answer"]
+    st.session_state["hint"] = data["hint"]
+    prefetch_level(subject, level + 1)
 
 def library_game():
     st.title("📚 Study Quest: The Library of Lost Knowledge")
@@ -83,11 +83,12 @@ def library_game():
         st.session_state["level"] = 1
         st.session_state["completed_levels"] = 0
         st.session_state["game_over"] = False
-        st.session_state["room_description"] = generate_library_description(subject)
-        challenge_text = generate_challenge(subject, st.session_state["level"])
-        challenge, answer = parse_challenge(challenge_text)
-        st.session_state["challenge"] = challenge
-        st.session_state["correct_answer"] = answer
+        st.session_state["prefetched_levels"] = {}
+        # The description and the first level are generated concurrently
+        description = submit_background(generate_library_description, subject)
+        with st.spinner("Opening the library doors..."):
+            enter_level(subject, 1)
+            st.session_state["room_description"] = description.result()
 
     if "subject" in st.session_state:
         st.subheader("The Library")
@@ -98,26 +99,24 @@ def library_game():
 
         user_response = st.text_input("Enter your answer to the challenge:", key="user_response")
         if st.button("Submit Answer"):
-            if user_response.strip().lower() == st.session_state["correct_answer"]:
+            # Graded locally; only ambiguous answers are sent to the model
+            with span("grade_answer") as grading:
+                grade = evaluate(st.session_state["challenge"], user_response, st.session_state["correct_answer"])
+                grading["attrs"]["method"] = grade["method"]
+            if grade["correct"]:
                 st.success("Correct! You've overcome this challenge.")
                 st.session_state["completed_levels"] += 1
-                # For this example, let's assume there are 3 levels
-                if st.session_state["level"] >= 3:
+                if st.session_state["level"] >= MAX_LEVEL:
                     st.balloons()
                     st.success("Congratulations! You've recovered the lost manuscript and completed your quest!")
                     st.session_state["game_over"] = True
                 else:
-                    st.session_state["level"] += 1
-                    # Generate the next challenge for the new level
-                    challenge_text = generate_challenge(st.session_state["subject"], st.session_state["level"])
-                    challenge, answer = parse_challenge(challenge_text)
-                    st.session_state["challenge"] = challenge
-                    st.session_state["correct_answer"] = answer
+                    # The next level was prefetched while this one was being played
+                    enter_level(st.session_state["subject"], st.session_state["level"] + 1)
                     st.experimental_rerun()
             else:
                 st.error("Incorrect answer.")
-                hint = generate_hint(st.session_state["subject"], st.session_state["challenge"])
-                st.info(f"Hint: {hint}")
+                st.info(f"Hint: {st.session_state['hint']}")
 
     if st.session_state.get("game_over", False):
         st.write("Thank you for playing Study Quest!")
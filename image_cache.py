@@ -0,0 +1,142 @@
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from storage import cache_dir
+from profiling import profiled
+
+# -------------------- SETUP --------------------
+IMAGE_FETCH_WORKERS = int(os.getenv("IMAGE_FETCH_WORKERS", "8"))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+FETCH_TIMEOUT = 10
+
+# One pooled session shared by every fetch keeps TCP/TLS connections alive
+# between requests to the same image hosts.
+_session = requests.Session()
+_session.headers.update({"User-Agent": "Mozilla/5.0"})
+_adapter = HTTPAdapter(pool_connections=IMAGE_FETCH_WORKERS, pool_maxsize=IMAGE_FETCH_WORKERS)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+_executor = ThreadPoolExecutor(max_workers=IMAGE_FETCH_WORKERS, thread_name_prefix="image-fetch")
+_evict_lock = threading.Lock()
+
+# Blobs are stored by content hash; the URL index maps sha256(url) to a blob
+# name, so the same image served from several URLs is only stored once.
+_BLOB_DIR = cache_dir("images", "blobs")
+_URL_DIR = cache_dir("images", "urls")
+
+# -------------------- CACHE HELPERS --------------------
+def _url_key(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+# FPDF can only embed these formats, so they are recognized by their magic
+# bytes (servers often mislabel images) and anything else, e.g. WebP or SVG,
+# is rejected at fetch time instead of failing the PDF render.
+_SIGNATURES = ((b"\x89PNG\r\n\x1a\n", ".png"), (b"GIF8", ".gif"), (b"\xff\xd8\xff", ".jpg"))
+
+def _suffix_for(data):
+    """
+    The file suffix for image bytes FPDF can load, or None for other formats.
+    """
+    for signature, suffix in _SIGNATURES:
+        if data.startswith(signature):
+            return suffix
+    return None
+
+def _write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as tmp:
+        tmp.write(data)
+    os.replace(tmp_path, path)
+
+def cached_image_path(url):
+    """
+    Returns the cached file for a URL, or None if it has not been fetched yet.
+    """
+    index_path = os.path.join(_URL_DIR, _url_key(url))
+    try:
+        with open(index_path, "r") as f:
+            blob_path = os.path.join(_BLOB_DIR, f.read().strip())
+    except OSError:
+        return None
+    if not os.path.exists(blob_path):
+        return None
+    os.utime(blob_path)  # mark as recently used for eviction
+    return blob_path
+
+def _evict():
+    """
+    Removes least recently used blobs until the cache fits IMAGE_CACHE_MAX_BYTES.
+    Stale URL index entries are ignored on lookup.
+    """
+    with _evict_lock:
+        blobs = []
+        for entry in os.scandir(_BLOB_DIR):
+            if entry.is_file():
+                stat = entry.stat()
+                blobs.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in blobs)
+        for _, size, path in sorted(blobs):
+            if total <= IMAGE_CACHE_MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+# -------------------- FETCHING --------------------
+def fetch_image(url):
+    """
+    Validates and downloads an image in a single GET request and stores it in
+    the on-disk cache. Returns (path, None) on success or (None, error message).
+    """
+    path = cached_image_path(url)
+    if path:
+        return path, None
+
+    try:
+        with _session.get(url, stream=True, timeout=FETCH_TIMEOUT) as response:
+            if response.status_code != 200:
+                return None, f"Error: Received status code {response.status_code} for image URL: {url}"
+            content_type = response.headers.get("Content-Type", "").lower()
+            if "image" not in content_type:
+                return None, f"Error: {url} is not an image."
+
+            data = bytearray()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                data.extend(chunk)
+                if len(data) > MAX_IMAGE_BYTES:
+                    return None, f"Error: Image at {url} is too large."
+    except Exception as e:
+        return None, f"Error fetching image: {str(e)}"
+
+    if not data:
+        return None, f"Error: Downloaded image from {url} is empty."
+
+    suffix = _suffix_for(data)
+    if suffix is None:
+        return None, f"Error: Image at {url} ({content_type}) is not a JPEG, PNG or GIF."
+    blob_name = hashlib.sha256(data).hexdigest() + suffix
+    blob_path = os.path.join(_BLOB_DIR, blob_name)
+    if os.path.exists(blob_path):
+        os.utime(blob_path)
+    else:
+        _write_atomic(blob_path, bytes(data))
+    _write_atomic(os.path.join(_URL_DIR, _url_key(url)), blob_name.encode("utf-8"))
+    _evict()
+    return blob_path, None
+
+@profiled()
+def fetch_images(urls):
+    """
+    Fetches several images concurrently over the pooled session.
+    Returns a list of (url, path, error) tuples in the order of the input URLs.
+    """
+    results = _executor.map(fetch_image, urls)
+    return [(url, path, error) for url, (path, error) in zip(urls, results)]
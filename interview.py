@@ -1,27 +1,39 @@
 import streamlit as st
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+from resources import generate_json, generative_model, submit_background
+from profiling import profiled
 
-# Load environment variables and configure the API
-load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+REVIEW_MODES = {
+    "background": "Review each answer in the background as I go",
+    "batch": "Review all answers together at the end",
+}
 
-def generate_interview_questions(role, interview_type, num_questions):
+@profiled()
+def generate_interview_questions(role, interview_type, num_questions, avoid=()):
     """
-    Uses GenAI to generate a list of interview questions for a given role and interview type.
-    The questions are returned as a list of strings.
+    Uses GenAI to generate a structured set of interview questions for a given role and interview type.
+    Returns a list of {"question": ..., "focus": ...} dicts. Questions in `avoid`
+    (e.g. the set currently being practiced) are not repeated.
     """
     prompt = (
         f"Generate {num_questions} challenging interview questions for a candidate applying for a {role} role "
-        f"for a {interview_type} interview. List one question per line."
+        f"for a {interview_type} interview.\n"
+        'Respond with JSON of the form {"questions": [{"question": "...", "focus": "<skill being assessed>"}]}.'
     )
-    model = genai.GenerativeModel("gemini-1.5-pro")
-    response = model.generate_content(prompt)
-    # Split the output into lines and filter out empty lines.
-    questions = [line.strip() for line in response.text.split("\n") if line.strip()]
-    return questions
+    if avoid:
+        prompt += "\nDo not repeat any of these questions:\n" + "\n".join(f"- {q}" for q in avoid)
+    result = generate_json(prompt, model_name="gemini-1.5-pro")
+    items = result.get("questions", []) if isinstance(result, dict) else result
+    questions = []
+    for item in items:
+        if isinstance(item, str):
+            item = {"question": item}
+        if isinstance(item, dict) and str(item.get("question", "")).strip():
+            questions.append({"question": item["question"].strip(), "focus": str(item.get("focus", "")).strip()})
+    if not questions:
+        raise ValueError("No interview questions were generated. Please try again.")
+    return questions[:num_questions]
 
+@profiled()
 def review_answer(question, answer):
     """
     Uses GenAI to review the provided answer.
@@ -34,10 +46,114 @@ def review_answer(question, answer):
         f"Answer: {answer}\n\n"
         "Feedback:"
     )
-    model = genai.GenerativeModel("gemini-1.5-pro")
+    model = generative_model("gemini-1.5-pro")
     response = model.generate_content(prompt)
     return response.text
 
+@profiled()
+def review_answers_batch(role, interview_type, questions, answers):
+    """
+    Reviews every answer of a session in one structured call.
+    Returns a dict mapping question index to formatted feedback.
+    """
+    numbered = "\n\n".join(
+        f"{i + 1}. Question: {q['question']}\nAnswer: {answers.get(i) or 'No answer provided'}"
+        for i, q in enumerate(questions)
+    )
+    prompt = (
+        f"You are reviewing a {interview_type} interview practice session for a {role} role. "
+        "For each numbered answer below, give detailed feedback including strengths, weaknesses "
+        "and suggestions for improvement, and a score from 1 to 10.\n"
+        'Respond with JSON of the form {"reviews": [{"index": <question number>, "strengths": "...", '
+        '"weaknesses": "...", "suggestions": "...", "score": <1-10>}]}.\n\n'
+        f"{numbered}"
+    )
+    result = generate_json(prompt, model_name="gemini-1.5-pro")
+    reviews = result.get("reviews", []) if isinstance(result, dict) else result
+    feedback = {}
+    for review in reviews:
+        try:
+            idx = int(review.get("index")) - 1
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if 0 <= idx < len(questions):
+            feedback[idx] = format_review(review)
+    return feedback
+
+def format_review(review):
+    """
+    Formats one structured review as Markdown.
+    """
+    parts = []
+    if review.get("score") is not None:
+        parts.append(f"**Score:** {review['score']}/10")
+    for field in ("strengths", "weaknesses", "suggestions"):
+        if review.get(field):
+            parts.append(f"**{field.capitalize()}:** {review[field]}")
+    return "\n\n".join(parts) or "No feedback available"
+
+# -------------------- BACKGROUND WORK --------------------
+# Reviews and the next question set are computed on the shared background pool
+# while the user keeps answering; the script only collects finished futures.
+def prefetch_question_set(role, interview_type, num_questions, avoid=()):
+    st.session_state["next_question_set"] = (
+        (role, interview_type, num_questions),
+        submit_background(generate_interview_questions, role, interview_type, num_questions, tuple(avoid)),
+    )
+
+def take_question_set(role, interview_type, num_questions):
+    """
+    Returns the prefetched question set if it matches the current settings,
+    otherwise generates one now.
+    """
+    key, future = st.session_state.pop("next_question_set", (None, None))
+    if future is not None and key == (role, interview_type, num_questions):
+        try:
+            return future.result()
+        except Exception:
+            pass  # fall back to a fresh request below
+    return generate_interview_questions(role, interview_type, num_questions)
+
+def start_session(role, interview_type, num_questions):
+    questions = take_question_set(role, interview_type, num_questions)
+    st.session_state["interview_questions"] = questions
+    st.session_state["interview_settings"] = (role, interview_type, num_questions)
+    st.session_state["current_question_index"] = 0
+    st.session_state["user_answers"] = {}
+    st.session_state["feedback"] = {}
+    st.session_state["review_futures"] = {}
+    st.session_state["batch_reviewed"] = False
+    prefetch_question_set(role, interview_type, num_questions, avoid=[q["question"] for q in questions])
+
+def submit_answer(idx):
+    """
+    Button callback: saves the answer, queues its review in background mode
+    and moves straight on to the next question.
+    """
+    answer = st.session_state.get(f"answer_{idx}", "").strip()
+    if not answer:
+        st.session_state["answer_warning"] = idx
+        return
+    st.session_state.pop("answer_warning", None)
+    st.session_state["user_answers"][idx] = answer
+    if st.session_state["review_mode"] == "background":
+        question = st.session_state["interview_questions"][idx]["question"]
+        st.session_state["review_futures"][idx] = submit_background(review_answer, question, answer)
+    st.session_state["current_question_index"] = idx + 1
+
+def collect_reviews(wait=False):
+    """
+    Moves finished background reviews into st.session_state["feedback"].
+    """
+    futures = st.session_state.get("review_futures", {})
+    for idx, future in list(futures.items()):
+        if wait or future.done():
+            try:
+                st.session_state["feedback"][idx] = future.result()
+            except Exception as e:
+                st.session_state["feedback"][idx] = f"Error generating feedback: {e}"
+            del futures[idx]
+
 def interview_prep_app():
     st.title("🚀 Interview Preparation Assistant")
     st.write("Prepare for your upcoming interview with AI-generated questions and personalized feedback!")
@@ -45,49 +161,65 @@ def interview_prep_app():
     # Interview setup inputs
     role = st.text_input("Enter the job role you are applying for (e.g., Software Engineer, Data Scientist):")
     interview_type = st.selectbox("Select interview type:", ["Technical", "HR", "Behavioral", "Case Study"])
-    num_questions = st.number_input("How many interview questions would you like to practice?", 
+    num_questions = st.number_input("How many interview questions would you like to practice?",
                                     min_value=1, max_value=20, value=5)
+    st.radio("Feedback:", list(REVIEW_MODES), format_func=REVIEW_MODES.get, key="review_mode")
 
     # Generate interview questions when button is pressed
     if st.button("Generate Interview Questions") and role:
-        questions = generate_interview_questions(role, interview_type, num_questions)
-        st.session_state["interview_questions"] = questions
-        st.session_state["current_question_index"] = 0
-        st.session_state["user_answers"] = {}
-        st.session_state["feedback"] = {}
+        try:
+            with st.spinner("Generating interview questions..."):
+                start_session(role, interview_type, num_questions)
+        except Exception as e:
+            st.error(f"Error generating questions: {e}")
 
     # If questions have been generated, show the current question
     if "interview_questions" in st.session_state:
         questions = st.session_state["interview_questions"]
         idx = st.session_state.get("current_question_index", 0)
+        collect_reviews()
         if idx < len(questions):
             st.subheader(f"Question {idx + 1} of {len(questions)}")
             current_question = questions[idx]
-            st.write(current_question)
+            st.write(current_question["question"])
+            if current_question["focus"]:
+                st.caption(f"Focus: {current_question['focus']}")
             # Each text area uses a key based on the current question index.
-            user_answer = st.text_area("Your Answer:", key=f"answer_{idx}")
-            
-            if st.button("Submit Answer", key=f"submit_{idx}"):
-                # Save the user's answer and generate feedback
-                st.session_state["user_answers"][idx] = user_answer
-                feedback = review_answer(current_question, user_answer)
-                st.session_state["feedback"][idx] = feedback
-                st.success("Feedback generated below:")
-                st.write(feedback)
-            
-            # Provide a "Next Question" button if an answer has been submitted
-            if st.session_state["user_answers"].get(idx):
-                if st.button("Next Question", key=f"next_{idx}"):
-                    st.session_state["current_question_index"] = idx + 1
-                    # When the index updates, a new text area with a new key is rendered.
+            st.text_area("Your Answer:", key=f"answer_{idx}")
+            st.button("Submit Answer", key=f"submit_{idx}", on_click=submit_answer, args=(idx,))
+            if st.session_state.get("answer_warning") == idx:
+                st.warning("Please write an answer before submitting.")
+
+            # Feedback on earlier answers appears here as soon as it is ready
+            for i in sorted(st.session_state["feedback"]):
+                with st.expander(f"Feedback on Q{i + 1}"):
+                    st.write(st.session_state["feedback"][i])
+            if st.session_state.get("review_futures"):
+                st.caption(f"{len(st.session_state['review_futures'])} review(s) in progress...")
         else:
             st.success("You've completed all the interview questions! Review your answers and feedback below.")
+            if st.session_state.get("review_futures"):
+                with st.spinner("Finishing the remaining reviews..."):
+                    collect_reviews(wait=True)
+            missing = [i for i in range(len(questions)) if i not in st.session_state["feedback"]]
+            if missing and not st.session_state.get("batch_reviewed"):
+                st.session_state["batch_reviewed"] = True
+                with st.spinner("Reviewing all your answers..."):
+                    try:
+                        role_, type_, _ = st.session_state["interview_settings"]
+                        st.session_state["feedback"].update(
+                            review_answers_batch(role_, type_, questions, st.session_state["user_answers"])
+                        )
+                    except Exception as e:
+                        st.error(f"Error generating feedback: {e}")
             for i, q in enumerate(questions):
-                st.markdown(f"**Q{i+1}: {q}**")
+                st.markdown(f"**Q{i+1}: {q['question']}**")
                 answer = st.session_state["user_answers"].get(i, "No answer provided")
                 feedback = st.session_state["feedback"].get(i, "No feedback available")
                 st.write(f"**Your Answer:** {answer}")
                 st.write(f"**Feedback:** {feedback}")
+            # The next set was prefetched when this one started
+            st.button("Practice Another Set", on_click=start_session, args=st.session_state["interview_settings"])
             if st.button("Reset Practice"):
                 for key in list(st.session_state.keys()):
                     del st.session_state[key]
@@ -0,0 +1,261 @@
+import difflib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from storage import cache_dir
+
+# -------------------- SETUP --------------------
+# Learning paths are stored as structured data (stages and resources) and
+# looked up by normalized topic first, so "ML", "machine learning" and
+# "Machine Learning basics" share one generation. The nearest stored topic by
+# embedding is only reused when it also has the same terms (up to word order,
+# plurals and typos): embeddings of related but distinct topics such as
+# "python for data science" and "python for web development" are close too.
+PATH_MATCH_THRESHOLD = float(os.getenv("PATH_MATCH_THRESHOLD", "0.92"))
+# Words of at least TYPO_MIN_CHARS letters this similar (difflib ratio) count
+# as the same term, e.g. "algoritm"/"algorithm" (0.94) but not
+# "statics"/"statistics" (0.82); shorter words must match exactly, as
+# "html"/"xhtml" or "sql"/"nosql" differ by a single edit.
+TERM_MATCH_RATIO = 0.9
+TYPO_MIN_CHARS = 6
+# Stored paths older than this are still served but regenerated in the background
+PATH_REFRESH_AFTER = int(os.getenv("PATH_REFRESH_AFTER", str(30 * 24 * 3600)))
+PATH_MODEL = "gemini-1.5-pro"
+
+_DB_PATH = os.path.join(cache_dir("learning_paths"), "learning_paths.sqlite3")
+_lock = threading.Lock()
+_matrix = None  # (keys, normalized embedding matrix), rebuilt after inserts
+_refreshing = set()
+
+PATH_PROMPT = """You are a learning path generator. Create a structured study plan for the topic below,
+from fundamentals to advanced, with essential resources (books, articles, courses, and videos).
+Keep it within about 300 words of content.
+
+Respond with JSON of the form:
+{{"title": "...", "overview": "...", "stages": [{{"name": "...", "goal": "...", "duration": "...",
+"topics": ["..."], "resources": [{{"type": "book|article|course|video", "title": "...", "url": "..."}}]}}]}}
+
+Topic: {topic}
+"""
+
+# -------------------- TOPIC NORMALIZATION --------------------
+_ABBREVIATIONS = {
+    "ai": "artificial intelligence",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "cv": "computer vision",
+    "rl": "reinforcement learning",
+    "dsa": "data structures and algorithms",
+    "os": "operating systems",
+    "dbms": "database management systems",
+    "oop": "object oriented programming",
+    "js": "javascript",
+    "ts": "typescript",
+    "k8s": "kubernetes",
+}
+_FILLER = re.compile(
+    r"\b(basics?|fundamentals|introduction to|intro to|introduction|intro|for beginners|beginners?|"
+    r"learn(ing)? path|learn|101|course|tutorial|crash course|complete guide|guide)\b"
+)
+_STOPWORDS = frozenset("a an and for in of on the to with".split())
+
+def normalize_topic(topic):
+    """
+    Canonical form of a topic: lowercase, filler words like "basics" or
+    "introduction to" removed, and expanded if what is left is a known
+    abbreviation ("ML basics" -> "machine learning"; "CV writing" is kept).
+    """
+    text = re.sub(r"[^\w\s+#]", " ", topic.lower())
+    text = " ".join(_FILLER.sub(" ", text).split())
+    text = _ABBREVIATIONS.get(text, text)
+    return text or topic.strip().lower()
+
+def _terms(key):
+    terms = []
+    for token in key.split():
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+def _same_term(term, other):
+    if term == other:
+        return True
+    if min(len(term), len(other)) < TYPO_MIN_CHARS:
+        return False
+    return difflib.SequenceMatcher(None, term, other).ratio() >= TERM_MATCH_RATIO
+
+def same_terms(key, other):
+    """
+    True if two normalized topics use the same terms, in any order, allowing
+    plurals and small typos in longer words ("neural networks" / "neural netwrk").
+    """
+    def covered(terms, candidates):
+        return all(any(_same_term(term, candidate) for candidate in candidates) for term in terms)
+    terms, other_terms = _terms(key), _terms(other)
+    return bool(terms) and covered(terms, other_terms) and covered(other_terms, terms)
+
+# -------------------- STORE --------------------
+@contextmanager
+def _connect():
+    conn = sqlite3.connect(_DB_PATH, timeout=30)
+    try:
+        _init(conn)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+def _init(conn):
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS paths ("
+        "key TEXT PRIMARY KEY, topic TEXT, payload TEXT, embedding BLOB, created_at REAL, hits INTEGER DEFAULT 0)"
+    )
+
+def _load(conn, key):
+    row = conn.execute("SELECT topic, payload, created_at FROM paths WHERE key = ?", (key,)).fetchone()
+    if not row:
+        return None
+    conn.execute("UPDATE paths SET hits = hits + 1 WHERE key = ?", (key,))
+    return {"key": key, "topic": row[0], "path": json.loads(row[1]), "created_at": row[2]}
+
+def _save(key, topic, path, embedding):
+    global _matrix
+    blob = embedding.astype("float32").tobytes() if embedding is not None else None
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO paths (key, topic, payload, embedding, created_at) VALUES (?, ?, ?, ?, ?)",
+            (key, topic, json.dumps(path), blob, time.time()),
+        )
+    with _lock:
+        _matrix = None
+
+# -------------------- EMBEDDINGS --------------------
+def _embed(text):
+    """
+    Unit-length embedding of a normalized topic, or None if embeddings are unavailable.
+    """
+    try:
+        import numpy as np
+        from resources import embedding_model
+        vector = np.array(embedding_model().embed_query(text), dtype="float32")
+    except Exception:
+        return None
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+def _embedding_matrix():
+    global _matrix
+    with _lock:
+        if _matrix is None:
+            import numpy as np
+            with _connect() as conn:
+                rows = conn.execute("SELECT key, embedding FROM paths WHERE embedding IS NOT NULL").fetchall()
+            keys = [key for key, _ in rows]
+            vectors = [np.frombuffer(blob, dtype="float32") for _, blob in rows]
+            _matrix = (keys, np.vstack(vectors) if vectors else None)
+        return _matrix
+
+def nearest_topics(embedding, threshold=PATH_MATCH_THRESHOLD):
+    """
+    Returns [(key, cosine similarity)] of the stored topics at least
+    `threshold` similar to an embedding, closest first.
+    """
+    keys, matrix = _embedding_matrix()
+    if embedding is None or matrix is None or matrix.shape[1] != embedding.shape[0]:
+        return []
+    scores = matrix @ embedding
+    return [(keys[i], float(scores[i])) for i in scores.argsort()[::-1] if scores[i] >= threshold]
+
+# -------------------- GENERATION --------------------
+def generate_structured_path(topic):
+    """
+    Generates a learning path for a topic as {"title", "overview", "stages": [...]}.
+    """
+    from resources import generate_json
+    result = generate_json(PATH_PROMPT.format(topic=topic), model_name=PATH_MODEL)
+    if not isinstance(result, dict) or not isinstance(result.get("stages"), list) or not result["stages"]:
+        raise ValueError("The model did not return a structured learning path.")
+    return result
+
+def _regenerate(key, topic):
+    try:
+        _save(key, topic, generate_structured_path(topic), _embed(key))
+    except Exception as e:
+        print(f"Background refresh of learning path {topic!r} failed: {e}")
+    finally:
+        with _lock:
+            _refreshing.discard(key)
+
+def _refresh_in_background(entry):
+    from resources import submit_background
+    with _lock:
+        if entry["key"] in _refreshing:
+            return
+        _refreshing.add(entry["key"])
+    submit_background(_regenerate, entry["key"], entry["topic"])
+
+def get_learning_path(topic, force=False, background_refresh=True):
+    """
+    Returns (path, source, matched_topic) for a topic, where source is
+    "stored" (same normalized topic), "similar" (nearest stored topic by
+    embedding) or "generated". Stored paths older than PATH_REFRESH_AFTER are
+    served immediately and regenerated in the background when
+    background_refresh is set; force=True always generates a new path.
+    """
+    key = normalize_topic(topic)
+    embedding = None
+    if not force:
+        with _connect() as conn:
+            entry = _load(conn, key)
+        source = "stored"
+        if entry is None:
+            embedding = _embed(key)
+            match = next((other for other, _ in nearest_topics(embedding) if same_terms(key, other)), None)
+            if match is not None:
+                with _connect() as conn:
+                    entry = _load(conn, match)
+                source = "similar"
+        if entry is not None:
+            if background_refresh and time.time() - entry["created_at"] > PATH_REFRESH_AFTER:
+                _refresh_in_background(entry)
+            return entry["path"], source, entry["topic"]
+
+    path = generate_structured_path(topic)
+    _save(key, topic, path, embedding if embedding is not None else _embed(key))
+    return path, "generated", topic
+
+# -------------------- FORMATTING --------------------
+def format_learning_path(path):
+    """
+    Renders a structured learning path as Markdown.
+    """
+    lines = []
+    if path.get("title"):
+        lines.append(f"### {path['title']}")
+    if path.get("overview"):
+        lines.append(path["overview"])
+    for number, stage in enumerate(path.get("stages", []), 1):
+        heading = f"**Stage {number}: {stage.get('name', '')}**"
+        if stage.get("duration"):
+            heading += f" ({stage['duration']})"
+        lines.append("")
+        lines.append(heading)
+        if stage.get("goal"):
+            lines.append(f"Goal: {stage['goal']}")
+        if stage.get("topics"):
+            lines.append("Topics: " + ", ".join(str(t) for t in stage["topics"]))
+        for resource in stage.get("resources", []):
+            item = f"- [{resource.get('type', 'resource')}] {resource.get('title', '')}"
+            if resource.get("url"):
+                item += f" - {resource['url']}"
+            lines.append(item)
+    return "\n".join(lines)
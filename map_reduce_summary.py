@@ -0,0 +1,104 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from transcript_store import memoized_summary
+from resources import generative_model
+from profiling import profiled, run_in_context
+
+# -------------------- SETUP --------------------
+# Segment size keeps each map prompt well inside the model's comfort zone;
+# the fan-in bounds how many partial summaries one reduce call combines.
+SEGMENT_CHARS = int(os.getenv("SUMMARY_SEGMENT_CHARS", "6000"))
+REDUCE_FANIN = int(os.getenv("SUMMARY_REDUCE_FANIN", "8"))
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=SUMMARY_WORKERS, thread_name_prefix="summary")
+
+MAP_PROMPT = (
+    "Summarize the following part ({start} - {end}) of a YouTube video transcript into concise "
+    "key bullet points in English. Keep names, definitions and numbers.\n\n{text}"
+)
+COMBINE_PROMPT = (
+    "Merge the following partial summaries of consecutive parts of a YouTube video into one set of "
+    "concise key bullet points in English, removing repetition.\n\n{text}"
+)
+FINAL_PROMPT = (
+    "Summarize the following YouTube video into concise key bullet points in English. "
+    "The input is a set of summaries of consecutive parts of the video, in order.\n\n{text}"
+)
+SINGLE_PROMPT = "Summarize the following YouTube video transcript into concise key bullet points in English:\n\n{text}"
+
+# -------------------- SEGMENTATION --------------------
+def format_timestamp(seconds):
+    """
+    Formats seconds as m:ss or h:mm:ss.
+    """
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+def split_segments(segments, max_chars=SEGMENT_CHARS):
+    """
+    Groups transcript entries into windows of at most max_chars characters.
+    Windows always start and end on entry boundaries, so each one has an exact
+    start and end timestamp. Returns a list of {"start", "end", "text"} dicts.
+    """
+    windows = []
+    texts = []
+    length = 0
+    start = end = 0.0
+    for segment in segments:
+        text = segment["text"].strip()
+        if not text:
+            continue
+        if texts and length + len(text) + 1 > max_chars:
+            windows.append({"start": start, "end": end, "text": " ".join(texts)})
+            texts, length = [], 0
+        if not texts:
+            start = segment["start"]
+        texts.append(text)
+        length += len(text) + 1
+        end = segment["start"] + segment.get("duration", 0.0)
+    if texts:
+        windows.append({"start": start, "end": end, "text": " ".join(texts)})
+    return windows
+
+# -------------------- MAP / REDUCE --------------------
+def _generate(model_name, prompt):
+    model = generative_model(model_name)
+    return memoized_summary(model_name, prompt, lambda: model.generate_content(prompt).text)
+
+def _summarize_window(model_name, window):
+    prompt = MAP_PROMPT.format(
+        start=format_timestamp(window["start"]),
+        end=format_timestamp(window["end"]),
+        text=window["text"],
+    )
+    return f"[{format_timestamp(window['start'])}]\n" + _generate(model_name, prompt)
+
+@profiled()
+def summarize_segments(segments, model_name="gemini-1.5-pro"):
+    """
+    Summarizes a full transcript with map-reduce.
+    Windows are summarized concurrently, then the partial summaries are merged
+    REDUCE_FANIN at a time, level by level, until a single summary remains.
+    Every call goes through memoized_summary, so repeated videos and unchanged
+    windows are never sent twice. Short transcripts use a single call.
+    """
+    windows = split_segments(segments)
+    if not windows:
+        return ""
+    if len(windows) == 1:
+        return _generate(model_name, SINGLE_PROMPT.format(text=windows[0]["text"]))
+
+    # run_in_context keeps the workers' model calls in the caller's trace
+    partials = list(_executor.map(run_in_context(lambda window: _summarize_window(model_name, window)), windows))
+    while len(partials) > REDUCE_FANIN:
+        groups = [partials[i:i + REDUCE_FANIN] for i in range(0, len(partials), REDUCE_FANIN)]
+        partials = list(_executor.map(
+            run_in_context(lambda group: _generate(model_name, COMBINE_PROMPT.format(text="\n\n".join(group)))),
+            groups,
+        ))
+    return _generate(model_name, FINAL_PROMPT.format(text="\n\n".join(partials)))
@@ -0,0 +1,150 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from fpdf import FPDF
+from profiling import profiled
+
+# -------------------- SETUP --------------------
+# Rendering runs on a small shared pool so the Streamlit script thread never
+# blocks on FPDF, and identical documents are only rendered once per process.
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+PDF_CACHE_SIZE = int(os.getenv("PDF_CACHE_SIZE", "64"))
+PDF_RENDER_TIMEOUT = 60
+
+_executor = ThreadPoolExecutor(max_workers=PDF_RENDER_WORKERS, thread_name_prefix="pdf-render")
+_cache = OrderedDict()
+_in_flight = {}
+_lock = threading.RLock()
+
+# -------------------- ENCODING FIX --------------------
+class _Latin1Table(dict):
+    """
+    Translation table for str.translate: smart punctuation is mapped to ASCII,
+    Latin-1 characters map to themselves and anything else becomes '?'.
+    Lookups are memoized so each code point is resolved only once.
+    """
+    def __missing__(self, codepoint):
+        replacement = chr(codepoint) if codepoint < 256 else "?"
+        self[codepoint] = replacement
+        return replacement
+
+_ENCODING_TABLE = _Latin1Table({
+    0x201c: '"',    # left double quote
+    0x201d: '"',    # right double quote
+    0x2018: "'",    # left single quote
+    0x2019: "'",    # right single quote
+    0x2013: "-",    # en dash
+    0x2014: "-",    # em dash
+    0x2026: "...",  # ellipsis
+})
+
+def fix_encoding(text):
+    """
+    Replaces smart punctuation with ASCII equivalents and any remaining
+    non-Latin-1 characters with '?', in a single pass over the text,
+    to avoid Latin-1 encoding errors in FPDF.
+    """
+    return text.translate(_ENCODING_TABLE)
+
+# -------------------- DOCUMENT HASHING --------------------
+def document_hash(blocks):
+    """
+    Returns a content hash for a list of document blocks.
+    Image blocks are hashed by the bytes of the image file, not its path,
+    so temporary files with random names still hit the cache. An image that
+    can't be read (e.g. evicted from the image cache) is hashed by its path,
+    and _render writes an error line in its place.
+
+    Supported blocks:
+      - ("title", text): bold centered heading
+      - ("text", text): body text
+      - ("image", path): full-width image
+      - ("notice", text): centered one-line message
+      - ("space", height): vertical space
+    """
+    digest = hashlib.sha256()
+    for kind, value in blocks:
+        digest.update(kind.encode("utf-8") + b"\0")
+        if kind == "image":
+            try:
+                with open(value, "rb") as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+            except OSError:
+                digest.update(b"missing:" + str(value).encode("utf-8"))
+        else:
+            digest.update(str(value).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+# -------------------- RENDERING --------------------
+def _render(blocks):
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+
+    for kind, value in blocks:
+        if kind == "title":
+            pdf.set_font("Arial", style='B', size=16)
+            pdf.cell(0, 10, txt=fix_encoding(value), ln=True, align='C')
+        elif kind == "text":
+            pdf.set_font("Arial", size=12)
+            pdf.multi_cell(0, 10, fix_encoding(value))
+        elif kind == "image":
+            # One unreadable image becomes an error line, not a failed document
+            try:
+                pdf.image(value, x=pdf.l_margin, w=pdf.w - 2 * pdf.l_margin)
+            except Exception as e:
+                pdf.ln(10)
+                pdf.set_font("Arial", size=12)
+                pdf.cell(0, 10, txt=fix_encoding(f"Error adding image {os.path.basename(value)}: {e}"), ln=True, align='C')
+        elif kind == "notice":
+            pdf.set_font("Arial", size=12)
+            pdf.cell(0, 10, txt=fix_encoding(value), ln=True, align='C')
+        elif kind == "space":
+            pdf.ln(value)
+        else:
+            raise ValueError(f"Unknown PDF block type: {kind}")
+
+    output = pdf.output(dest="S")
+    if isinstance(output, str):  # PyFPDF 1.x returns a Latin-1 string
+        output = output.encode("latin-1")
+    return bytes(output)
+
+def _store(key, future):
+    with _lock:
+        _in_flight.pop(key, None)
+        if future.exception() is None:
+            _cache[key] = future.result()
+            _cache.move_to_end(key)
+            while len(_cache) > PDF_CACHE_SIZE:
+                _cache.popitem(last=False)
+
+def submit_pdf(blocks):
+    """
+    Schedules a document for rendering on the worker pool and returns a Future
+    resolving to the PDF bytes. Cached documents resolve immediately and
+    concurrent requests for the same document share one render.
+    """
+    blocks = list(blocks)
+    key = document_hash(blocks)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            future = Future()
+            future.set_result(_cache[key])
+            return future
+        future = _in_flight.get(key)
+        if future is None:
+            future = _executor.submit(_render, blocks)
+            _in_flight[key] = future
+            future.add_done_callback(lambda f: _store(key, f))
+    return future
+
+@profiled()
+def render_pdf(blocks, timeout=PDF_RENDER_TIMEOUT):
+    """
+    Renders a document and returns the PDF as bytes.
+    """
+    return submit_pdf(blocks).result(timeout=timeout)
@@ -0,0 +1,123 @@
+import os
+from itertools import islice
+from profiling import span
+
+# -------------------- SETUP --------------------
+# Streaming PDF -> chunk pipeline. Pages are read one at a time, split as they
+# arrive and yielded with their document and page numbers, so memory stays
+# bounded by roughly one chunk plus one page however large the upload is.
+# Chunks are cut at the best boundary available (paragraph, line, sentence,
+# word) and the last CHUNK_OVERLAP characters carry over into the next chunk,
+# including across page boundaries.
+CHUNK_SIZE = int(os.getenv("PDF_CHUNK_SIZE", "10000"))
+CHUNK_OVERLAP = int(os.getenv("PDF_CHUNK_OVERLAP", "1000"))
+
+_SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+# -------------------- PAGES --------------------
+def iter_pages(pdf_file):
+    """
+    Yields (page_number, text) for each page of a PDF, 1-based, extracting
+    text lazily page by page.
+    """
+    from PyPDF2 import PdfReader
+    if hasattr(pdf_file, "seek"):
+        pdf_file.seek(0)
+    reader = PdfReader(pdf_file)
+    for number, page in enumerate(reader.pages, 1):
+        with span("extract_page", page=number):
+            text = page.extract_text() or ""
+        yield number, text
+
+# -------------------- SPLITTING --------------------
+def _cut_point(text, limit, minimum):
+    for separator in _SEPARATORS:
+        index = text.rfind(separator, minimum, limit)
+        if index != -1:
+            return index + len(separator)
+    return limit
+
+def _overlap_start(text, cut, overlap):
+    start = max(0, cut - overlap)
+    # Start the carry-over on a word boundary
+    space = text.find(" ", start, cut)
+    return space + 1 if space != -1 else start
+
+def _pages_between(marks, start, end):
+    """
+    Page numbers covering text[start:end], given marks of (offset, page).
+    """
+    pages = [page for offset, page in marks if offset < end]
+    first = [page for offset, page in marks if offset <= start]
+    first_page = first[-1] if first else pages[0]
+    return first_page, pages[-1]
+
+def iter_chunks(pages, source, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+    """
+    Splits an iterable of (page_number, text) into overlapping chunks.
+    Yields {"text": ..., "metadata": {"source", "page", "page_end", "chunk"}}.
+    """
+    if chunk_overlap >= chunk_size // 2:
+        raise ValueError("chunk_overlap must be less than half of chunk_size")
+    buffer = ""
+    marks = []  # (offset in buffer, page number) where each page's text starts
+    index = 0
+
+    def emit(end):
+        page, page_end = _pages_between(marks, 0, end)
+        return {
+            "text": buffer[:end].strip(),
+            "metadata": {"source": source, "page": page, "page_end": page_end, "chunk": index},
+        }
+
+    for page_number, text in pages:
+        if not text.strip():
+            continue
+        if buffer:
+            buffer += "\n"
+        marks.append((len(buffer), page_number))
+        buffer += text
+        while len(buffer) >= chunk_size:
+            cut = _cut_point(buffer, chunk_size, chunk_size // 2)
+            yield emit(cut)
+            index += 1
+            start = _overlap_start(buffer, cut, chunk_overlap)
+            buffer = buffer[start:]
+            # Keep the page in effect at the new start, then shift the rest
+            carried = [page for offset, page in marks if offset <= start][-1:]
+            marks = [(0, page) for page in carried] + [
+                (offset - start, page) for offset, page in marks if offset > start
+            ]
+    if buffer.strip():
+        yield emit(len(buffer))
+
+def iter_document_chunks(pdf_docs, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, read_pages=iter_pages):
+    """
+    Streams the chunks of several uploaded PDFs, document by document.
+    The source of each chunk is the upload's file name; read_pages turns a
+    document into (page_number, text) pairs.
+    """
+    for number, pdf in enumerate(pdf_docs, 1):
+        source = getattr(pdf, "name", None) or f"document {number}"
+        yield from iter_chunks(read_pages(pdf), source, chunk_size, chunk_overlap)
+
+def batched(iterable, size):
+    """
+    Yields lists of up to `size` items without materializing the iterable.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def format_citation(metadata):
+    """
+    "notes.pdf p. 3" or "notes.pdf pp. 3-4".
+    """
+    page, page_end = metadata.get("page"), metadata.get("page_end")
+    if page is None:
+        return metadata.get("source", "")
+    pages = f"p. {page}" if page_end in (None, page) else f"pp. {page}-{page_end}"
+    return f"{metadata.get('source', '')} {pages}".strip()
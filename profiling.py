@@ -0,0 +1,201 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# -------------------- SETUP --------------------
+# Lightweight stage timing. A trace covers one request (one Streamlit rerun,
+# one API call, one batch item); spans inside it nest through contextvars:
+#
+#   with trace_request("chatpdf"):
+#       with span("similarity_search", k=4):
+#           ...
+#
+# Spans outside a trace cost one contextvar lookup and record nothing.
+# Set PROFILE_EXPORT_DIR to append every finished trace to
+# <dir>/traces.jsonl.
+PROFILE_EXPORT_DIR = os.getenv("PROFILE_EXPORT_DIR")
+RECENT_TRACES = 50
+
+_trace = contextvars.ContextVar("trace", default=None)
+_parent = contextvars.ContextVar("parent_span", default=None)
+_recent = deque(maxlen=RECENT_TRACES)
+_export_lock = threading.Lock()
+
+class Trace:
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            record["id"] = len(self.spans)
+            self.spans.append(record)
+        return record
+
+# -------------------- SPANS --------------------
+@contextmanager
+def span(name, **attrs):
+    """
+    Times the enclosed block as a child of the current span. Attributes can
+    be added while the span is open through the yielded dict's "attrs".
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield {"attrs": attrs}
+        return
+    parent = _parent.get()
+    record = trace.add({
+        "name": name,
+        "parent": parent["id"] if parent else None,
+        "depth": parent["depth"] + 1 if parent else 0,
+        "start": time.perf_counter() - trace.origin,
+        "duration": None,
+        "thread": threading.current_thread().name,
+        "attrs": attrs,
+    })
+    token = _parent.set(record)
+    try:
+        yield record
+    except BaseException as e:
+        record["attrs"]["error"] = type(e).__name__
+        raise
+    finally:
+        record["duration"] = time.perf_counter() - trace.origin - record["start"]
+        _parent.reset(token)
+
+def profiled(name=None):
+    """
+    Decorator form of span(); the span is named after the function by default.
+    """
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def run_in_context(fn):
+    """
+    Wraps fn so it runs inside the caller's current trace and span, for work
+    handed to thread pools (contextvars are not copied into pool threads).
+    """
+    trace, parent = _trace.get(), _parent.get()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        trace_token, parent_token = _trace.set(trace), _parent.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _parent.reset(parent_token)
+            _trace.reset(trace_token)
+    return wrapper
+
+# -------------------- TRACES --------------------
+@contextmanager
+def trace_request(name):
+    """
+    Collects the spans of one request. The finished trace is kept in memory
+    (see last_trace) and exported when PROFILE_EXPORT_DIR is set.
+    """
+    trace = Trace(name)
+    trace_token = _trace.set(trace)
+    parent_token = _parent.set(None)
+    try:
+        with span(name):
+            yield trace
+    finally:
+        _parent.reset(parent_token)
+        _trace.reset(trace_token)
+        _recent.append(trace)
+        if PROFILE_EXPORT_DIR:
+            export_jsonl(trace, os.path.join(PROFILE_EXPORT_DIR, "traces.jsonl"))
+
+def current_trace():
+    return _trace.get()
+
+def last_trace(name=None):
+    for trace in reversed(_recent):
+        if name is None or trace.name == name:
+            return trace
+    return None
+
+# -------------------- EXPORT --------------------
+def to_jsonl(trace):
+    """
+    One JSON object per span, durations in milliseconds.
+    """
+    lines = []
+    for record in trace.spans:
+        lines.append(json.dumps({
+            "trace": trace.name,
+            "trace_started_at": trace.started_at,
+            "id": record["id"],
+            "parent": record["parent"],
+            "name": record["name"],
+            "start_ms": round(record["start"] * 1000, 3),
+            "duration_ms": round((record["duration"] or 0) * 1000, 3),
+            "thread": record["thread"],
+            "attrs": record["attrs"],
+        }, default=str))
+    return "\n".join(lines) + "\n"
+
+def to_chrome_trace(trace):
+    """
+    Chrome trace event format (open in chrome://tracing or Perfetto).
+    """
+    threads = {}
+    events = []
+    for record in trace.spans:
+        tid = threads.setdefault(record["thread"], len(threads) + 1)
+        events.append({
+            "name": record["name"],
+            "ph": "X",
+            "ts": round(record["start"] * 1e6, 1),
+            "dur": round((record["duration"] or 0) * 1e6, 1),
+            "pid": 1,
+            "tid": tid,
+            "args": {key: str(value) for key, value in record["attrs"].items()},
+        })
+    for thread, tid in threads.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": thread}})
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+def export_jsonl(trace, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with _export_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(to_jsonl(trace))
+
+# -------------------- STREAMLIT PANEL --------------------
+def timing_panel(trace):
+    """
+    Shows a trace's stage timings in the sidebar with download buttons for
+    both export formats.
+    """
+    import streamlit as st
+    if trace is None or not trace.spans:
+        return
+    with st.sidebar.expander("⏱️ Stage timings", expanded=True):
+        total = trace.spans[0]["duration"] or 0
+        rows = []
+        for record in trace.spans:
+            duration = record["duration"] or 0
+            rows.append({
+                "stage": "· " * record["depth"] + record["name"],
+                "ms": round(duration * 1000, 1),
+                "%": round(100 * duration / total, 1) if total else 0.0,
+            })
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+        st.download_button("Download JSONL", to_jsonl(trace), file_name=f"{trace.name}-trace.jsonl")
+        st.download_button("Download Chrome trace", to_chrome_trace(trace), file_name=f"{trace.name}-trace.json")
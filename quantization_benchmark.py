@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+# -------------------- SETUP --------------------
+# Memory saved vs. recall@k for every VECTOR_QUANTIZATION mode on the same
+# corpus, with and without exact re-ranking. By default the corpus is a
+# seeded synthetic set of clustered 768-dim vectors (embeddings cluster by
+# topic); --index reads the real vectors of a saved chatpdf index instead.
+#
+#   python quantization_benchmark.py                       # synthetic corpus
+#   python quantization_benchmark.py --index faiss_index   # vectors of a saved index
+SEED = 1234
+DEFAULT_VECTORS = 20_000
+DEFAULT_QUERIES = 200
+DIM = 768
+
+# -------------------- CORPUS --------------------
+def synthetic_corpus(count, dim=DIM, clusters=200, seed=SEED):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype("float32")
+    labels = rng.integers(0, clusters, count)
+    vectors = centers[labels] + 0.35 * rng.standard_normal((count, dim)).astype("float32")
+    return vectors.astype("float32")
+
+def index_corpus(folder):
+    import faiss
+    from vector_quantization import index_vectors
+    index = faiss.read_index(os.path.join(folder, "index.faiss"))
+    if not hasattr(index, "reconstruct_n") or index.code_size != index.d * 4:
+        raise SystemExit(f"{folder} is not a float32 index; rebuild it with VECTOR_QUANTIZATION=none")
+    return index_vectors(index)
+
+def sample_queries(vectors, count, seed=SEED):
+    """
+    Perturbed corpus vectors, so every query has close but inexact neighbours.
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed + 1)
+    picked = vectors[rng.choice(len(vectors), min(count, len(vectors)), replace=False)]
+    scale = 0.1 * float(np.linalg.norm(vectors, axis=1).mean()) / np.sqrt(vectors.shape[1])
+    return (picked + scale * rng.standard_normal(picked.shape)).astype("float32")
+
+# -------------------- MEASUREMENT --------------------
+def recall_at_k(found, truth):
+    hits = sum(len(set(row[row != -1]) & set(expected)) for row, expected in zip(found, truth))
+    return hits / truth.size
+
+def run(vectors, queries, k, factor=None):
+    import faiss
+    from vector_quantization import MODES, RerankedIndex, build_index, rerank_factor, resident_bytes
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+    float32_bytes = resident_bytes(exact)
+
+    rows = []
+    for mode in MODES:
+        started = time.perf_counter()
+        index, used = build_index(vectors, mode)
+        build_seconds = time.perf_counter() - started
+        searchers = [("", index)]
+        if used != "none":
+            searchers.append((" + rerank", RerankedIndex(index, vectors, factor or rerank_factor(used))))
+        for suffix, searcher in searchers:
+            started = time.perf_counter()
+            _, found = searcher.search(queries, k)
+            search_seconds = time.perf_counter() - started
+            rows.append({
+                "mode": used + suffix,
+                "resident_bytes": resident_bytes(index),
+                "saving": round(float32_bytes / resident_bytes(index), 1),
+                f"recall@{k}": round(recall_at_k(found, truth), 4),
+                "build_s": round(build_seconds, 3),
+                "search_ms_per_query": round(1000 * search_seconds / len(queries), 3),
+            })
+    return rows
+
+def print_table(rows, k):
+    print(f"{'mode':<16} {'resident':>12} {'saving':>8} {f'recall@{k}':>10} {'build s':>9} {'ms/query':>9}")
+    for row in rows:
+        print(
+            f"{row['mode']:<16} {row['resident_bytes'] / 1e6:>10.1f}MB {row['saving']:>7.1f}x "
+            f"{row[f'recall@{k}']:>10.4f} {row['build_s']:>9.3f} {row['search_ms_per_query']:>9.3f}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantized FAISS storage: memory saved vs. recall@k.")
+    parser.add_argument("--index", help="folder of a saved float32 index (default: synthetic corpus)")
+    parser.add_argument("--vectors", type=int, default=DEFAULT_VECTORS, help="synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    parser.add_argument("-k", type=int, default=4, help="results per query (chatpdf retrieves 4)")
+    parser.add_argument("--rerank-factor", type=int, help="candidates per result (default: per mode, as chatpdf)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    vectors = index_corpus(args.index) if args.index else synthetic_corpus(args.vectors)
+    queries = sample_queries(vectors, args.queries)
+    rows = run(vectors, queries, args.k, args.rerank_factor)
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2)
+        print()
+    else:
+        print(f"{len(vectors):,} vectors x {vectors.shape[1]} dims, {len(queries)} queries, k={args.k}")
+        print_table(rows, args.k)
+
+if __name__ == "__main__":
+    main()
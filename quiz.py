@@ -1,74 +1,7 @@
 import streamlit as st
-import os
-import google.generativeai as genai
-from PyPDF2 import PdfReader
-from dotenv import load_dotenv
-import matplotlib.pyplot as plt
-import numpy as np
-
-# Load environment variables
-load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-
-# Quiz Generation Prompt
-quiz_prompt = """Generate {num_questions} multiple-choice questions on {topic}.
-Each question should have 4 options and 1 correct answer. Format:
-
-1. Question?
-   a) Option 1
-   b) Option 2
-   c) Option 3
-   d) Option 4
-   Answer: (correct option letter)
-"""
-
-def generate_quiz(topic, num_questions):
-    # Updated to use "gemini-1.5-pro"
-    model = genai.GenerativeModel("gemini-1.5-pro")
-    response = model.generate_content(quiz_prompt.format(topic=topic, num_questions=num_questions))
-    return response.text
-
-def extract_text_from_pdf(pdf):
-    text = ""
-    pdf_reader = PdfReader(pdf)
-    for page in pdf_reader.pages:
-        if page.extract_text():
-            text += page.extract_text() + "\n"
-    return text.strip()
-
-def parse_quiz_response(response):
-    questions = []
-    current_question = None  # Start with no active question
-    
-    for line in response.split('\n'):
-        line = line.strip()
-        if not line:
-            continue
-        
-        # Check for a new question: expects a digit followed by a dot.
-        if line[0].isdigit() and '.' in line:
-            if current_question:
-                questions.append(current_question)
-            parts = line.split('. ', 1)
-            question_text = parts[1] if len(parts) > 1 else line
-            current_question = {
-                'question': question_text,
-                'options': [],
-                'answer': ''
-            }
-        # Check for an option starting with a), b), c) or d)
-        elif line.lower().startswith(('a)', 'b)', 'c)', 'd)')) and current_question is not None:
-            current_question['options'].append(line)
-        # Check for answer line; use split with maxsplit=1
-        elif line.lower().startswith('answer:') and current_question is not None:
-            answer_line = line.split(':', 1)[1].strip().lower()
-            if answer_line:
-                # Clean the answer by taking only alphabetic characters.
-                current_question['answer'] = ''.join(filter(str.isalpha, answer_line))[0]
-    if current_question:
-        questions.append(current_question)
-    
-    return questions
+from content_generation import generate_quiz
+from upload_spool import UploadRejected, pdf_text
+from response_parsing import parse_quiz_response
 
 def quiz_app():
     st.subheader("📝 Quiz Generator")
@@ -82,7 +15,11 @@ def quiz_app():
     else:
         uploaded_pdf = st.file_uploader("Upload a PDF", type=["pdf"])
         if uploaded_pdf:
-            topic = extract_text_from_pdf(uploaded_pdf)
+            # Spooled to disk and cached by file content, so reruns while answering the quiz skip parsing
+            try:
+                topic = pdf_text(uploaded_pdf)
+            except UploadRejected as e:
+                st.error(str(e))
 
     num_questions = st.number_input("Enter number of questions:", min_value=1, max_value=20, value=5)
 
@@ -169,7 +106,8 @@ def quiz_app():
             st.write(f"✅ Correct: {correct_count}/{len(results)}")
             st.write(f"❌ Incorrect: {len(results) - correct_count}/{len(results)}")
 
-            # Visualization Section
+            # Visualization Section (matplotlib is only imported once results are shown)
+            import matplotlib.pyplot as plt
             fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
             
             # Pie Chart
@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from profiling import span
+
+# -------------------- SHARED CLIENTS --------------------
+# Every tool gets its model and embedding clients from here, so a process
+# serving several tools configures the API once and reuses warm clients.
+_lock = threading.RLock()
+_configured = False
+_models = {}
+_chat_models = {}
+_embeddings = {}
+_background = None
+
+# Threads for model calls that run while the user keeps working (reviews, prefetches)
+BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS", "4"))
+
+# Set STUDY_BUDDY_FAKE_MODEL=1 to use the offline fake model (see fake_model.py)
+USE_FAKE_MODEL = os.getenv("STUDY_BUDDY_FAKE_MODEL") == "1"
+
+class TimedModel:
+    """
+    Wraps a generative model so every generate_content call is recorded as a
+    profiling span; everything else passes through to the wrapped model.
+    """
+    def __init__(self, model, name):
+        self._model = model
+        self._name = name
+
+    def generate_content(self, *args, **kwargs):
+        with span("model.generate_content", model=self._name):
+            return self._model.generate_content(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self._model, attr)
+
+def configure():
+    """
+    Loads .env and configures the Gemini API key once per process.
+    """
+    global _configured
+    with _lock:
+        if not _configured:
+            load_dotenv()
+            if not USE_FAKE_MODEL:
+                import google.generativeai as genai
+                genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+            _configured = True
+
+def generative_model(name="gemini-1.5-pro"):
+    """
+    Returns a shared genai.GenerativeModel for the given model name
+    (a FakeModel when STUDY_BUDDY_FAKE_MODEL=1).
+    """
+    with _lock:
+        if name not in _models:
+            if USE_FAKE_MODEL:
+                from fake_model import FakeModel
+                _models[name] = TimedModel(FakeModel(name), name)
+            else:
+                import google.generativeai as genai
+                configure()
+                _models[name] = TimedModel(genai.GenerativeModel(name), name)
+        return _models[name]
+
+def chat_model(name="gemini-1.5-pro", temperature=0.3):
+    """
+    Returns a shared LangChain chat model for the given name and temperature.
+    """
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    configure()
+    with _lock:
+        key = (name, temperature)
+        if key not in _chat_models:
+            _chat_models[key] = ChatGoogleGenerativeAI(model=name, temperature=temperature)
+        return _chat_models[key]
+
+def embedding_model(model="models/embedding-001"):
+    """
+    Returns a shared LangChain embeddings client.
+    """
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    configure()
+    with _lock:
+        if model not in _embeddings:
+            _embeddings[model] = GoogleGenerativeAIEmbeddings(model=model)
+        return _embeddings[model]
+
+def generate_json(prompt, model_name="gemini-1.5-pro"):
+    """
+    Asks the model for a JSON response and returns the parsed object.
+    Falls back to the outermost {...} or [...] in the text when the model
+    wraps the JSON in prose or code fences. Raises ValueError if none parses.
+    """
+    model = generative_model(model_name)
+    response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
+    text = response.text.strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    for opening, closing in (("{", "}"), ("[", "]")):
+        start, end = text.find(opening), text.rfind(closing)
+        if start != -1 and end > start:
+            try:
+                return json.loads(text[start:end + 1])
+            except json.JSONDecodeError:
+                continue
+    raise ValueError("Model response was not valid JSON.")
+
+def submit_background(fn, *args, **kwargs):
+    """
+    Runs fn on the shared background pool and returns a Future. Functions run
+    here must not call Streamlit; the script thread collects their results.
+    """
+    global _background
+    with _lock:
+        if _background is None:
+            _background = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="background")
+        return _background.submit(fn, *args, **kwargs)
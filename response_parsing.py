@@ -0,0 +1,74 @@
+import json
+from profiling import profiled
+
+# -------------------- SETUP --------------------
+# Parsers for model responses, kept free of Streamlit so the API server, the
+# batch CLI and the benchmarks can import them without loading the UI.
+
+# -------------------- QUIZ --------------------
+@profiled()
+def parse_quiz_response(response):
+    questions = []
+    current_question = None  # Start with no active question
+    
+    for line in response.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        
+        # Check for a new question: expects a digit followed by a dot.
+        if line[0].isdigit() and '.' in line:
+            if current_question:
+                questions.append(current_question)
+            parts = line.split('. ', 1)
+            question_text = parts[1] if len(parts) > 1 else line
+            current_question = {
+                'question': question_text,
+                'options': [],
+                'answer': ''
+            }
+        # Check for an option starting with a), b), c) or d)
+        elif line.lower().startswith(('a)', 'b)', 'c)', 'd)')) and current_question is not None:
+            current_question['options'].append(line)
+        # Check for answer line; use split with maxsplit=1
+        elif line.lower().startswith('answer:') and current_question is not None:
+            answer_line = line.split(':', 1)[1].strip().lower()
+            if answer_line:
+                # Clean the answer by taking only alphabetic characters.
+                current_question['answer'] = ''.join(filter(str.isalpha, answer_line))[0]
+    if current_question:
+        questions.append(current_question)
+    
+    return questions
+
+# -------------------- NOTES --------------------
+@profiled()
+def clean_ai_output(raw_output):
+    """
+    Removes Markdown code block formatting (triple backticks) from the raw AI output.
+    """
+    cleaned = raw_output.strip()
+    if cleaned.startswith("```"):
+        lines = cleaned.splitlines()
+        if lines[0].startswith("```"):
+            lines = lines[1:]
+        if lines and lines[-1].startswith("```"):
+            lines = lines[:-1]
+        cleaned = "\n".join(lines).strip()
+    return cleaned
+
+@profiled()
+def extract_json_from_text(text):
+    """
+    Fallback method: attempts to extract a JSON object from text by searching for
+    the first '{' and the last '}' and parsing that substring.
+    """
+    start = text.find("{")
+    end = text.rfind("}")
+    if start != -1 and end != -1 and end > start:
+        json_str = text[start:end+1]
+        try:
+            return json.loads(json_str)
+        except json.JSONDecodeError:
+            return None
+    return None
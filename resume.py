@@ -1,96 +1,224 @@
+import hashlib
 import os
 import re
-import spacy
 import streamlit as st
-from PyPDF2 import PdfReader
-import google.generativeai as genai
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-gemini_api_key = os.getenv("GOOGLE_API_KEY")
-
-if not gemini_api_key:
-    st.error("Gemini API key not found in .env file. Please add GEMINI_API_KEY to your .env file.")
-    st.stop()
-
-# Configure GenAI with the API key from the .env file
-genai.configure(api_key=gemini_api_key)
-
-# Ensure the spaCy model is available
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    import spacy.cli
-    spacy.cli.download("en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
-
-# Function to extract text from a PDF file-like object
-def extract_text_from_pdf_file(file_obj):
-    text = ""
-    reader = PdfReader(file_obj)
-    for page in reader.pages:
-        text += page.extract_text() + " "
-    return text.strip()
+import resume_pool
+from artifact_cache import upload_hash
+from resources import configure, embedding_model, generative_model, submit_background
+from profiling import profiled, run_in_context
+from upload_spool import UploadRejected, current_session_id, pdf_text
+
+# Resumes are embedded from at most this many characters of their text
+EMBED_MAX_CHARS = 8000
+
+summary_prompt = (
+    "Summarize the following job description for a recruiter in 3-5 short bullet points: "
+    "the role, must-have skills, nice-to-have skills and the experience required.\n\n"
+    "Job Description:\n{job_description}"
+)
+
+_nlp = None
+
+# Load the spaCy model on first use, downloading it if it is not available
+def get_nlp():
+    import spacy
+    global _nlp
+    if _nlp is None:
+        try:
+            _nlp = spacy.load("en_core_web_sm")
+        except OSError:
+            import spacy.cli
+            spacy.cli.download("en_core_web_sm")
+            _nlp = spacy.load("en_core_web_sm")
+    return _nlp
 
 # Function to clean text
+@profiled()
 def clean_text(text):
     text = re.sub(r'[^a-zA-Z0-9\s]', '', text)
     text = text.lower()
-    doc = nlp(text)
+    doc = get_nlp()(text)
     tokens = [token.lemma_ for token in doc if not token.is_stop]
     return " ".join(tokens)
 
-# Function to rank resumes using GenAI
-def rank_resumes_with_genai(job_description, uploaded_files):
-    ranked_resumes = []
-    model = genai.GenerativeModel("gemini-1.5-pro")
-    
-    for uploaded_file in uploaded_files:
-        if uploaded_file.name.endswith(".pdf"):
-            raw_text = extract_text_from_pdf_file(uploaded_file)
-            resume_text = clean_text(raw_text)
-            # Construct prompt for GenAI
-            prompt = (
-                f"Job Description:\n{job_description}\n\n"
-                f"Resume:\n{resume_text}\n\n"
-                "On a scale of 1 to 10, where 10 is a perfect match, "
-                "please rate the suitability of this resume for the job description. "
-                "Provide only the numerical rating."
-            )
-            response = model.generate_content(prompt)
-            # Try to extract the first float number from the response
-            try:
-                rating = float(response.text.strip().split()[0])
-            except Exception as e:
-                rating = 0.0  # Default to 0 if parsing fails
-            ranked_resumes.append((uploaded_file.name, rating))
-    
-    # Sort resumes descending by rating
-    ranked_resumes = sorted(ranked_resumes, key=lambda x: x[1], reverse=True)
-    return ranked_resumes
-
-# Function to summarize job description using GenAI
+# Function to embed texts in one call; unit-length vectors, or None for each
+# text if embeddings are unavailable
+def embed_texts(texts, query=False):
+    import numpy as np
+    try:
+        embeddings = embedding_model()
+        if query:
+            vectors = [embeddings.embed_query(texts[0][:EMBED_MAX_CHARS])]
+        else:
+            vectors = embeddings.embed_documents([text[:EMBED_MAX_CHARS] for text in texts])
+    except Exception:
+        return [None] * len(texts)
+    result = []
+    for vector in vectors:
+        vector = np.asarray(vector, dtype="float32")
+        norm = np.linalg.norm(vector)
+        result.append(vector / norm if norm else None)
+    return result
+
+# Function to pick whose candidate pool to use: the pool of this browser
+# session, or the pool saved under a private key the user entered
+def pool_owner(pool_key=""):
+    if pool_key.strip():
+        return "key:" + hashlib.sha256(pool_key.strip().encode("utf-8")).hexdigest()
+    return "session:" + current_session_id()
+
+# Function to add uploaded resumes to an owner's candidate pool. Only
+# resumes not seen before are parsed, cleaned and embedded; returns the
+# hashes of all uploaded resumes and the number that were new.
+@profiled()
+def add_resumes_to_pool(owner, uploaded_files):
+    pdfs = [uploaded_file for uploaded_file in uploaded_files if uploaded_file.name.endswith(".pdf")]
+    hashes = [upload_hash(uploaded_file) for uploaded_file in pdfs]
+    known = resume_pool.known_hashes(hashes)
+    new = {}
+    for uploaded_file, content_hash in zip(pdfs, hashes):
+        if content_hash not in known and content_hash not in new:
+            # Spooled to disk and parsed under the upload memory budgets
+            raw_text = pdf_text(uploaded_file, content_hash)
+            new[content_hash] = (raw_text, clean_text(raw_text))
+    embeddings = embed_texts([raw_text for raw_text, _ in new.values()]) if new else []
+    for (content_hash, (raw_text, cleaned)), embedding in zip(new.items(), embeddings):
+        resume_pool.add_resume(content_hash, raw_text, cleaned, embedding)
+    # Only once every upload is parsed, so a rejected upload leaves no member behind
+    for uploaded_file, content_hash in zip(pdfs, hashes):
+        resume_pool.add_member(owner, content_hash, uploaded_file.name)
+    return list(dict.fromkeys(hashes)), len(new)
+
+# Function to rate one resume against a job description with GenAI; returns
+# None when the response has no rating, so it is not cached
+def score_resume(job_description, resume_text):
+    model = generative_model("gemini-1.5-pro")
+    # Construct prompt for GenAI
+    prompt = (
+        f"Job Description:\n{job_description}\n\n"
+        f"Resume:\n{resume_text}\n\n"
+        "On a scale of 1 to 10, where 10 is a perfect match, "
+        "please rate the suitability of this resume for the job description. "
+        "Provide only the numerical rating."
+    )
+    response = model.generate_content(prompt)
+    # Try to extract the first float number from the response
+    # The rating should lead the response, e.g. "8" or "7.5/10"
+    match = re.match(r"\s*(\d+(?:\.\d+)?)", response.text)
+    rating = float(match.group(1)) if match else None
+    return rating if rating is not None and 0 <= rating <= 10 else None
+
+# Function to cosine-compare the job description with the pool's resume embeddings
+def job_similarities(job_key, job_description, resumes):
+    _, job_embedding = resume_pool.get_job(job_key)
+    if job_embedding is None:
+        job_embedding = embed_texts([job_description], query=True)[0]
+        if job_embedding is None:
+            return {}
+        resume_pool.save_job(job_key, embedding=job_embedding)
+    return {
+        resume["hash"]: float(resume["embedding"] @ job_embedding)
+        for resume in resumes
+        if resume["embedding"] is not None and resume["embedding"].shape == job_embedding.shape
+    }
+
+# Function to rank resumes using GenAI. Scores are cached per (resume, job
+# description), so only resumes new to this job description are scored;
+# they are scored concurrently. resume_hashes=None ranks the owner's whole
+# pool. Returns ([(name, score or None, similarity)], number scored now).
+@profiled()
+def rank_resumes_with_genai(owner, job_description, resume_hashes=None):
+    job_key = resume_pool.job_hash(job_description)
+    resumes = resume_pool.get_resumes(owner, resume_hashes)
+    scores = resume_pool.cached_scores(job_key, [resume["hash"] for resume in resumes])
+    futures = {
+        resume["hash"]: submit_background(run_in_context(score_resume), job_description, resume["cleaned"])
+        for resume in resumes
+        if resume["hash"] not in scores
+    }
+    new_scores = {}
+    for content_hash, future in futures.items():
+        try:
+            score = future.result()
+        except Exception:
+            score = None
+        # Failed calls and unparseable ratings are not cached, so the resume
+        # is scored again on the next ranking
+        if score is not None:
+            new_scores[content_hash] = score
+    resume_pool.save_scores(job_key, new_scores)
+    scores.update(new_scores)
+
+    similarities = job_similarities(job_key, job_description, resumes)
+    ranked_resumes = [
+        (resume["name"], scores.get(resume["hash"]), similarities.get(resume["hash"]))
+        for resume in resumes
+    ]
+    # Sort resumes descending by rating, then by embedding similarity
+    ranked_resumes.sort(key=lambda x: (x[1] if x[1] is not None else -1.0, x[2] or 0.0), reverse=True)
+    return ranked_resumes, len(new_scores)
+
+# Function to summarize job description using GenAI; cached per job description
+@profiled()
 def summarize_job_description(job_description):
-    model = genai.GenerativeModel("gemini-1.5-pro")
-    response = model.generate_content(job_description)
-    return response.text if hasattr(response, "text") else "No summary available."
+    job_key = resume_pool.job_hash(job_description)
+    summary, _ = resume_pool.get_job(job_key)
+    if summary:
+        return summary
+    model = generative_model("gemini-1.5-pro")
+    response = model.generate_content(summary_prompt.format(job_description=job_description))
+    if not hasattr(response, "text"):
+        return "No summary available."
+    resume_pool.save_job(job_key, summary=response.text)
+    return response.text
 
 # Streamlit UI
-st.title("AI-powered Resume Screening and Ranking System")
-
-job_desc = st.text_area("Enter Job Description")
-uploaded_files = st.file_uploader("Upload Resume PDFs", type=["pdf"], accept_multiple_files=True)
-
-if st.button("Rank Resumes"):
-    if job_desc and uploaded_files:
-        summary = summarize_job_description(job_desc)
-        st.subheader("Job Description Summary:")
-        st.write(summary)
-        
-        results = rank_resumes_with_genai(job_desc, uploaded_files)
-        st.subheader("Ranked Resumes:")
-        for rank, (filename, score) in enumerate(results, 1):
-            st.write(f"{rank}. {filename} - Score: {score:.2f}")
-    else:
-        st.error("Please enter a valid job description and upload at least one resume PDF.")
+def resume_screening_app():
+    st.title("AI-powered Resume Screening and Ranking System")
+
+    configure()
+    if not os.getenv("GOOGLE_API_KEY"):
+        st.error("Gemini API key not found in .env file. Please add GOOGLE_API_KEY to your .env file.")
+        st.stop()
+
+    job_desc = st.text_area("Enter Job Description")
+    uploaded_files = st.file_uploader("Upload Resume PDFs", type=["pdf"], accept_multiple_files=True)
+    pool_key = st.text_input(
+        "Pool key (optional)", type="password",
+        help="Resumes are kept in a private pool for this session. Enter a key of your own to reopen the same pool later.",
+    )
+    owner = pool_owner(pool_key)
+    pool_size = resume_pool.pool_size(owner)
+    rank_pool = st.checkbox(f"Also rank resumes saved earlier in this pool ({pool_size})", value=False)
+
+    if st.button("Rank Resumes"):
+        if job_desc and (uploaded_files or (rank_pool and pool_size)):
+            # The summary is generated while the resumes are parsed and scored
+            summary = submit_background(run_in_context(summarize_job_description), job_desc)
+            try:
+                hashes, added = add_resumes_to_pool(owner, uploaded_files or [])
+            except UploadRejected as e:
+                st.error(str(e))
+                st.stop()
+            results, scored = rank_resumes_with_genai(owner, job_desc, None if rank_pool else hashes)
+
+            st.subheader("Job Description Summary:")
+            st.write(summary.result())
+            st.subheader("Ranked Resumes:")
+            st.caption(
+                f"{added} new resume(s) parsed; {scored} scored now, "
+                f"{sum(score is not None for _, score, _ in results) - scored} reused from earlier rankings."
+            )
+            for rank, (filename, score, similarity) in enumerate(results, 1):
+                rating = f"{score:.2f}" if score is not None else "n/a (rating failed, retried next time)"
+                match = f" (similarity {similarity:.2f})" if similarity is not None else ""
+                st.write(f"{rank}. {filename} - Score: {rating}{match}")
+        else:
+            st.error("Please enter a valid job description and upload at least one resume PDF.")
+
+    if pool_size and st.button("Clear this candidate pool"):
+        resume_pool.clear_pool(owner)
+        st.rerun()
+
+if __name__ == "__main__":
+    resume_screening_app()
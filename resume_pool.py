@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from storage import cache_dir
+
+# -------------------- SETUP --------------------
+# Persistent candidate pools for resume screening. Each resume is parsed,
+# cleaned and embedded once, keyed by the hash of its file content; scores
+# are cached per (resume, job description) pair, so re-ranking a pool only
+# scores the resumes that are new for the current job description, and
+# editing the job description reuses every parsed resume.
+#
+# Pools are private: a pool is the set of resumes added under one owner key
+# (a session, or a pool key the user chose), and listing, ranking and
+# clearing only ever see that owner's members. Parsed data is shared by
+# content hash only, which a caller can only know by having the file.
+_DB_PATH = os.path.join(cache_dir("resumes"), "resume_pool.sqlite3")
+
+@contextmanager
+def _connect():
+    conn = sqlite3.connect(_DB_PATH, timeout=30)
+    try:
+        _init(conn)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+def _init(conn):
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS resumes ("
+        "hash TEXT PRIMARY KEY, text TEXT, cleaned TEXT, features TEXT, embedding BLOB, added_at REAL)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS pool_members ("
+        "owner TEXT, hash TEXT, name TEXT, added_at REAL, PRIMARY KEY (owner, hash))"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS scores ("
+        "resume_hash TEXT, job_hash TEXT, score REAL, created_at REAL, PRIMARY KEY (resume_hash, job_hash))"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        "hash TEXT PRIMARY KEY, summary TEXT, embedding BLOB, created_at REAL)"
+    )
+
+def job_hash(job_description):
+    """
+    Key of a job description; whitespace and case changes keep the same key.
+    """
+    normalized = " ".join(job_description.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def _blob(embedding):
+    return embedding.astype("float32").tobytes() if embedding is not None else None
+
+def _vector(blob):
+    import numpy as np
+    return np.frombuffer(blob, dtype="float32") if blob else None
+
+# -------------------- FEATURES --------------------
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_YEARS = re.compile(r"(\d{1,2})\+?\s*(?:years?|yrs?)", re.IGNORECASE)
+
+def extract_features(text, cleaned):
+    """
+    Cheap local features kept with each resume.
+    """
+    years = [int(match) for match in _YEARS.findall(text)]
+    return {
+        "words": len(cleaned.split()),
+        "has_email": bool(_EMAIL.search(text)),
+        "max_years_mentioned": max(years) if years else None,
+    }
+
+# -------------------- RESUMES --------------------
+def known_hashes(hashes):
+    hashes = list(hashes)
+    if not hashes:
+        return set()
+    with _connect() as conn:
+        rows = conn.execute(
+            f"SELECT hash FROM resumes WHERE hash IN ({','.join('?' * len(hashes))})", hashes
+        ).fetchall()
+    return {row[0] for row in rows}
+
+def add_resume(content_hash, text, cleaned, embedding=None):
+    """
+    Stores the parsed form of a resume; see add_member for pool membership.
+    """
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO resumes (hash, text, cleaned, features, embedding, added_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (content_hash, text, cleaned, json.dumps(extract_features(text, cleaned)), _blob(embedding), time.time()),
+        )
+
+def add_member(owner, content_hash, name):
+    """
+    Adds a parsed resume to an owner's pool (or renames it if already there).
+    """
+    with _connect() as conn:
+        conn.execute(
+            "INSERT INTO pool_members (owner, hash, name, added_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(owner, hash) DO UPDATE SET name = excluded.name",
+            (owner, content_hash, name, time.time()),
+        )
+
+def get_resumes(owner, hashes=None):
+    """
+    Resumes in an owner's pool (all of them, or the given hashes), oldest
+    first, as dicts with hash, name, cleaned, features and embedding.
+    """
+    query = (
+        "SELECT m.hash, m.name, r.cleaned, r.features, r.embedding "
+        "FROM pool_members m JOIN resumes r ON r.hash = m.hash WHERE m.owner = ?"
+    )
+    params = (owner,)
+    if hashes is not None:
+        hashes = tuple(hashes)
+        if not hashes:
+            return []
+        query += f" AND m.hash IN ({','.join('?' * len(hashes))})"
+        params += hashes
+    with _connect() as conn:
+        rows = conn.execute(query + " ORDER BY m.added_at", params).fetchall()
+    return [
+        {"hash": row[0], "name": row[1], "cleaned": row[2], "features": json.loads(row[3]), "embedding": _vector(row[4])}
+        for row in rows
+    ]
+
+def pool_size(owner):
+    with _connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM pool_members WHERE owner = ?", (owner,)).fetchone()[0]
+
+def clear_pool(owner):
+    """
+    Empties an owner's pool; parsed resumes and scores no pool refers to any
+    more are deleted too.
+    """
+    with _connect() as conn:
+        conn.execute("DELETE FROM pool_members WHERE owner = ?", (owner,))
+        conn.execute("DELETE FROM resumes WHERE hash NOT IN (SELECT hash FROM pool_members)")
+        conn.execute("DELETE FROM scores WHERE resume_hash NOT IN (SELECT hash FROM pool_members)")
+
+# -------------------- SCORES --------------------
+def cached_scores(job_key, hashes):
+    """
+    {resume hash: score} for the resumes already scored against a job description.
+    """
+    hashes = list(hashes)
+    if not hashes:
+        return {}
+    with _connect() as conn:
+        rows = conn.execute(
+            f"SELECT resume_hash, score FROM scores WHERE job_hash = ? AND resume_hash IN ({','.join('?' * len(hashes))})",
+            [job_key] + hashes,
+        ).fetchall()
+    return dict(rows)
+
+def save_scores(job_key, scores):
+    now = time.time()
+    with _connect() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO scores (resume_hash, job_hash, score, created_at) VALUES (?, ?, ?, ?)",
+            [(resume_hash, job_key, score, now) for resume_hash, score in scores.items()],
+        )
+
+# -------------------- JOB DESCRIPTIONS --------------------
+def get_job(job_key):
+    """
+    (summary, embedding) stored for a job description; either may be None.
+    """
+    with _connect() as conn:
+        row = conn.execute("SELECT summary, embedding FROM jobs WHERE hash = ?", (job_key,)).fetchone()
+    return (row[0], _vector(row[1])) if row else (None, None)
+
+def save_job(job_key, summary=None, embedding=None):
+    """
+    Stores a job description's summary and/or embedding, keeping whichever is already set.
+    """
+    with _connect() as conn:
+        conn.execute(
+            "INSERT INTO jobs (hash, summary, embedding, created_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(hash) DO UPDATE SET summary = COALESCE(excluded.summary, summary), "
+            "embedding = COALESCE(excluded.embedding, embedding)",
+            (job_key, summary, _blob(embedding), time.time()),
+        )
@@ -0,0 +1,188 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from storage import cache_dir
+
+# -------------------- SETUP --------------------
+# Content that is the same for every user (e.g. the dashboard sections) is
+# regenerated by a background thread on a fixed interval and stored as
+# versioned snapshots. Pages read the latest snapshot and never wait on the
+# model; while a refresh runs, the previous snapshot keeps being served.
+# A lease row per section makes sure only one thread in one process (among
+# all processes sharing the cache directory) refreshes a section at a time.
+SNAPSHOT_HISTORY = int(os.getenv("SNAPSHOT_HISTORY", "10"))
+SCHEDULER_TICK = 30  # seconds between checks for due sections
+FAILURE_BACKOFF = 300  # seconds before retrying a section whose refresh failed
+# Forced ("Refresh now") refreshes of a section run at most once per interval,
+# and not at all while the latest snapshot is younger than it, however many
+# users press the button.
+FORCE_REFRESH_INTERVAL = int(os.getenv("SNAPSHOT_FORCE_INTERVAL", "300"))
+
+_DB_PATH = os.path.join(cache_dir("snapshots"), "snapshots.sqlite3")
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+_jobs = {}  # section -> (generate, interval_seconds)
+_refreshing = set()
+_failed_at = {}
+_forced_at = {}
+_lock = threading.Lock()
+_wake = threading.Event()
+_thread = None
+
+@contextmanager
+def _connect():
+    conn = sqlite3.connect(_DB_PATH, timeout=30)
+    try:
+        _init(conn)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+def _init(conn):
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS snapshots ("
+        "section TEXT, version INTEGER, content TEXT, created_at REAL, "
+        "PRIMARY KEY (section, version))"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS leases ("
+        "section TEXT PRIMARY KEY, owner TEXT, expires_at REAL)"
+    )
+
+# -------------------- SNAPSHOTS --------------------
+def latest_snapshot(section):
+    """
+    Returns the newest snapshot of a section as {"version", "content",
+    "created_at"}, or None if none has been generated yet.
+    """
+    snapshots = snapshot_history(section, limit=1)
+    return snapshots[0] if snapshots else None
+
+def snapshot_history(section, limit=SNAPSHOT_HISTORY):
+    """
+    Returns up to `limit` snapshots of a section, newest first.
+    """
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT version, content, created_at FROM snapshots WHERE section = ? "
+            "ORDER BY version DESC LIMIT ?",
+            (section, limit),
+        ).fetchall()
+    return [{"version": v, "content": c, "created_at": t} for v, c, t in rows]
+
+def save_snapshot(section, content):
+    """
+    Stores a new version of a section and prunes versions beyond SNAPSHOT_HISTORY.
+    """
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        (version,) = conn.execute(
+            "SELECT COALESCE(MAX(version), 0) + 1 FROM snapshots WHERE section = ?", (section,)
+        ).fetchone()
+        conn.execute("INSERT INTO snapshots VALUES (?, ?, ?, ?)", (section, version, content, time.time()))
+        conn.execute(
+            "DELETE FROM snapshots WHERE section = ? AND version <= ?", (section, version - SNAPSHOT_HISTORY)
+        )
+    return version
+
+def is_stale(section, snapshot=None):
+    snapshot = snapshot or latest_snapshot(section)
+    _, interval = _jobs[section]
+    return snapshot is None or time.time() - snapshot["created_at"] >= interval
+
+# -------------------- REFRESHING --------------------
+def _acquire_lease(section, duration):
+    now = time.time()
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT owner, expires_at FROM leases WHERE section = ?", (section,)).fetchone()
+        if row and row[0] != _OWNER and row[1] > now:
+            return False
+        conn.execute("INSERT OR REPLACE INTO leases VALUES (?, ?, ?)", (section, _OWNER, now + duration))
+    return True
+
+def _release_lease(section):
+    with _connect() as conn:
+        conn.execute("DELETE FROM leases WHERE section = ? AND owner = ?", (section, _OWNER))
+
+def _refresh(section, force=False):
+    generate, interval = _jobs[section]
+    try:
+        # The lease outlives a hung model call so other processes don't pile on
+        if not _acquire_lease(section, duration=min(interval, 600)):
+            return
+        try:
+            # Another process may have refreshed it while we waited for the lease
+            snapshot = latest_snapshot(section)
+            recent = snapshot is not None and time.time() - snapshot["created_at"] < FORCE_REFRESH_INTERVAL
+            if (force and not recent) or is_stale(section, snapshot):
+                save_snapshot(section, generate())
+        finally:
+            _release_lease(section)
+    except Exception as e:
+        _failed_at[section] = time.time()
+        print(f"Snapshot refresh of {section!r} failed: {e}")
+    finally:
+        with _lock:
+            _refreshing.discard(section)
+
+def request_refresh(section, force=False):
+    """
+    Starts a background refresh of a section unless one is already running,
+    its last refresh failed less than FAILURE_BACKOFF ago, or (when forced)
+    it was forced less than FORCE_REFRESH_INTERVAL ago. Returns immediately,
+    with True if a refresh was started.
+    """
+    now = time.time()
+    with _lock:
+        if section in _refreshing or now - _failed_at.get(section, 0) < FAILURE_BACKOFF:
+            return False
+        if force:
+            if now - _forced_at.get(section, 0) < FORCE_REFRESH_INTERVAL:
+                return False
+            _forced_at[section] = now
+        _refreshing.add(section)
+    threading.Thread(target=_refresh, args=(section, force), daemon=True, name=f"snapshot-{section}").start()
+    return True
+
+def is_refreshing(section):
+    with _lock:
+        return section in _refreshing
+
+def failed_recently(section):
+    return time.time() - _failed_at.get(section, 0) < FAILURE_BACKOFF
+
+def _run():
+    while True:
+        for section in list(_jobs):
+            if failed_recently(section):
+                continue
+            try:
+                if not is_refreshing(section) and is_stale(section):
+                    request_refresh(section)
+            except sqlite3.Error as e:
+                print(f"Snapshot scheduler could not check {section!r}: {e}")
+        _wake.wait(SCHEDULER_TICK)
+        _wake.clear()
+
+# -------------------- SCHEDULING --------------------
+def schedule(section, generate, interval_seconds):
+    """
+    Registers a section to be regenerated every `interval_seconds` with
+    generate() (which returns the content or raises) and makes sure the
+    scheduler thread is running. Safe to call on every page load.
+    """
+    global _thread
+    with _lock:
+        new_section = section not in _jobs
+        _jobs[section] = (generate, interval_seconds)
+        if _thread is None:
+            _thread = threading.Thread(target=_run, daemon=True, name="snapshot-scheduler")
+            _thread.start()
+        elif new_section:
+            _wake.set()
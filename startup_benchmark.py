@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# -------------------- SETUP --------------------
+# Measures the cold-start import cost of every Streamlit entry point in a
+# fresh interpreter, with a per-module breakdown from `python -X importtime`.
+# Streamlit itself is included, since a fresh container pays for it too.
+#
+#   python startup_benchmark.py                   # report
+#   python startup_benchmark.py --save-baseline   # record benchmarks/startup_baseline.json
+#   python startup_benchmark.py --check           # exit 1 on a cold-start regression
+#
+# Cold-start times depend on the machine and the installed packages, so no
+# baseline is committed: record one with --save-baseline where --check runs.
+# Without one, --check reports the timings and skips the comparison.
+ENTRY_POINTS = [
+    "streamlit_app", "app", "chatpdf", "pathGenerator", "quiz", "summerizer",
+    "interview", "notes", "falshcard", "game", "resume", "dashboard",
+]
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(REPO_DIR, "benchmarks", "startup_baseline.json")
+DEFAULT_TOLERANCE = 0.25  # allowed slowdown relative to the baseline
+
+_PROBE = (
+    "import time\n"
+    "started = time.perf_counter()\n"
+    "import {module}\n"
+    "print(time.perf_counter() - started)\n"
+)
+
+# -------------------- MEASUREMENT --------------------
+def parse_importtime(stderr, module):
+    """
+    Parses `-X importtime` output into a list of (name, cumulative seconds) for
+    the modules imported directly by `module`, most expensive first.
+    """
+    direct = []
+    pending = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative_us, field = line[len("import time:"):].split("|")
+        depth = (len(field) - len(field.lstrip()) - 1) // 2
+        name = field.strip()
+        if depth == 1:
+            pending.append((name, int(cumulative_us) / 1e6))
+        elif depth == 0:
+            if name == module:
+                direct = pending
+            pending = []
+    return sorted(direct, key=lambda item: item[1], reverse=True)
+
+def measure(module, repeat=3):
+    """
+    Imports a module in `repeat` fresh interpreters and returns
+    (median seconds, per-module breakdown from the first run).
+    """
+    timings = []
+    breakdown = []
+    for run in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module)],
+            cwd=REPO_DIR, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr.splitlines()[-1]}")
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+        if run == 0:
+            breakdown = parse_importtime(result.stderr, module)
+    return statistics.median(timings), breakdown
+
+# -------------------- REPORT --------------------
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import benchmark for the Streamlit entry points.")
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="modules to list per entry point")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="fail if slower than baseline * (1 + tolerance)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--max-seconds", type=float, help="fail if any entry point is slower than this")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    elif args.check and not args.save_baseline:
+        print(f"No baseline at {BASELINE_PATH}; skipping the regression check (record one with --save-baseline).")
+
+    results = {}
+    failures = []
+    for module in args.modules:
+        try:
+            seconds, breakdown = measure(module, args.repeat)
+        except RuntimeError as e:
+            print(e)
+            failures.append(module)
+            continue
+        results[module] = round(seconds, 4)
+
+        line = f"{module:<16} {seconds * 1000:8.1f} ms"
+        if module in baseline:
+            line += f"  (baseline {baseline[module] * 1000:.1f} ms, {seconds / baseline[module] - 1:+.0%})"
+        print(line)
+        for name, cumulative in breakdown[:args.top]:
+            print(f"    {name:<40} {cumulative * 1000:8.1f} ms")
+
+        if args.check and baseline and module not in baseline and not args.save_baseline:
+            print(f"    no baseline for {module}; not checked")
+        elif args.check and module in baseline and seconds > baseline[module] * (1 + args.tolerance):
+            failures.append(module)
+        if args.max_seconds is not None and seconds > args.max_seconds:
+            failures.append(module)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({**baseline, **results}, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {BASELINE_PATH}")
+
+    if failures:
+        print("Cold-start regression in: " + ", ".join(sorted(set(failures))))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
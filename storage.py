@@ -0,0 +1,14 @@
+import os
+
+# -------------------- CACHE LOCATION --------------------
+# Every on-disk cache lives under one directory so deployments can point it
+# at a persistent volume with STUDY_BUDDY_CACHE_DIR.
+CACHE_DIR = os.getenv("STUDY_BUDDY_CACHE_DIR", os.path.join(os.getcwd(), ".study_buddy_cache"))
+
+def cache_dir(*parts):
+    """
+    Returns the path of a directory inside the cache, creating it if needed.
+    """
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
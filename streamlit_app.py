@@ -0,0 +1,54 @@
+import importlib
+import streamlit as st
+import resources
+from profiling import timing_panel, trace_request
+
+# -------------------- SINGLE ENTRY POINT --------------------
+# All tools run in one Streamlit process: `streamlit run streamlit_app.py`.
+# Shared clients and caches (resources, artifact_cache, pdf_renderer, ...)
+# are created once per process, and each tool's module is only imported the
+# first time someone opens it; after that it stays warm in sys.modules.
+TOOLS = {
+    "chatpdf": ("📄 Chat with PDF", "chatpdf", "chatpdf_app"),
+    "path": ("🛣️ Learning Path", "pathGenerator", "learning_path_generator_app"),
+    "quiz": ("❓ Quiz Generator", "quiz", "quiz_app"),
+    "summarizer": ("🎥 YouTube Summarizer", "summerizer", "main"),
+    "interview": ("💬 Interview Prep", "interview", "interview_prep_app"),
+    "notes": ("📝 Notes Generator", "notes", "ai_notes_generator_app"),
+    "flashcards": ("🔖 Flashcard Generator", "falshcard", "flashcard_generator_app"),
+    "game": ("📚 Study Quest", "game", "library_game"),
+    "resume": ("🧾 Resume Screening", "resume", "resume_screening_app"),
+    "dashboard": ("📊 AI & Tech Dashboard", "dashboard", "dashboard_app"),
+}
+
+def load_tool(key):
+    """
+    Imports a tool's module on first use and returns its entry function.
+    """
+    _, module_name, entry = TOOLS[key]
+    return getattr(importlib.import_module(module_name), entry)
+
+def main():
+    st.set_page_config(page_title="AI Study Buddy", layout="wide")
+    resources.configure()
+
+    # ?tool=<key> selects a tool directly, so landing-page links can deep-link
+    keys = list(TOOLS)
+    requested = st.query_params.get("tool")
+    default_index = keys.index(requested) if requested in TOOLS else 0
+
+    st.sidebar.title("AI Study Buddy")
+    key = st.sidebar.radio(
+        "Choose a tool", keys, index=default_index, format_func=lambda k: TOOLS[k][0]
+    )
+    st.query_params["tool"] = key
+    show_timings = st.sidebar.checkbox("Show stage timings")
+
+    # Each rerun is one request; its stages are timed as nested spans
+    with trace_request(key) as trace:
+        load_tool(key)()
+    if show_timings:
+        timing_panel(trace)
+
+if __name__ == "__main__":
+    main()
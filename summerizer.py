@@ -1,68 +1,88 @@
 import streamlit as st
-import re
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
-import google.generativeai as genai
-from dotenv import load_dotenv
-from fpdf import FPDF
+from map_reduce_summary import summarize_segments
+from profiling import profiled
+from transcript_store import extract_video_id, get_transcript, segments_to_text
 import os
+import tempfile
+import time
 
-# Load environment variables and configure the API key for Google Generative AI
-load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-
-# Function to extract YouTube video ID from URL
-def extract_video_id(url):
-    regex = r"(?:v=|\/|youtu\.be\/|embed\/|shorts\/)([0-9A-Za-z_-]{11})"
-    match = re.search(regex, url)
-    return match.group(1) if match else None
-
-# Function to fetch transcript using youtube_transcript_api
+# Function to fetch transcript segments (text with timestamps) through the shared transcript store
+@profiled()
 def fetch_transcript(youtube_url):
     video_id = extract_video_id(youtube_url)
     if not video_id:
         return None, "Invalid YouTube URL."
-    try:
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-        for transcript in transcript_list:
-            if transcript.language_code in ["en", "hi"]:
-                return " ".join([entry["text"] for entry in transcript.fetch()]), None
-        return None, "No transcript available in English or Hindi."
-    except TranscriptsDisabled:
-        return None, "Transcripts are disabled for this video."
-    except NoTranscriptFound:
-        return None, "No transcript found for this video."
-    except Exception as e:
-        return None, f"Error fetching transcript: {str(e)}"
+    segments, language, error = get_transcript(video_id, languages=("en", "hi"))
+    if error:
+        return None, error
+    return segments, None
 
-# Function to generate key point summary using Google Generative AI
-def generate_summary(transcript):
-    MAX_LENGTH = 3000  # Truncate transcript to limit token usage
-    if len(transcript) > MAX_LENGTH:
-        transcript = transcript[:MAX_LENGTH] + "..."
-    prompt = f"Summarize the following YouTube video transcript into concise key bullet points in English:\n\n{transcript}"
-    model = genai.GenerativeModel("gemini-1.5-pro")
+# Function to generate key point summary using Google Generative AI.
+# The whole transcript is covered: long videos are summarized in timestamped
+# parts concurrently and the part summaries are merged (see map_reduce_summary).
+@profiled()
+def generate_summary(segments):
     try:
-        response = model.generate_content(prompt)
+        summary = summarize_segments(segments, model_name="gemini-1.5-pro")
         # Debug info: If no text is returned, show a message to help with troubleshooting.
-        if not response.text:
+        if not summary:
             st.error("Debug Info: Model response was empty. Check your API key, model configuration, or try shortening the transcript.")
             return None, "No summary generated. Please check your API key or model configuration."
-        return response.text, None
+        return summary, None
     except Exception as e:
         return None, f"Error generating summary: {str(e)}"
 
 # Function to generate a PDF from the summary text
+@profiled()
 def generate_pdf(summary):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, "YouTube Video Key Points", ln=True, align="C")
-    pdf.ln(10)
-    pdf.set_font("Arial", "", 12)
-    pdf.multi_cell(0, 10, summary)
-    pdf_file = "youtube_summary.pdf"
-    pdf.output(pdf_file)
-    return pdf_file
+    from pdf_renderer import render_pdf
+    return render_pdf([("title", "YouTube Video Key Points"), ("space", 10), ("text", summary)])
+
+# Function to transcribe an uploaded lecture locally with Whisper, streaming
+# partial transcripts into the page as chunks finish
+@profiled()
+def transcribe_upload(media_file):
+    from whisper_transcriber import (
+        WHISPER_MODEL, WHISPER_WORKERS, iter_completed, merge_chunks, realtime_stats, submit_transcription,
+    )
+    suffix = os.path.splitext(media_file.name)[1]
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(media_file.getbuffer())
+        tmp_path = tmp.name
+    try:
+        started = time.perf_counter()
+        futures, audio_seconds = submit_transcription(tmp_path)
+        progress = st.progress(0.0)
+        preview = st.empty()
+        chunks = {}
+        for index, count, segments in iter_completed(futures):
+            chunks[index] = segments
+            progress.progress(len(chunks) / count)
+            preview.text(segments_to_text(merge_chunks(chunks)))
+        stats = realtime_stats(WHISPER_MODEL, WHISPER_WORKERS, len(chunks), audio_seconds,
+                               time.perf_counter() - started)
+    finally:
+        os.remove(tmp_path)
+    st.caption(
+        f"Transcribed {stats['audio_seconds']}s of audio in {stats['wall_seconds']}s "
+        f"on {stats['workers']} workers (real-time factor {stats['real_time_factor']})."
+    )
+    return merge_chunks(chunks)
+
+# Local transcription fallback for videos without captions
+def local_transcription_section():
+    with st.expander("No captions? Transcribe the lecture audio or video locally"):
+        media_file = st.file_uploader("Upload an audio or video file", type=["mp3", "wav", "m4a", "mp4", "webm", "mkv"])
+        if media_file and st.button("Transcribe and Summarize"):
+            segments = transcribe_upload(media_file)
+            with st.spinner("Generating summary key points..."):
+                summary, error = generate_summary(segments)
+            if error:
+                st.error(error)
+                return
+            st.subheader("Key Points:")
+            st.write(summary)
+            st.session_state["summary"] = summary
 
 # Main Streamlit UI
 def main():
@@ -77,22 +97,25 @@ def main():
         else:
             st.error("Invalid YouTube URL.")
 
+    local_transcription_section()
+
     if st.button("Summarize Video"):
         if not youtube_url:
             st.error("Please enter a YouTube video URL.")
             return
 
         with st.spinner("Fetching transcript..."):
-            transcript, error = fetch_transcript(youtube_url)
+            segments, error = fetch_transcript(youtube_url)
         if error:
             st.error(error)
             return
 
         st.success("Transcript fetched successfully.")
+        transcript = segments_to_text(segments)
         st.text_area("Transcript (truncated):", transcript[:500] + "..." if len(transcript) > 500 else transcript, height=150)
 
         with st.spinner("Generating summary key points..."):
-            summary, error = generate_summary(transcript)
+            summary, error = generate_summary(segments)
         if error:
             st.error(error)
             return
@@ -102,9 +125,8 @@ def main():
         st.session_state["summary"] = summary
 
     if st.button("Download Summary as PDF") and "summary" in st.session_state:
-        pdf_file = generate_pdf(st.session_state["summary"])
-        with open(pdf_file, "rb") as f:
-            st.download_button("Download PDF", f, file_name="youtube_summary.pdf")
+        pdf_bytes = generate_pdf(st.session_state["summary"])
+        st.download_button("Download PDF", pdf_bytes, file_name="youtube_summary.pdf")
 
 if __name__ == "__main__":
     main()
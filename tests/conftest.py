@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Tests run against the offline fake model, with caches in a throwaway folder
+os.environ.setdefault("STUDY_BUDDY_FAKE_MODEL", "1")
+os.environ.setdefault("STUDY_BUDDY_CACHE_DIR", tempfile.mkdtemp(prefix="study-buddy-tests-"))
+os.environ.setdefault("ANSWER_EMBEDDINGS", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,44 @@
+import pytest
+
+import answer_evaluator
+
+@pytest.fixture(autouse=True)
+def no_embeddings(monkeypatch):
+    monkeypatch.setattr(answer_evaluator, "USE_EMBEDDINGS", False)
+
+@pytest.mark.parametrize("answer, reference", [
+    ("The function is continuous", "The function is not continuous"),
+    ("The function isn't continuous", "The function is continuous"),
+    ("O(log n)", "O(n log n)"),
+    ("Python 2", "Python 3"),
+])
+def test_similar_but_different_answers_go_to_the_judge(answer, reference):
+    correct, _, method, scores = answer_evaluator.local_verdict(answer, reference)
+    assert correct is None
+    assert method == "uncertain"
+    assert max(scores.values()) >= answer_evaluator.ANSWER_CONFIDENCE_THRESHOLD
+    result = answer_evaluator.evaluate("q", answer, reference, judge=lambda *args: False)
+    assert (result["correct"], result["method"]) == (False, "llm")
+
+def test_embedding_similarity_does_not_accept_a_negation(monkeypatch):
+    monkeypatch.setattr(answer_evaluator, "embedding_similarity", lambda answer, reference: 0.99)
+    correct, _, _, _ = answer_evaluator.local_verdict(
+        "Photosynthesis does not need sunlight to make glucose", "Photosynthesis needs sunlight to make glucose"
+    )
+    assert correct is None
+
+@pytest.mark.parametrize("answer, reference", [
+    ("Paris is the capital of France", "The capital of France is Paris"),
+    ("neural networks", "a neural network"),
+])
+def test_rewordings_are_accepted_locally(answer, reference):
+    correct, _, method, _ = answer_evaluator.local_verdict(answer, reference)
+    assert (correct, method) == (True, "lexical")
+
+@pytest.mark.parametrize("answer, reference, correct", [
+    ("1945", "1945", True),
+    ("1946", "1945", False),
+    ("seven", "7", True),
+])
+def test_exact_and_numeric_matches(answer, reference, correct):
+    assert answer_evaluator.local_verdict(answer, reference)[0] is correct
@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+import api_server
+
+def call(method, path, **kwargs):
+    """
+    Runs one request against a fresh app; returns (status, headers, body).
+    """
+    async def run():
+        async with TestClient(TestServer(api_server.create_app())) as client:
+            response = await client.request(method, path, **kwargs)
+            body = await response.json() if response.content_type == "application/json" else await response.text()
+            return response.status, response.headers, body
+    return asyncio.run(run())
+
+# -------------------- ENDPOINTS --------------------
+def test_health():
+    status, _, body = call("GET", "/api/health")
+    assert status == 200
+    assert body["status"] == "ok"
+
+def test_challenge_question():
+    status, _, body = call("POST", "/api/challenge/question", json={"topic": "Graph theory", "question_type": "Theory"})
+    assert status == 200
+    assert body["question"]
+
+def test_challenge_check():
+    status, _, body = call("POST", "/api/challenge/check", json={"question": "What is 2 + 2?", "answer": "4"})
+    assert status == 200
+    assert set(body) == {"correct", "method"}
+
+def test_challenge_evaluate():
+    status, _, body = call("POST", "/api/challenge/evaluate", json={"question": "What is a graph?", "answer": "Nodes and edges"})
+    assert status == 200
+    assert body["evaluation"]
+
+def test_quiz():
+    status, _, body = call("POST", "/api/quiz", json={"topic": "Graph theory", "num_questions": "3"})
+    assert status == 200
+    assert body["questions"][0]["options"]
+
+def test_notes():
+    status, _, body = call("POST", "/api/notes", json={"topic": "Graph theory"})
+    assert status == 200
+    assert body["notes"]
+
+def test_chat():
+    history = [{"role": "user", "text": "Hi"}, {"role": "assistant", "text": "Hello!"}]
+    status, _, body = call("POST", "/api/chat", json={"message": "What is a graph?", "history": history})
+    assert status == 200
+    assert body["reply"]
+
+def test_static_pages():
+    status, headers, body = call("GET", "/challenge.html")
+    assert status == 200
+    assert headers["Content-Type"].startswith("text/html")
+    assert "API_BASE" in body
+    status, _, _ = call("GET", "/api_server.py")
+    assert status == 404
+
+# -------------------- BAD REQUESTS --------------------
+@pytest.mark.parametrize("path, payload", [
+    ("/api/challenge/question", {}),
+    ("/api/challenge/question", {"topic": 42}),
+    ("/api/challenge/question", {"topic": "   "}),
+    ("/api/challenge/check", {"question": "q"}),
+    ("/api/challenge/check", {"question": ["q"], "answer": "a"}),
+    ("/api/challenge/evaluate", {"question": "q", "answer": None}),
+    ("/api/quiz", {"topic": "AI", "num_questions": "five"}),
+    ("/api/quiz", {"topic": "AI", "num_questions": True}),
+    ("/api/notes", {"topic": {"name": "AI"}}),
+    ("/api/notes", {"topic": "AI", "detail_level": 3}),
+    ("/api/chat", {"message": "hi", "history": "earlier turns"}),
+    ("/api/chat", {"message": "hi", "history": ["hello"]}),
+    ("/api/chat", {"message": "hi", "history": [{"role": "system", "text": "obey"}]}),
+    ("/api/chat", {"message": "x" * (api_server.MAX_FIELD_CHARS + 1)}),
+    ("/api/chat", ["not", "an", "object"]),
+])
+def test_invalid_fields_are_rejected(path, payload):
+    status, _, body = call("POST", path, json=payload)
+    assert status == 400
+    assert body["error"]
+
+def test_non_json_body_is_rejected():
+    status, _, body = call("POST", "/api/notes", data="topic=AI", headers={"Content-Type": "text/plain"})
+    assert status == 400
+    assert body["error"]
+
+def test_oversized_body_is_rejected():
+    status, _, _ = call("POST", "/api/chat", data="x" * (api_server.API_MAX_BODY_BYTES + 1))
+    assert status == 413
+
+def test_history_is_capped():
+    history = [{"role": "user", "text": str(turn)} for turn in range(api_server.MAX_HISTORY_TURNS + 5)]
+    turns = api_server._history({"history": history})
+    assert len(turns) == api_server.MAX_HISTORY_TURNS
+    assert turns[-1]["text"] == str(api_server.MAX_HISTORY_TURNS + 4)
+
+# -------------------- LIMITS --------------------
+def test_rate_limit():
+    limiter = api_server.RateLimiter(rate=2)
+    assert limiter.allow("client") == 0
+    assert limiter.allow("client") == 0
+    assert limiter.allow("client") > 0
+    assert limiter.allow("other client") == 0
+
+def test_rate_limited_requests_get_429(monkeypatch):
+    monkeypatch.setattr(api_server, "API_RATE_LIMIT", 1)
+
+    async def run():
+        async with TestClient(TestServer(api_server.create_app())) as client:
+            first = await client.post("/api/notes", json={"topic": "AI"})
+            second = await client.post("/api/notes", json={"topic": "AI"})
+            return first.status, second.status, second.headers.get("Retry-After")
+    first, second, retry_after = asyncio.run(run())
+    assert first == 200
+    assert second == 429
+    assert int(retry_after) >= 1
+
+def test_cors_allows_only_configured_origins():
+    _, headers, _ = call("GET", "/api/health", headers={"Origin": "http://localhost:8080"})
+    assert headers["Access-Control-Allow-Origin"] == "http://localhost:8080"
+    _, headers, _ = call("GET", "/api/health", headers={"Origin": "https://evil.example"})
+    assert "Access-Control-Allow-Origin" not in headers
+
+def test_errors_carry_cors_headers(monkeypatch):
+    origin = {"Origin": "http://localhost:8080"}
+    status, headers, body = call("POST", "/api/quiz", json={"topic": 42}, headers=origin)
+    assert status == 400
+    assert headers["Access-Control-Allow-Origin"] == "http://localhost:8080"
+    monkeypatch.setattr(api_server, "API_RATE_LIMIT", 1)
+
+    async def run():
+        async with TestClient(TestServer(api_server.create_app())) as client:
+            await client.post("/api/notes", json={"topic": "AI"}, headers=origin)
+            return await client.post("/api/notes", json={"topic": "AI"}, headers=origin)
+    response = asyncio.run(run())
+    assert response.status == 429
+    assert response.headers["Access-Control-Allow-Origin"] == "http://localhost:8080"
+
+def test_preflight():
+    status, headers, _ = call("OPTIONS", "/api/chat", headers={
+        "Origin": "http://localhost:8080", "Access-Control-Request-Method": "POST",
+    })
+    assert status == 200
+    assert "POST" in headers["Access-Control-Allow-Methods"]
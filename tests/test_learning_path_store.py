@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pytest
+
+import learning_path_store
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """
+    An empty store where every topic embeds to the same vector, so only the
+    term check keeps distinct topics apart, and generation is counted.
+    """
+    monkeypatch.setattr(learning_path_store, "_DB_PATH", os.path.join(tmp_path, "paths.sqlite3"))
+    monkeypatch.setattr(learning_path_store, "_matrix", None)
+    monkeypatch.setattr(learning_path_store, "_embed", lambda key: np.ones(8, dtype="float32") / np.sqrt(8))
+    generated = []
+
+    def generate(topic):
+        generated.append(topic)
+        return {"title": topic, "overview": "", "stages": [{"name": topic}]}
+    monkeypatch.setattr(learning_path_store, "generate_structured_path", generate)
+    return generated
+
+def test_abbreviations_expand_only_as_the_whole_topic():
+    assert learning_path_store.normalize_topic("ML basics") == "machine learning"
+    assert learning_path_store.normalize_topic("Introduction to NLP") == "natural language processing"
+    assert learning_path_store.normalize_topic("CV writing") == "cv writing"
+    assert learning_path_store.normalize_topic("AI for healthcare") == "ai for healthcare"
+
+def test_same_terms():
+    assert learning_path_store.same_terms("python programming", "programming in python")
+    assert learning_path_store.same_terms("neural networks", "neural network")
+    assert not learning_path_store.same_terms("python for data science", "python for web development")
+    assert not learning_path_store.same_terms("java", "javascript")
+    assert not learning_path_store.same_terms("sql", "nosql")
+    assert learning_path_store.same_terms("sorting algoritms", "sorting algorithm")
+
+@pytest.mark.parametrize("topic, other", [
+    ("statistics", "statics"),
+    ("html", "xhtml"),
+    ("probability and statistics", "probability and statics"),
+])
+def test_near_miss_terms_are_different_topics(topic, other):
+    assert not learning_path_store.same_terms(topic, other)
+
+def test_similar_but_distinct_topics_get_their_own_path(store):
+    first, source, _ = learning_path_store.get_learning_path("Python for data science")
+    assert source == "generated"
+    second, source, matched = learning_path_store.get_learning_path("Python for web development")
+    assert source == "generated"
+    assert matched == "Python for web development"
+    assert second != first
+    assert store == ["Python for data science", "Python for web development"]
+
+def test_same_topic_reuses_the_stored_path(store):
+    learning_path_store.get_learning_path("Machine learning")
+    _, source, _ = learning_path_store.get_learning_path("ML basics")
+    assert source == "stored"
+    learning_path_store.get_learning_path("Python programming")
+    _, source, matched = learning_path_store.get_learning_path("Programming in Python")
+    assert source == "similar"
+    assert matched == "Python programming"
+    assert store == ["Machine learning", "Python programming"]
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+from storage import cache_dir
+from profiling import profiled
+
+# -------------------- SETUP --------------------
+# Transcripts are shared by every user of the process (and every process that
+# points at the same cache directory), so a popular lecture is fetched once.
+TRANSCRIPT_TTL = int(os.getenv("TRANSCRIPT_TTL", str(7 * 24 * 3600)))
+NEGATIVE_TTL = int(os.getenv("TRANSCRIPT_NEGATIVE_TTL", str(24 * 3600)))
+SUMMARY_TTL = int(os.getenv("SUMMARY_TTL", str(30 * 24 * 3600)))
+
+_DB_PATH = os.path.join(cache_dir("transcripts"), "transcripts.sqlite3")
+
+@contextmanager
+def _connect():
+    conn = sqlite3.connect(_DB_PATH, timeout=30)
+    try:
+        _init(conn)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+def _init(conn):
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS transcripts ("
+        "video_id TEXT, language TEXT, payload BLOB, error TEXT, fetched_at REAL, "
+        "PRIMARY KEY (video_id, language))"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS summaries ("
+        "key TEXT PRIMARY KEY, summary BLOB, created_at REAL)"
+    )
+
+def _compress(obj):
+    return zlib.compress(json.dumps(obj).encode("utf-8"))
+
+def _decompress(blob):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+# -------------------- VIDEO IDS --------------------
+def extract_video_id(url):
+    """
+    Extracts the 11-character video ID from any common YouTube URL format.
+    """
+    regex = r"(?:v=|\/|youtu\.be\/|embed\/|shorts\/)([0-9A-Za-z_-]{11})"
+    match = re.search(regex, url)
+    return match.group(1) if match else None
+
+# -------------------- TRANSCRIPTS --------------------
+def _lookup(conn, video_id, language, ttl):
+    row = conn.execute(
+        "SELECT payload, error, fetched_at FROM transcripts WHERE video_id = ? AND language = ?",
+        (video_id, language),
+    ).fetchone()
+    if row and time.time() - row[2] < ttl:
+        return row
+    return None
+
+def _save(conn, video_id, language, segments=None, error=None):
+    payload = _compress(segments) if segments is not None else None
+    conn.execute(
+        "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?)",
+        (video_id, language, payload, error, time.time()),
+    )
+    conn.commit()
+
+@profiled()
+def get_transcript(video_id, languages=("en", "hi")):
+    """
+    Returns (segments, language, error) for a video, where segments is a list of
+    {"text", "start", "duration"} dicts. Results come from the store when fresh;
+    otherwise the transcript is fetched from YouTube and stored compressed.
+    Videos without a usable transcript are negatively cached for NEGATIVE_TTL.
+    """
+    from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
+    negative_key = "!" + ",".join(languages)
+    with _connect() as conn:
+        for language in languages:
+            row = _lookup(conn, video_id, language, TRANSCRIPT_TTL)
+            if row and row[0] is not None:
+                return _decompress(row[0]), language, None
+        row = _lookup(conn, video_id, negative_key, NEGATIVE_TTL)
+        if row:
+            return None, None, row[1]
+
+        try:
+            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+            for transcript in transcript_list:
+                if transcript.language_code in languages:
+                    segments = [
+                        {"text": entry["text"], "start": entry["start"], "duration": entry["duration"]}
+                        for entry in transcript.fetch()
+                    ]
+                    _save(conn, video_id, transcript.language_code, segments=segments)
+                    return segments, transcript.language_code, None
+            error = "No transcript available in " + " or ".join(languages) + "."
+        except TranscriptsDisabled:
+            error = "Transcripts are disabled for this video."
+        except NoTranscriptFound:
+            error = "No transcript found for this video."
+        except Exception as e:
+            # Network and API errors are transient, so they are not cached
+            return None, None, f"Error fetching transcript: {str(e)}"
+
+        _save(conn, video_id, negative_key, error=error)
+        return None, None, error
+
+def segments_to_text(segments):
+    """
+    Joins transcript segments into plain text.
+    """
+    return " ".join(segment["text"] for segment in segments)
+
+# -------------------- SUMMARIES --------------------
+def memoized_summary(model_name, prompt, generate):
+    """
+    Returns the stored result for (model_name, prompt), calling generate() and
+    storing its result on a miss. Since the prompt contains the transcript,
+    the same video summarized with the same instructions is only sent once.
+    Empty results are not stored.
+    """
+    key = hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+    with _connect() as conn:
+        row = conn.execute("SELECT summary, created_at FROM summaries WHERE key = ?", (key,)).fetchone()
+        if row and time.time() - row[1] < SUMMARY_TTL:
+            return zlib.decompress(row[0]).decode("utf-8")
+
+    summary = generate()
+    if summary:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)",
+                (key, zlib.compress(summary.encode("utf-8")), time.time()),
+            )
+    return summary
@@ -0,0 +1,214 @@
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from storage import cache_dir
+
+# -------------------- SETUP --------------------
+# Uploaded PDFs are copied to a spool directory on disk (named by content
+# hash) and parsed from read-only memory maps, so page data is file-backed
+# and can be evicted by the OS instead of growing the process heap.
+# Parsing reserves an estimate of its memory against a per-session and a
+# global budget: files over the per-file limit or a session's budget are
+# rejected up front, and jobs that don't fit the global budget wait in line
+# for up to UPLOAD_QUEUE_TIMEOUT seconds before being turned away.
+MB = 1024 * 1024
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_MB", "200")) * MB
+UPLOAD_SESSION_BUDGET = int(os.getenv("UPLOAD_SESSION_BUDGET_MB", "512")) * MB
+UPLOAD_GLOBAL_BUDGET = int(os.getenv("UPLOAD_GLOBAL_BUDGET_MB", "2048")) * MB
+UPLOAD_QUEUE_TIMEOUT = float(os.getenv("UPLOAD_QUEUE_TIMEOUT", "60"))
+UPLOAD_SPOOL_TTL = int(os.getenv("UPLOAD_SPOOL_TTL", str(6 * 3600)))
+# Parsing overhead (object graph + extracted text) relative to the file size
+PARSE_MEMORY_FACTOR = 2.0
+COPY_BLOCK = MB
+
+_SPOOL_DIR = cache_dir("uploads")
+_condition = threading.Condition()
+_global_reserved = 0
+_session_reserved = {}
+_last_sweep = 0.0
+
+class UploadRejected(ValueError):
+    """
+    Raised when an upload exceeds a size limit or memory budget, or the
+    server stays too busy to take it within UPLOAD_QUEUE_TIMEOUT.
+    """
+
+class SpooledUpload:
+    def __init__(self, path, name, size, content_hash):
+        self.path = path
+        self.name = name
+        self.size = size
+        self.content_hash = content_hash
+
+    def __repr__(self):
+        return f"SpooledUpload({self.name!r}, {self.size} bytes)"
+
+# -------------------- SPOOLING --------------------
+def current_session_id():
+    """
+    The Streamlit session id of the running script, or "default" outside Streamlit.
+    """
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx else "default"
+    except ImportError:
+        return "default"
+
+def _sweep():
+    global _last_sweep
+    now = time.time()
+    if now - _last_sweep < 600:
+        return
+    _last_sweep = now
+    for entry in os.scandir(_SPOOL_DIR):
+        try:
+            if now - entry.stat().st_mtime > UPLOAD_SPOOL_TTL:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+def _upload_size(uploaded_file):
+    size = getattr(uploaded_file, "size", None)
+    if size is None:
+        position = uploaded_file.tell()
+        size = uploaded_file.seek(0, os.SEEK_END)
+        uploaded_file.seek(position)
+    return size
+
+def spool_upload(uploaded_file):
+    """
+    Copies an upload to the spool directory in COPY_BLOCK slices (without an
+    extra in-memory copy) and returns a SpooledUpload. Files over
+    UPLOAD_MAX_FILE_BYTES are rejected before anything is written.
+    """
+    name = getattr(uploaded_file, "name", "upload.pdf")
+    size = _upload_size(uploaded_file)
+    if size > UPLOAD_MAX_FILE_BYTES:
+        raise UploadRejected(
+            f"{name} is {size / MB:.0f} MB; the limit is {UPLOAD_MAX_FILE_BYTES / MB:.0f} MB per file."
+        )
+    _sweep()
+
+    fd, tmp_path = tempfile.mkstemp(dir=_SPOOL_DIR, suffix=".part")
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as out:
+            if hasattr(uploaded_file, "getbuffer"):
+                view = uploaded_file.getbuffer()
+                try:
+                    for start in range(0, len(view), COPY_BLOCK):
+                        block = view[start:start + COPY_BLOCK]
+                        digest.update(block)
+                        out.write(block)
+                finally:
+                    view.release()
+            else:
+                uploaded_file.seek(0)
+                for block in iter(lambda: uploaded_file.read(COPY_BLOCK), b""):
+                    digest.update(block)
+                    out.write(block)
+        content_hash = digest.hexdigest()
+        path = os.path.join(_SPOOL_DIR, content_hash + ".pdf")
+        if os.path.exists(path):
+            os.utime(path)  # already spooled; keep it from being swept
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return SpooledUpload(path, name, size, content_hash)
+
+@contextmanager
+def open_mapped(spooled):
+    """
+    Yields a read-only memory map of a spooled file; it supports read(),
+    seek() and tell(), so PdfReader can parse it like a file.
+    """
+    with open(spooled.path, "rb") as f:
+        if spooled.size == 0:
+            raise UploadRejected(f"{spooled.name} is empty.")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+# -------------------- BUDGETS --------------------
+def parse_cost(spooled_files):
+    return int(sum(spooled.size for spooled in spooled_files) * PARSE_MEMORY_FACTOR)
+
+@contextmanager
+def reserve(nbytes, session_id=None, timeout=UPLOAD_QUEUE_TIMEOUT):
+    """
+    Reserves nbytes of parsing memory for the duration of the block.
+    Rejects immediately if the request can never fit (per-session or global
+    budget); otherwise waits up to `timeout` seconds for global capacity.
+    """
+    global _global_reserved
+    session_id = session_id or current_session_id()
+    with _condition:
+        available = min(UPLOAD_SESSION_BUDGET - _session_reserved.get(session_id, 0), UPLOAD_GLOBAL_BUDGET)
+        if nbytes > available:
+            raise UploadRejected(
+                "These files are too large to process at once "
+                f"(needs ~{nbytes / MB:.0f} MB, {max(available, 0) / MB:.0f} MB available). "
+                "Try fewer or smaller files."
+            )
+        fits = _condition.wait_for(lambda: _global_reserved + nbytes <= UPLOAD_GLOBAL_BUDGET, timeout)
+        if not fits:
+            raise UploadRejected("The server is busy processing other uploads. Please try again in a minute.")
+        _global_reserved += nbytes
+        _session_reserved[session_id] = _session_reserved.get(session_id, 0) + nbytes
+    try:
+        yield
+    finally:
+        with _condition:
+            _global_reserved -= nbytes
+            _session_reserved[session_id] -= nbytes
+            if not _session_reserved[session_id]:
+                del _session_reserved[session_id]
+            _condition.notify_all()
+
+def budget_stats():
+    with _condition:
+        return {
+            "reserved_bytes": _global_reserved,
+            "global_budget": UPLOAD_GLOBAL_BUDGET,
+            "sessions": len(_session_reserved),
+        }
+
+# -------------------- PARSING --------------------
+def iter_spooled_pages(spooled):
+    """
+    Yields (page_number, text) for a spooled PDF, parsed from a memory map.
+    """
+    from pdf_stream import iter_pages
+    with open_mapped(spooled) as mapped:
+        yield from iter_pages(mapped)
+
+def extract_spooled_text(spooled):
+    return "\n".join(text for _, text in iter_spooled_pages(spooled) if text).strip()
+
+def pdf_text(uploaded_file, content_hash=None):
+    """
+    Returns the text of an uploaded PDF, cached by content (shared with every
+    tool that parses the same file). Only on a cache miss is the upload
+    spooled to disk and parsed from a memory map under the memory budgets,
+    so reruns cost one hash. Pass content_hash if the caller already has it.
+    Raises UploadRejected.
+    """
+    from artifact_cache import get_artifact, upload_hash
+
+    def extract():
+        spooled = spool_upload(uploaded_file)
+        with reserve(parse_cost([spooled])):
+            return extract_spooled_text(spooled)
+
+    return get_artifact(content_hash or upload_hash(uploaded_file), "pdf_text", extract)
@@ -0,0 +1,185 @@
+import json
+import math
+import os
+from profiling import span
+
+# -------------------- SETUP --------------------
+# Optional compressed storage for the FAISS indexes behind Chat with PDF.
+# The searchable index keeps quantized codes only (float16, int8 scalar
+# quantization or product quantization); the float32 vectors are written
+# once to an .npy file next to the cache and memory-mapped at search time,
+# where only the rows of the top candidates are read to re-rank them exactly.
+#
+#   VECTOR_QUANTIZATION=none|fp16|int8|pq    (default: none, plain float32)
+#
+# Bytes per 768-dim embedding: float32 3072, fp16 1536, int8 768, pq 96.
+#
+# pq codes alone order neighbours poorly (recall@4 ~0.3 on the benchmark
+# corpus), so pq fetches many more candidates for re-ranking: ~1.0 recall at
+# PQ_RERANK_FACTOR 32 against ~0.44 at 4. Without its .npy file a pq index
+# keeps that poor recall; use int8 where the vectors can't be kept.
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none")
+# Candidates fetched from the quantized index per requested result
+RERANK_FACTOR = int(os.getenv("RERANK_FACTOR", "4"))
+PQ_RERANK_FACTOR = int(os.getenv("PQ_RERANK_FACTOR", "32"))
+PQ_SUBVECTOR_DIMS = 8
+# FAISS wants ~39 training vectors per PQ centroid; smaller corpora use int8
+PQ_TRAINING_PER_CENTROID = 39
+MODES = ("none", "fp16", "int8", "pq")
+METADATA_FILE = "quantization.json"
+
+# -------------------- QUANTIZATION --------------------
+def _pq_bits(count):
+    bits = int(math.log2(max(count, 1) / PQ_TRAINING_PER_CENTROID)) if count else 0
+    return min(8, bits)
+
+def build_index(vectors, mode):
+    """
+    Returns a FAISS L2 index over float32 vectors stored in the given mode.
+    Returns (index, mode actually used): "pq" falls back to "int8" when
+    there are too few vectors to train its codebooks.
+    """
+    import faiss
+    dim = vectors.shape[1]
+    if mode == "pq" and (_pq_bits(len(vectors)) < 4 or dim % PQ_SUBVECTOR_DIMS):
+        mode = "int8"
+    if mode == "none":
+        index = faiss.IndexFlatL2(dim)
+    elif mode == "fp16":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2)
+    elif mode == "int8":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+    elif mode == "pq":
+        index = faiss.IndexPQ(dim, dim // PQ_SUBVECTOR_DIMS, _pq_bits(len(vectors)), faiss.METRIC_L2)
+    else:
+        raise ValueError(f"Unknown quantization mode {mode!r}; expected one of {', '.join(MODES)}")
+    with span("quantize", mode=mode, vectors=len(vectors)):
+        if not index.is_trained:
+            index.train(vectors)
+        index.add(vectors)
+    return index, mode
+
+def rerank_factor(mode):
+    return PQ_RERANK_FACTOR if mode == "pq" else RERANK_FACTOR
+
+def index_vectors(index):
+    """
+    The float32 vectors of a flat index, as an (ntotal, d) array.
+    """
+    return index.reconstruct_n(0, index.ntotal)
+
+def resident_bytes(index):
+    """
+    Memory held by an index's stored codes (codebooks excluded).
+    """
+    return index.ntotal * getattr(index, "code_size", index.d * 4)
+
+class RerankedIndex:
+    """
+    Wraps a quantized index so search() fetches rerank_factor x k candidates
+    and orders them by exact L2 distance against memory-mapped float32
+    vectors. Other attributes pass through to the wrapped index, so LangChain
+    and the batch search use it like any FAISS index.
+    """
+    def __init__(self, index, vectors, rerank_factor=RERANK_FACTOR):
+        self.index = index
+        self.vectors = vectors
+        self.rerank_factor = rerank_factor
+
+    def search(self, queries, k):
+        import numpy as np
+        queries = np.asarray(queries, dtype="float32")
+        candidates = min(self.index.ntotal, k * self.rerank_factor)
+        _, ids = self.index.search(queries, candidates)
+        distances = np.full((len(queries), k), np.inf, dtype="float32")
+        results = np.full((len(queries), k), -1, dtype="int64")
+        for row, query in enumerate(queries):
+            # Sorted ids read the memory-mapped rows in file order
+            found = np.sort(ids[row][ids[row] != -1])
+            if not len(found):
+                continue
+            exact = ((np.asarray(self.vectors[found]) - query) ** 2).sum(axis=1)
+            order = exact.argsort()[:k]
+            distances[row, :len(order)] = exact[order]
+            results[row, :len(order)] = found[order]
+        return distances, results
+
+    def __getattr__(self, attr):
+        return getattr(self.index, attr)
+
+# -------------------- VECTOR STORES --------------------
+def quantize_store(vector_store, vectors_path, mode=VECTOR_QUANTIZATION):
+    """
+    Replaces a LangChain FAISS store's flat index with a quantized one and
+    writes its float32 vectors to vectors_path for re-ranking. Does nothing
+    in "none" mode. Returns the mode used.
+    """
+    import numpy as np
+    if mode == "none":
+        return mode
+    vectors = index_vectors(vector_store.index)
+    vector_store.index, mode = build_index(vectors, mode)
+    os.makedirs(os.path.dirname(vectors_path) or ".", exist_ok=True)
+    np.save(vectors_path, vectors)
+    vector_store.rerank_vectors = vectors_path
+    vector_store.quantization = mode
+    return mode
+
+def has_rerank_vectors(vector_store):
+    """
+    False for a quantized store whose re-rank vectors have been deleted.
+    """
+    vectors_path = getattr(vector_store, "rerank_vectors", None)
+    return vectors_path is None or os.path.exists(vectors_path)
+
+def saved_vectors(folder):
+    """
+    Path of the re-rank vectors a saved index uses, or None.
+    """
+    metadata_path = os.path.join(folder, METADATA_FILE)
+    if not os.path.exists(metadata_path):
+        return None
+    with open(metadata_path, encoding="utf-8") as f:
+        return json.load(f).get("vectors")
+
+def delete_vectors(vectors_path):
+    if vectors_path and os.path.exists(vectors_path):
+        os.remove(vectors_path)
+
+def save_store(vector_store, folder, in_use=()):
+    """
+    save_local() plus a small metadata file pointing at the re-rank vectors.
+    The re-rank vectors of the index being replaced are deleted unless they
+    are in in_use, e.g. because a cached vector store still needs them.
+    """
+    metadata_path = os.path.join(folder, METADATA_FILE)
+    vectors_path = getattr(vector_store, "rerank_vectors", None)
+    previous = saved_vectors(folder)
+    if previous != vectors_path and previous not in in_use:
+        delete_vectors(previous)
+    vector_store.save_local(folder)
+    if vectors_path:
+        with open(metadata_path, "w", encoding="utf-8") as f:
+            json.dump({"mode": vector_store.quantization, "vectors": vectors_path}, f)
+    elif os.path.exists(metadata_path):
+        os.remove(metadata_path)
+
+def load_store(folder, embeddings):
+    """
+    FAISS.load_local() that re-attaches memory-mapped re-rank vectors to a
+    quantized index. A quantized index whose vectors are gone is searched
+    without re-ranking.
+    """
+    import numpy as np
+    from langchain.vectorstores import FAISS
+    vector_store = FAISS.load_local(folder, embeddings, allow_dangerous_deserialization=True)
+    metadata_path = os.path.join(folder, METADATA_FILE)
+    if os.path.exists(metadata_path):
+        with open(metadata_path, encoding="utf-8") as f:
+            metadata = json.load(f)
+        if os.path.exists(metadata["vectors"]):
+            vectors = np.load(metadata["vectors"], mmap_mode="r")
+            vector_store.index = RerankedIndex(vector_store.index, vectors, rerank_factor(metadata["mode"]))
+        else:
+            print(f"Re-rank vectors {metadata['vectors']} are missing; searching {metadata['mode']} codes only")
+    return vector_store
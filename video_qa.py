@@ -0,0 +1,92 @@
+import os
+import threading
+from collections import OrderedDict
+from map_reduce_summary import format_timestamp, split_segments
+from storage import cache_dir
+from resources import embedding_model, generative_model
+from profiling import profiled
+
+# -------------------- SETUP --------------------
+# Small chunks keep retrieval precise; the question prompt only ever carries
+# TOP_K of them, so its size does not depend on the length of the video.
+QA_CHUNK_CHARS = int(os.getenv("VIDEO_QA_CHUNK_CHARS", "1000"))
+QA_TOP_K = int(os.getenv("VIDEO_QA_TOP_K", "4"))
+LOADED_INDEXES = 16
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+qa_prompt = """You are answering a question about a YouTube video using only the transcript excerpts below.
+Each excerpt starts with its timestamp. Answer the question directly and mention the timestamps
+you used in [m:ss] form. If the excerpts do not contain the answer, say that the video does not cover it.
+
+Excerpts:
+{context}
+
+Question: {question}
+Answer:"""
+
+def timestamp_link(video_id, seconds):
+    return f"https://www.youtube.com/watch?v={video_id}&t={int(seconds)}s"
+
+# -------------------- INDEX --------------------
+def _build_index(video_id, segments, path):
+    from langchain.vectorstores import FAISS
+    chunks = split_segments(segments, max_chars=QA_CHUNK_CHARS)
+    embeddings = embedding_model()
+    vector_store = FAISS.from_texts(
+        [chunk["text"] for chunk in chunks],
+        embedding=embeddings,
+        metadatas=[{"video_id": video_id, "start": chunk["start"], "end": chunk["end"]} for chunk in chunks],
+    )
+    vector_store.save_local(path)
+    return vector_store
+
+@profiled()
+def get_video_index(video_id, segments):
+    """
+    Returns the vector index for a video, building and saving it on first use.
+    Indexes are kept on disk per video ID and the most recently used ones stay loaded.
+    """
+    from langchain.vectorstores import FAISS
+    with _lock:
+        if video_id in _indexes:
+            _indexes.move_to_end(video_id)
+            return _indexes[video_id]
+
+    path = os.path.join(cache_dir("video_index"), video_id)
+    if os.path.exists(os.path.join(path, "index.faiss")):
+        embeddings = embedding_model()
+        vector_store = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+    else:
+        vector_store = _build_index(video_id, segments, path)
+
+    with _lock:
+        _indexes[video_id] = vector_store
+        while len(_indexes) > LOADED_INDEXES:
+            _indexes.popitem(last=False)
+    return vector_store
+
+# -------------------- QUESTION ANSWERING --------------------
+@profiled()
+def answer_question(video_id, segments, question, k=QA_TOP_K):
+    """
+    Answers a question from the top-k transcript chunks of a video.
+    Returns (answer, sources) where sources is a list of (timestamp, link) pairs
+    in the order the chunks appear in the video.
+    """
+    vector_store = get_video_index(video_id, segments)
+    docs = vector_store.similarity_search(question, k=k)
+    docs = sorted(docs, key=lambda doc: doc.metadata["start"])
+
+    context = "\n\n".join(
+        f"[{format_timestamp(doc.metadata['start'])}] {doc.page_content}" for doc in docs
+    )
+    model = generative_model("gemini-pro")
+    response = model.generate_content(qa_prompt.format(context=context, question=question))
+
+    sources = [
+        (format_timestamp(doc.metadata["start"]), timestamp_link(video_id, doc.metadata["start"]))
+        for doc in docs
+    ]
+    return response.text, sources
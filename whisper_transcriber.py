@@ -0,0 +1,157 @@
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+# -------------------- SETUP --------------------
+# Local fallback for videos without captions. Audio is cut at quiet points
+# into chunks that are transcribed in parallel, one Whisper model per worker
+# process, so a lecture is transcribed in roughly duration / cores time.
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = int(os.getenv("WHISPER_CHUNK_SECONDS", "60"))
+SILENCE_SEARCH_SECONDS = 10
+FRAME_SECONDS = 0.03
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+WHISPER_WORKERS = int(os.getenv("WHISPER_WORKERS", str(os.cpu_count() or 1)))
+
+_pools = {}
+_pools_lock = threading.Lock()
+_model = None  # loaded once in each worker process
+
+# -------------------- AUDIO --------------------
+def load_audio(path):
+    """
+    Decodes any audio or video file to mono 16 kHz float32 samples (requires ffmpeg).
+    """
+    import whisper
+    return whisper.load_audio(path)
+
+def split_on_silence(audio, sample_rate=SAMPLE_RATE, target_seconds=CHUNK_SECONDS,
+                     search_seconds=SILENCE_SEARCH_SECONDS, frame_seconds=FRAME_SECONDS):
+    """
+    Splits audio into chunks of roughly target_seconds, cutting each chunk at the
+    quietest frame within search_seconds of the target so words are not split.
+    Returns a list of (start_sample, end_sample) pairs covering the whole audio.
+    """
+    frame = int(sample_rate * frame_seconds)
+    n_frames = len(audio) // frame
+    target = int(target_seconds / frame_seconds)
+    search = int(search_seconds / frame_seconds)
+    if n_frames <= target + search:
+        return [(0, len(audio))]
+
+    frames = audio[: n_frames * frame].reshape(n_frames, frame)
+    energy = np.sqrt(np.mean(frames ** 2, axis=1))
+
+    bounds = []
+    start = 0
+    while n_frames - start > target + search:
+        lo = start + target - search
+        cut = lo + int(np.argmin(energy[lo:start + target + search]))
+        bounds.append((start * frame, cut * frame))
+        start = cut
+    bounds.append((start * frame, len(audio)))
+    return bounds
+
+# -------------------- WORKERS --------------------
+def _init_worker(model_name):
+    global _model
+    import torch
+    import whisper
+    torch.set_num_threads(1)  # one core per worker; parallelism comes from the pool
+    _model = whisper.load_model(model_name)
+
+def _transcribe_chunk(index, audio, offset, language):
+    result = _model.transcribe(audio, fp16=False, language=language)
+    segments = [
+        {
+            "text": segment["text"].strip(),
+            "start": offset + segment["start"],
+            "duration": segment["end"] - segment["start"],
+        }
+        for segment in result["segments"]
+    ]
+    return index, segments
+
+def _get_pool(model_name, workers):
+    # Pools are kept alive so the models stay loaded between transcriptions.
+    # Workers are spawned rather than forked so they do not inherit the
+    # Streamlit server's threads.
+    with _pools_lock:
+        key = (model_name, workers)
+        if key not in _pools:
+            _pools[key] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_name,),
+            )
+        return _pools[key]
+
+# -------------------- TRANSCRIPTION --------------------
+def submit_transcription(path, model_name=WHISPER_MODEL, workers=WHISPER_WORKERS, language=None):
+    """
+    Decodes a file, splits it on silence and submits every chunk to the worker pool.
+    Returns (futures, audio_seconds); pass the futures to iter_completed.
+    """
+    audio = load_audio(path)
+    bounds = split_on_silence(audio)
+    pool = _get_pool(model_name, workers)
+    futures = [
+        pool.submit(_transcribe_chunk, index, audio[start:end], start / SAMPLE_RATE, language)
+        for index, (start, end) in enumerate(bounds)
+    ]
+    return futures, len(audio) / SAMPLE_RATE
+
+def iter_completed(futures):
+    """
+    Yields (chunk_index, chunk_count, segments) as chunks finish, in completion
+    order, so callers can show partial transcripts. Segment timestamps are
+    relative to the start of the file.
+    """
+    for future in as_completed(futures):
+        index, segments = future.result()
+        yield index, len(futures), segments
+
+def merge_chunks(chunks):
+    """
+    Flattens {chunk_index: segments} into one ordered list of segments.
+    """
+    return [segment for index in sorted(chunks) for segment in chunks[index]]
+
+def realtime_stats(model_name, workers, chunk_count, audio_seconds, wall_seconds):
+    """
+    Benchmark summary for a transcription. The real-time factor is wall time
+    divided by audio duration; below 1.0 is faster than real time.
+    """
+    return {
+        "model": model_name,
+        "workers": workers,
+        "chunks": chunk_count,
+        "audio_seconds": round(audio_seconds, 2),
+        "wall_seconds": round(wall_seconds, 2),
+        "real_time_factor": round(wall_seconds / audio_seconds, 3) if audio_seconds else None,
+    }
+
+def transcribe_file(path, model_name=WHISPER_MODEL, workers=WHISPER_WORKERS, language=None):
+    """
+    Transcribes a file and returns (segments, stats).
+    """
+    started = time.perf_counter()
+    futures, audio_seconds = submit_transcription(path, model_name, workers, language)
+    chunks = {index: segments for index, _, segments in iter_completed(futures)}
+    stats = realtime_stats(model_name, workers, len(chunks), audio_seconds, time.perf_counter() - started)
+    return merge_chunks(chunks), stats
+
+if __name__ == "__main__":
+    # Benchmark: python whisper_transcriber.py lecture.mp3 [model] [workers]
+    if len(sys.argv) < 2:
+        sys.exit("usage: python whisper_transcriber.py <audio-or-video-file> [model] [workers]")
+    model_arg = sys.argv[2] if len(sys.argv) > 2 else WHISPER_MODEL
+    workers_arg = int(sys.argv[3]) if len(sys.argv) > 3 else WHISPER_WORKERS
+    _, benchmark = transcribe_file(sys.argv[1], model_arg, workers_arg)
+    for name, value in benchmark.items():
+        print(f"{name}: {value}")